@@ -0,0 +1,21 @@
+import time
+from django.core.cache import cache
+
+# Version keys for the cache entries that are invalidated by moving to a new version.
+# A missing version starts from the current time so that a key evicted from the cache
+# never falls back to a version that was already used.
+
+def get_cache_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+def bump_cache_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
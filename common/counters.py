@@ -0,0 +1,106 @@
+'''
+Counter reconciliation
+
+GlassClass/Product의 likes, reviews, total_rating, average_rating, questions와 RatingSummary는
+요청 처리 중에 증감되는 비정규화 값이라 중간에 실패한 요청(S3 오류 등)이 있으면 실제 데이터와 어긋난다.
+대상을 pk 순서로 batch_size개씩 잠그고 Like/Review/Question을 대상 id로 묶은 집계 쿼리로 다시 계산해
+달라진 행만 bulk_update로 고친다. 한 번에 한 배치만 메모리에 올리므로 리뷰 수와 관계없이 메모리 사용량이 일정하다.
+'''
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from common.models import Like, Question, RatingSummary, Review
+from common.review_cache import invalidate_reviews_on_commit
+
+COUNTER_BATCH_SIZE = 1000
+
+COUNTER_FIELDS = ['likes', 'reviews', 'total_rating', 'average_rating', 'questions']
+SUMMARY_FIELDS = [
+    'reviews', 'total_rating',
+    'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    'total_sub_rating_1', 'total_sub_rating_2', 'total_sub_rating_3',
+]
+
+def _group_by(model, target_field, ids, **aggregates):
+    # Aggregates of the rows of the given targets, keyed by the target id
+    rows = model.objects.filter(**{f'{target_field}_id__in': ids}).values(target_field).annotate(**aggregates).order_by()
+    return {row.pop(target_field): row for row in rows}
+
+def _review_aggregates():
+    return {
+        'reviews': Count('id'),
+        'total_rating': Sum('rating'),
+        'total_sub_rating_1': Sum('sub_rating_1'),
+        'total_sub_rating_2': Sum('sub_rating_2'),
+        'total_sub_rating_3': Sum('sub_rating_3'),
+        **{f'rating_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+    }
+
+def _reconcile_batch(model, target_field, last_pk, batch_size, fix):
+    # Lock the targets so live updates wait until the batch is fixed
+    targets = list(model.objects.select_for_update().filter(pk__gt=last_pk).order_by('pk').only('pk', *COUNTER_FIELDS)[:batch_size])
+    if not targets:
+        return [], Counter()
+    ids = [target.pk for target in targets]
+
+    likes = _group_by(Like, target_field, ids, likes=Count('id'))
+    questions = _group_by(Question, target_field, ids, questions=Count('id'))
+    reviews = _group_by(Review, target_field, ids, **_review_aggregates())
+    summaries = {
+        getattr(summary, f'{target_field}_id'): summary
+        for summary in RatingSummary.objects.select_for_update().filter(**{f'{target_field}_id__in': ids})
+    }
+
+    drift = Counter()
+    changed_targets = []
+    changed_summaries = []
+    new_summaries = []
+    for target in targets:
+        review = reviews.get(target.pk, {})
+        actual = {
+            'likes': likes.get(target.pk, {}).get('likes', 0),
+            'reviews': review.get('reviews', 0),
+            'total_rating': review.get('total_rating', 0),
+            'questions': questions.get(target.pk, {}).get('questions', 0),
+        }
+        actual['average_rating'] = round(actual['total_rating'] / actual['reviews'], 1) if actual['reviews'] > 0 else 0
+
+        fields = [field for field in COUNTER_FIELDS if getattr(target, field) != actual[field]]
+        if fields:
+            drift.update(fields)
+            for field in fields:
+                setattr(target, field, actual[field])
+            changed_targets.append(target)
+
+        summary = summaries.get(target.pk)
+        if summary is None:
+            if review:
+                new_summaries.append(RatingSummary(**{f'{target_field}_id': target.pk}, **{field: review[field] for field in SUMMARY_FIELDS}))
+                drift['rating_summary'] += 1
+        elif any(getattr(summary, field) != review.get(field, 0) for field in SUMMARY_FIELDS):
+            for field in SUMMARY_FIELDS:
+                setattr(summary, field, review.get(field, 0))
+            changed_summaries.append(summary)
+            drift['rating_summary'] += 1
+
+    if fix:
+        model.objects.bulk_update(changed_targets, COUNTER_FIELDS)
+        RatingSummary.objects.bulk_update(changed_summaries, SUMMARY_FIELDS)
+        RatingSummary.objects.bulk_create(new_summaries)
+        # bulk_update sends no signals, the cached review pages carry the average rating
+        for target in changed_targets:
+            invalidate_reviews_on_commit(target_field, target.pk)
+    return ids, drift
+
+def reconcile_counters(model, target_field, batch_size=COUNTER_BATCH_SIZE, fix=True):
+    # Recompute the counters of every class or product, returns the number of drifted values per field
+    drift = Counter()
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            ids, batch_drift = _reconcile_batch(model, target_field, last_pk, batch_size, fix)
+        drift.update(batch_drift)
+        if len(ids) < batch_size:
+            break
+        last_pk = ids[-1]
+    return drift
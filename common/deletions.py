@@ -0,0 +1,70 @@
+'''
+Deletion queue
+
+이미지마다 delete_object를 요청 안에서 호출하면 이미지 수만큼 S3 왕복이 생기고, 클래스/상품 삭제처럼 cascade로 지워지는 행의
+이미지는 아예 지워지지 않는다. 삭제할 key는 queue_deletion()으로 모아 두었다가 트랜잭션이 커밋된 후
+DELETION_FLUSH_DELAY 동안 들어온 key를 한꺼번에 delete_objects(최대 1000개씩)로 지운다.
+롤백된 트랜잭션의 key는 queue에 들어가지 않는다. 프로세스가 도중에 종료되어 남은 파일은 collect_orphan_images 명령이 정리한다.
+'''
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import transaction
+from common.storage import DELETE_BATCH_SIZE, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for more keys before sending a batch, 0 sends each commit's keys right away
+DELETION_FLUSH_DELAY = getattr(settings, 'DELETION_FLUSH_DELAY', 1.0)
+
+_keys = []
+_timer = None
+_lock = threading.Lock()
+
+def get_image_urls(instance):
+    # URLs of the images and image variants stored on a row
+    fields = [field.name for field in instance._meta.concrete_fields if field.name == 'image' or field.name.endswith('_image')]
+    urls = [getattr(instance, field) for field in fields]
+    for variants in (getattr(instance, 'image_variants', None) or {}).values():
+        urls += variants.values()
+    return [url for url in urls if url]
+
+def flush_deletions():
+    # Delete the queued keys now
+    global _timer
+    with _lock:
+        keys, _keys[:] = list(_keys), []
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not keys:
+        return
+    try:
+        failed = get_storage().delete_many(keys)
+    except Exception:
+        logger.exception('Failed to delete %d queued objects', len(keys))
+        return
+    if failed:
+        logger.error('Failed to delete the queued objects %s', failed)
+
+def _enqueue(keys):
+    global _timer
+    with _lock:
+        _keys.extend(keys)
+        full = len(_keys) >= DELETE_BATCH_SIZE
+        if not full and DELETION_FLUSH_DELAY > 0 and _timer is None:
+            _timer = threading.Timer(DELETION_FLUSH_DELAY, flush_deletions)
+            _timer.daemon = True
+            _timer.start()
+    if full or DELETION_FLUSH_DELAY <= 0:
+        flush_deletions()
+
+def queue_deletion(*urls):
+    # Delete the objects behind the URLs once the transaction is committed, the URLs of other hosts are ignored
+    storage = get_storage()
+    keys = {key for key in map(storage.get_key, urls) if key}
+    if keys:
+        transaction.on_commit(lambda: _enqueue(sorted(keys)))
+
+atexit.register(flush_deletions)
@@ -0,0 +1,98 @@
+'''
+Image variants
+
+목록 화면에서 원본 JPEG/PNG를 그대로 내려받지 않도록 업로드된 이미지마다 작은 크기(thumbnail, medium)와
+WebP 변환본을 만들어 원본 옆의 variants/ 경로에 올리고, URL을 행의 image_variants에 필드별로 저장한다.
+이미지 디코딩과 인코딩은 CPU 작업이라 GIL을 피하기 위해 process pool(IMAGE_PROCESS_WORKERS)에서 실행하고,
+업로드 worker thread는 결과를 기다렸다가 저장소(common.storage)로 올린다.
+'''
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import transaction
+from PIL import Image, ImageOps
+
+IMAGE_PROCESS_WORKERS = getattr(settings, 'IMAGE_PROCESS_WORKERS', None)
+# Longest edge of each resized variant
+IMAGE_VARIANT_SIZES = getattr(settings, 'IMAGE_VARIANT_SIZES', {'thumbnail': 320, 'medium': 960})
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+_pool = None
+_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # Fresh worker processes instead of forks of the multi-threaded server process
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def _save(image, path, format):
+    if format == 'WEBP':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif format == 'JPEG':
+        image.convert('RGB').save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(path, 'PNG', optimize=True)
+
+def render_variants(path, output_dir, sizes):
+    # Runs in a worker process, returns {variant name: file name in output_dir}
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        format = 'PNG' if original.format == 'PNG' else 'JPEG'
+        extension = 'png' if format == 'PNG' else 'jpg'
+
+        variants = {'webp': 'webp.webp'}
+        _save(image, os.path.join(output_dir, 'webp.webp'), 'WEBP')
+        for name, size in sizes.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            variants[name] = f'{name}.{extension}'
+            _save(resized, os.path.join(output_dir, variants[name]), format)
+            variants[f'{name}_webp'] = f'{name}.webp'
+            _save(resized, os.path.join(output_dir, variants[f'{name}_webp']), 'WEBP')
+    return variants
+
+def get_variant_key(key, name, file_name):
+    # reviews/1/photo.jpg -> reviews/1/variants/photo_thumbnail.jpg
+    directory, base = os.path.split(key)
+    stem = os.path.splitext(base)[0]
+    extension = os.path.splitext(file_name)[1]
+    return f'{directory}/variants/{stem}_{name}{extension}' if directory else f'variants/{stem}_{name}{extension}'
+
+def create_variants(storage, path, key):
+    # Render the variants of the local file and upload them next to key, returns {variant name: url}
+    output_dir = tempfile.mkdtemp()
+    try:
+        if IMAGE_PROCESS_WORKERS == 0:
+            files = render_variants(path, output_dir, IMAGE_VARIANT_SIZES)
+        else:
+            files = _get_pool().submit(render_variants, path, output_dir, IMAGE_VARIANT_SIZES).result()
+
+        variants = {}
+        for name, file_name in files.items():
+            variant_key = get_variant_key(key, name, file_name)
+            storage.upload(os.path.join(output_dir, file_name), variant_key)
+            variants[name] = storage.get_url(variant_key)
+        return variants
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+def set_image(model, pk, field, url, variants, expected=None):
+    # Point the row to the image and its variants, returns the variants it replaced or None when the row is gone.
+    # With expected, the row is only changed while field still holds that URL
+    with transaction.atomic():
+        row = model.objects.select_for_update().filter(pk=pk).only(field, 'image_variants').first()
+        if row is None or (expected is not None and getattr(row, field) != expected):
+            return None
+        replaced = (row.image_variants or {}).get(field, {})
+        setattr(row, field, url)
+        row.image_variants = {**(row.image_variants or {}), field: variants}
+        row.save(update_fields=[field, 'image_variants'])
+    return replaced
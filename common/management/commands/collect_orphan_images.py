@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from common.orphans import collect_orphans, ORPHAN_MIN_AGE, ORPHAN_PREFIXES
+from common.storage import DELETE_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Delete the stored review, QnA and detail images that no row refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', action='append', dest='prefixes', help=f'Key prefix to check, can be repeated (default: {", ".join(ORPHAN_PREFIXES)})')
+        parser.add_argument('--min-age', type=float, default=ORPHAN_MIN_AGE.total_seconds() / 3600, help='Only delete files older than this many hours')
+        parser.add_argument('--page-size', type=int, default=DELETE_BATCH_SIZE, help='Number of files listed and deleted at a time')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the orphans without deleting them')
+
+    def handle(self, *args, **options):
+        if not 0 < options['page_size'] <= DELETE_BATCH_SIZE:
+            raise CommandError(f'--page-size must be between 1 and {DELETE_BATCH_SIZE}')
+        if options['min_age'] < 0:
+            raise CommandError('--min-age must not be negative')
+
+        result = collect_orphans(
+            prefixes=options['prefixes'] or ORPHAN_PREFIXES,
+            min_age=timedelta(hours=options['min_age']),
+            page_size=options['page_size'],
+            purge=not options['dry_run']
+        )
+        self.stdout.write(f'{result["checked"]} files checked, {result["orphans"]} orphaned')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, nothing was deleted'))
+        elif result['failed']:
+            self.stdout.write(self.style.ERROR(f'{result["deleted"]} deleted, {result["failed"]} could not be deleted'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{result["deleted"]} deleted'))
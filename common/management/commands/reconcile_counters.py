@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from common.counters import reconcile_counters, COUNTER_BATCH_SIZE
+from glass_class.models import GlassClass
+from shop.models import Product
+
+class Command(BaseCommand):
+    help = 'Recompute the likes, reviews, ratings and questions counters of the classes and products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=COUNTER_BATCH_SIZE, help='Number of classes or products checked per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drift without fixing it')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number')
+
+        for model, target_field in [(GlassClass, 'glass_class'), (Product, 'product')]:
+            drift = reconcile_counters(model, target_field, batch_size=options['batch_size'], fix=not options['dry_run'])
+            if not drift:
+                self.stdout.write(f'{model.__name__}: no drift')
+                continue
+            for field, count in sorted(drift.items()):
+                self.stdout.write(f'{model.__name__}.{field}: {count} drifted')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, nothing was changed'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Counters reconciled'))
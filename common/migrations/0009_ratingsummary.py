@@ -0,0 +1,58 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_rating_summaries(apps, schema_editor):
+    # Fill the summaries from the existing reviews
+    Review = apps.get_model('common', 'Review')
+    RatingSummary = apps.get_model('common', 'RatingSummary')
+
+    aggregates = {
+        'reviews': Count('id'),
+        'total_rating': Sum('rating'),
+        'total_sub_rating_1': Sum('sub_rating_1'),
+        'total_sub_rating_2': Sum('sub_rating_2'),
+        'total_sub_rating_3': Sum('sub_rating_3'),
+        **{f'rating_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)},
+    }
+    summaries = []
+    for target in ['glass_class', 'product']:
+        rows = Review.objects.filter(**{f'{target}__isnull': False}).values(target).annotate(**aggregates).order_by()
+        for row in rows:
+            target_id = row.pop(target)
+            summaries.append(RatingSummary(**{f'{target}_id': target_id}, **row))
+    RatingSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0008_alter_detailinfo_title'),
+        ('glass_class', '0009_reservationarchive'),
+        ('shop', '0004_remove_product_detail_info_delete_detail_info'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reviews', models.IntegerField(default=0)),
+                ('total_rating', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('total_sub_rating_1', models.IntegerField(default=0)),
+                ('total_sub_rating_2', models.IntegerField(default=0)),
+                ('total_sub_rating_3', models.IntegerField(default=0)),
+                ('glass_class', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='glass_class.glassclass')),
+                ('product', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='shop.product')),
+            ],
+        ),
+        migrations.RunPython(build_rating_summaries, migrations.RunPython.noop),
+    ]
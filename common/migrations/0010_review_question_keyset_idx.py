@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_ratingsummary'),
+        ('glass_class', '0009_reservationarchive'),
+        ('shop', '0004_remove_product_detail_info_delete_detail_info'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['glass_class', 'created_at', 'id'], name='question_class_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['product', 'created_at', 'id'], name='question_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['glass_class', 'created_at', 'id'], name='review_class_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['glass_class', 'rating', 'id'], name='review_class_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'created_at', 'id'], name='review_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'rating', 'id'], name='review_product_rating_idx'),
+        ),
+    ]
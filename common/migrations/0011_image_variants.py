@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0010_review_question_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='detailinfo',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -26,6 +26,8 @@ class ContentModel(TimeStampedModel):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField(max_length=500)
     image = models.URLField(max_length=255, null=True, blank=True)
+    # Resized and WebP copies of the image, {'image': {variant name: url}}
+    image_variants = models.JSONField(default=dict, blank=True)
 
     
 class DetailInfo(TimeStampedModel):
@@ -43,6 +45,8 @@ class DetailInfo(TimeStampedModel):
     product_image = models.URLField(max_length=255, blank=True, null=True)
     notice_image = models.URLField(max_length=255, blank=True, null=True)
     event_image = models.URLField(max_length=255, blank=True, null=True)
+    # Resized and WebP copies of the images, {image field: {variant name: url}}
+    image_variants = models.JSONField(default=dict, blank=True)
     glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE, null=True, blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True)
 
@@ -60,6 +64,13 @@ class Like(TimeStampedModel):
 class Review(ContentModel):
     class Meta:
         app_label = 'common'
+        # Keyset pagination of the reviews of a class or product
+        indexes = [
+            models.Index(fields=['glass_class', 'created_at', 'id'], name='review_class_created_idx'),
+            models.Index(fields=['glass_class', 'rating', 'id'], name='review_class_rating_idx'),
+            models.Index(fields=['product', 'created_at', 'id'], name='review_product_created_idx'),
+            models.Index(fields=['product', 'rating', 'id'], name='review_product_rating_idx'),
+        ]
 
     # Review model
     rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)], default=1)
@@ -74,9 +85,37 @@ class Review(ContentModel):
     glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE, null=True, blank=True)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True)
 
+class RatingSummary(models.Model):
+    class Meta:
+        app_label = 'common'
+
+    def __str__(self):
+        return str(self.glass_class or self.product)
+
+    # Rating summary model, updated together with the reviews of a class or product
+    glass_class = models.OneToOneField(GlassClass, on_delete=models.CASCADE, null=True, blank=True, related_name='rating_summary')
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='rating_summary')
+    reviews = models.IntegerField(default=0)
+    total_rating = models.IntegerField(default=0)
+    # Number of reviews per star
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    # Sum of the sub ratings
+    total_sub_rating_1 = models.IntegerField(default=0)
+    total_sub_rating_2 = models.IntegerField(default=0)
+    total_sub_rating_3 = models.IntegerField(default=0)
+
 class Question(ContentModel):
     class Meta:
         app_label = 'common'
+        # Keyset pagination of the questions of a class or product
+        indexes = [
+            models.Index(fields=['glass_class', 'created_at', 'id'], name='question_class_created_idx'),
+            models.Index(fields=['product', 'created_at', 'id'], name='question_product_created_idx'),
+        ]
 
     # QnA model
     title = models.CharField(max_length=100)
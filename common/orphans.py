@@ -0,0 +1,46 @@
+'''
+Orphan image collection
+
+요청 도중 실패하거나 deletion queue가 비워지기 전에 프로세스가 종료되면 어떤 행도 가리키지 않는 파일이 저장소에 남는다.
+DB의 이미지 URL(image, *_image, image_variants)을 key 집합으로 만든 뒤 저장소 목록을 페이지 단위로 읽으면서
+집합에 없는 key를 페이지마다 delete_many로 지운다. 아직 행에 붙지 않은 업로드(presigned POST, upload worker)를
+지우지 않도록 min_age보다 오래된 파일만 지운다.
+'''
+from collections import Counter
+from datetime import timedelta
+from django.utils import timezone
+from common.models import Answer, Comment, DetailInfo, Question, Review
+from common.storage import DELETE_BATCH_SIZE, get_storage
+
+ORPHAN_PREFIXES = ['reviews/', 'qnas/', 'detail/']
+ORPHAN_MIN_AGE = timedelta(hours=24)
+IMAGE_MODELS = [Review, Question, Answer, Comment, DetailInfo]
+
+def get_referenced_keys(storage):
+    keys = set()
+    for model in IMAGE_MODELS:
+        fields = [field.name for field in model._meta.concrete_fields if field.name == 'image' or field.name.endswith('_image')]
+        for row in model.objects.values_list('image_variants', *fields).iterator(chunk_size=2000):
+            urls = list(row[1:])
+            for variants in (row[0] or {}).values():
+                urls += variants.values()
+            keys.update(key for key in map(storage.get_key, urls) if key)
+    return keys
+
+def collect_orphans(prefixes=ORPHAN_PREFIXES, min_age=ORPHAN_MIN_AGE, page_size=DELETE_BATCH_SIZE, purge=True):
+    # Delete the stored files no row points to, returns the number of checked, orphaned, deleted and failed files
+    storage = get_storage()
+    referenced = get_referenced_keys(storage)
+    cutoff = timezone.now() - min_age
+
+    result = Counter()
+    for prefix in prefixes:
+        for page in storage.list_pages(prefix, page_size):
+            orphans = [key for key, modified in page if key not in referenced and modified < cutoff]
+            result['checked'] += len(page)
+            result['orphans'] += len(orphans)
+            if purge and orphans:
+                failed = storage.delete_many(orphans)
+                result['deleted'] += len(orphans) - len(failed)
+                result['failed'] += len(failed)
+    return result
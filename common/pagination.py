@@ -0,0 +1,79 @@
+'''
+Keyset pagination
+
+PageNumberPagination은 COUNT(*)와 OFFSET을 사용하기 때문에 뒤쪽 페이지로 갈수록 건너뛸 행을 모두 읽어 느려진다.
+KeysetPagination은 마지막 행의 (정렬 필드, id) 값을 cursor로 넘겨주고 다음 페이지는 그 값 이후부터
+(glass_class/product, 정렬 필드, id) 인덱스로 바로 읽으므로 페이지 위치와 관계없이 같은 시간이 걸린다.
+(정렬 필드, id) > (값, id) 같은 row value 비교는 SQLite가 첫 번째 컬럼까지만 인덱스 범위로 쓰기 때문에
+같은 값을 가진 나머지 행과 그 다음 값의 행을 각각 인덱스 범위로 읽어 합친다.
+전체 개수를 세지 않으므로 total_pages 대신 다음 페이지 주소(next)만 제공한다.
+'''
+import base64
+import json
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination:
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def __init__(self, ordering):
+        # ordering is (field, 'id') or ('-field', '-id'), both in the same direction
+        self.ordering = ordering
+        self.field = ordering[0].lstrip('-')
+        self.descending = ordering[0].startswith('-')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def encode_cursor(self, item):
+        value = self.model._meta.get_field(self.field).value_to_string(item)
+        position = json.dumps([value, item.pk]).encode()
+        return base64.urlsafe_b64encode(position).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return self.model._meta.get_field(self.field).to_python(value), int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound('Invalid cursor')
+
+    def get_after(self, queryset, value, pk, limit):
+        # Rows after (value, pk) in the ordering, read as two index range scans:
+        # the rest of the rows sharing the value, then the rows after the value
+        lookup = 'lt' if self.descending else 'gt'
+        items = list(queryset.filter(**{self.field: value, f'pk__{lookup}': pk}).order_by(*self.ordering)[:limit])
+        if len(items) < limit:
+            items += list(queryset.filter(**{f'{self.field}__{lookup}': value}).order_by(*self.ordering)[:limit - len(items)])
+        return items
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        page_size = self.get_page_size(request)
+
+        # One extra row tells if there is a next page
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            items = self.get_after(queryset, *self.decode_cursor(cursor), page_size + 1)
+        else:
+            items = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        page = items[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(items) > page_size else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
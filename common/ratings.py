@@ -0,0 +1,91 @@
+'''
+Rating aggregation
+
+리뷰가 등록, 수정, 삭제될 때 GlassClass/Product의 reviews, total_rating, average_rating과
+RatingSummary의 별점별 개수, 세부 평점 합계를 갱신한다.
+파이썬에서 읽고 더한 값을 save()로 통째로 덮어쓰면 동시에 등록된 리뷰가 사라지므로
+F() 표현식으로 DB에서 직접 증감하고, 같은 트랜잭션 안에서 갱신된 값을 다시 읽어
+average_rating만 update_fields로 저장한다. 첫 UPDATE가 행 잠금을 잡고 있어 평균 계산 중에
+다른 리뷰가 끼어들지 않는다. 항상 GlassClass/Product를 먼저, RatingSummary를 나중에 갱신한다.
+'''
+import random
+import time
+from django.db import transaction, OperationalError
+from django.db.models import F
+from common.models import RatingSummary
+
+RATING_RETRIES = 20
+RATING_RETRY_DELAY = 0.01
+
+def _get_deltas(review, sign=1):
+    # Changes of the counters made by adding (sign=1) or removing (sign=-1) the review
+    return {
+        'reviews': sign,
+        'total_rating': sign * review.rating,
+        f'rating_{review.rating}': sign,
+        'total_sub_rating_1': sign * review.sub_rating_1,
+        'total_sub_rating_2': sign * review.sub_rating_2,
+        'total_sub_rating_3': sign * review.sub_rating_3,
+    }
+
+def _merge_deltas(*deltas):
+    merged = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] = merged.get(field, 0) + value
+    return {field: value for field, value in merged.items() if value}
+
+def _update_summary(target_field, target, deltas):
+    summary, _ = RatingSummary.objects.get_or_create(**{target_field: target})
+    RatingSummary.objects.filter(pk=summary.pk).update(**{field: F(field) + value for field, value in deltas.items()})
+
+def _apply(target_field, target, deltas):
+    model = type(target)
+    for attempt in range(RATING_RETRIES):
+        try:
+            with transaction.atomic():
+                model.objects.filter(pk=target.pk).update(
+                    reviews=F('reviews') + deltas.get('reviews', 0),
+                    total_rating=F('total_rating') + deltas.get('total_rating', 0)
+                )
+                target.refresh_from_db(fields=['reviews', 'total_rating'])
+                target.average_rating = round(target.total_rating / target.reviews, 1) if target.reviews > 0 else 0
+                target.save(update_fields=['average_rating'])
+                _update_summary(target_field, target, deltas)
+            return target
+        except OperationalError:
+            # The row is locked by another review, try again after a short random delay
+            if attempt == RATING_RETRIES - 1:
+                raise
+            time.sleep(RATING_RETRY_DELAY * (2 ** min(attempt, 5)) * random.random())
+
+def get_rating_target(review):
+    # Returns the field name and the class or product of the review
+    if review.glass_class_id:
+        return 'glass_class', review.glass_class
+    if review.product_id:
+        return 'product', review.product
+    return None, None
+
+def add_review_rating(review):
+    # A review was created
+    target_field, target = get_rating_target(review)
+    if target is not None:
+        _apply(target_field, target, _get_deltas(review))
+
+def change_review_rating(review, original_review):
+    # The ratings of a review were changed, original_review holds the values before the change
+    target_field, target = get_rating_target(review)
+    deltas = _merge_deltas(_get_deltas(original_review, -1), _get_deltas(review))
+    if target is not None and deltas:
+        _apply(target_field, target, deltas)
+
+def remove_review_rating(review):
+    # A review was deleted
+    target_field, target = get_rating_target(review)
+    if target is not None:
+        _apply(target_field, target, _get_deltas(review, -1))
+
+def get_rating_summary(target_field, target_id):
+    # Summary of a class or product, None when nothing has been reviewed yet
+    return RatingSummary.objects.filter(**{f'{target_field}_id': target_id}).first()
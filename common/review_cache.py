@@ -0,0 +1,39 @@
+'''
+Review page cache
+
+리뷰 목록의 앞쪽 페이지는 작성보다 조회가 훨씬 많으므로 (대상, 정렬, 페이지, 페이지 크기)별로
+read_review의 응답 데이터를 'reviews' 캐시에 저장한다. 리뷰가 등록, 수정, 삭제되면 signals에서
+대상의 캐시 버전을 올려 이전 버전의 페이지를 모두 무효화하고, 남은 항목은 TTL이나 LRU로 정리된다.
+'''
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from common.cache_versions import get_cache_version, bump_cache_version
+
+REVIEW_CACHE_ALIAS = 'reviews'
+REVIEW_CACHE_TIMEOUT = getattr(settings, 'REVIEW_CACHE_TIMEOUT', 60 * 5)
+
+def get_review_cache():
+    # Fall back to the default cache when no 'reviews' cache is configured
+    return caches[REVIEW_CACHE_ALIAS if REVIEW_CACHE_ALIAS in settings.CACHES else 'default']
+
+def _version_key(target_field, target_id):
+    return f'common:reviews:version:{target_field}:{target_id}'
+
+def invalidate_reviews(target_field, target_id):
+    # Drop the cached pages of a class or product by moving to a new version
+    bump_cache_version(_version_key(target_field, target_id))
+
+def invalidate_reviews_on_commit(target_field, target_id):
+    # Readers must not cache the old rows again before the change is committed
+    transaction.on_commit(lambda: invalidate_reviews(target_field, target_id))
+
+def get_page_key(target_field, target_id, page_order, page, page_size):
+    version = get_cache_version(_version_key(target_field, target_id))
+    return f'common:reviews:{target_field}:{target_id}:{version}:{page_order}:{page}:{page_size}'
+
+def get_cached_page(key):
+    return get_review_cache().get(key)
+
+def set_cached_page(key, data):
+    get_review_cache().set(key, data, timeout=REVIEW_CACHE_TIMEOUT)
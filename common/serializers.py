@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from common.models import DetailInfo, Review, Question, Answer, Comment
+from common.models import DetailInfo, Review, RatingSummary, Question, Answer, Comment
+from common.utils import mask_username
 
 class DetailInfoSerializer(serializers.ModelSerializer):
     # Detail info serializer
@@ -7,6 +8,7 @@ class DetailInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = DetailInfo
         fields = '__all__'
+        read_only_fields = ['image_variants']
 
 class ReviewSerializer(serializers.ModelSerializer):
     # Review serializer
@@ -14,6 +16,47 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
+        read_only_fields = ['image_variants']
+
+class ReviewListSerializer(serializers.ModelSerializer):
+    # Review list serializer, the author must be loaded with select_related('author')
+    author = serializers.SerializerMethodField()
+    author_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Review
+        fields = '__all__'
+        read_only_fields = ['image_variants']
+
+    def get_author(self, review):
+        return mask_username(review.author.name)
+
+    def get_author_id(self, review):
+        return review.author.email
+
+class RatingSummarySerializer(serializers.ModelSerializer):
+    # Rating summary serializer
+    average_rating = serializers.SerializerMethodField()
+    stars = serializers.SerializerMethodField()
+    sub_ratings = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RatingSummary
+        fields = ['reviews', 'average_rating', 'stars', 'sub_ratings']
+
+    def get_average_rating(self, summary):
+        return round(summary.total_rating / summary.reviews, 1) if summary.reviews > 0 else 0
+
+    def get_stars(self, summary):
+        # Number of reviews per star
+        return {star: getattr(summary, f'rating_{star}') for star in range(1, 6)}
+
+    def get_sub_ratings(self, summary):
+        # Average of each sub rating
+        return {
+            f'sub_rating_{number}': round(getattr(summary, f'total_sub_rating_{number}') / summary.reviews, 1) if summary.reviews > 0 else 0
+            for number in range(1, 4)
+        }
 
 class QuestionSerializer(serializers.ModelSerializer):
     # Question serializer
@@ -23,11 +66,16 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class QuestionListSerializer(serializers.ModelSerializer):
-    # Question list serializer
+    # Question list serializer, the questions must be loaded with select_related('author') and annotated with is_answered
+    author = serializers.SerializerMethodField()
+    is_answered = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Question
-        fields = ['id', 'title', 'author', 'created_at', 'view_count', 'answered_at', 'is_secret']
+        fields = ['id', 'title', 'author', 'created_at', 'view_count', 'answered_at', 'is_secret', 'is_answered']
+
+    def get_author(self, question):
+        return mask_username(question.author.name)
 
 class AnswerSerializer(serializers.ModelSerializer):
     # Answer serializer
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from common.models import Answer, Comment, DetailInfo, GlassClass, Product, Question, Review
+from common.deletions import get_image_urls, queue_deletion
+from common.review_cache import invalidate_reviews_on_commit
+
+# Drop the cached review pages of the class or product when one of its reviews changes
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    if instance.glass_class_id:
+        invalidate_reviews_on_commit('glass_class', instance.glass_class_id)
+    if instance.product_id:
+        invalidate_reviews_on_commit('product', instance.product_id)
+
+@receiver(post_delete, sender=GlassClass)
+def glass_class_deleted(sender, instance, **kwargs):
+    invalidate_reviews_on_commit('glass_class', instance.pk)
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    invalidate_reviews_on_commit('product', instance.pk)
+
+# Delete the images of removed rows, also when they are removed by a cascade
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Question)
+@receiver(post_delete, sender=Answer)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=DetailInfo)
+def images_deleted(sender, instance, **kwargs):
+    queue_deletion(*get_image_urls(instance))
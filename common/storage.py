@@ -0,0 +1,176 @@
+'''
+Storage service
+
+view 모듈마다 import 시점에 boto3.client를 만들면 시작과 테스트 수집이 느려지고 AWS 자격 증명이 없으면 import조차 되지 않는다.
+저장소는 get_storage()로 처음 사용할 때 하나만 만들고 S3 client도 처음 요청을 보낼 때 만들어 모든 view와 upload worker가 공유한다.
+boto3 client는 thread-safe이므로 여러 worker thread가 같은 connection pool(S3_MAX_POOL_CONNECTIONS)을 사용한다.
+STORAGE_BACKEND로 backend를 바꿀 수 있으며 AWS 없이 개발하거나 테스트할 때는 파일 시스템에 저장하는 LocalStorage를 사용한다.
+'''
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+STORAGE_BACKEND = getattr(settings, 'STORAGE_BACKEND', 'common.storage.S3Storage')
+S3_MAX_POOL_CONNECTIONS = getattr(settings, 'S3_MAX_POOL_CONNECTIONS', 20)
+# delete_objects takes up to 1000 keys
+DELETE_BATCH_SIZE = 1000
+# Large files are sent in parts over several connections
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024, max_concurrency=4)
+
+class S3Storage:
+    def __init__(self):
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+        self.prefix = f'{settings.AWS_S3_CUSTOM_DOMAIN}/'
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Created on the first request, then shared by every thread
+        with self._lock:
+            if self._client is None:
+                self._client = boto3.client(
+                    's3',
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS, retries={'mode': 'standard'})
+                )
+            return self._client
+
+    def upload(self, path, key):
+        self.client.upload_file(path, self.bucket, key, Config=TRANSFER_CONFIG)
+
+    def upload_fileobj(self, file, key):
+        self.client.upload_fileobj(file, self.bucket, key, Config=TRANSFER_CONFIG)
+
+    def download(self, key, path):
+        self.client.download_file(self.bucket, key, path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys):
+        # Returns the keys that could not be deleted
+        keys = list(keys)
+        failed = []
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            response = self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True})
+            failed += [error['Key'] for error in response.get('Errors', [])]
+        return failed
+
+    def list_pages(self, prefix, page_size=DELETE_BATCH_SIZE):
+        # Pages of (key, last modified) under the prefix
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, PaginationConfig={'PageSize': page_size}):
+            yield [(item['Key'], item['LastModified']) for item in page.get('Contents', [])]
+
+    def presign(self, key, content_type, max_size, expires):
+        # Form the client posts the file with, limited to the key, the content type and the size
+        return self.client.generate_presigned_post(
+            self.bucket, key,
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_size]],
+            ExpiresIn=expires
+        )
+
+    def head(self, key):
+        # Size of the stored object, None when it does not exist
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def get_url(self, key):
+        return f'{self.prefix}{key}'
+
+    def get_key(self, url):
+        # None for the URLs that are not stored in this bucket
+        return url[len(self.prefix):] if url and url.startswith(self.prefix) else None
+
+class LocalStorage:
+    # Stores the files under STORAGE_LOCAL_ROOT, for development and tests without AWS
+    def __init__(self):
+        self.root = str(getattr(settings, 'STORAGE_LOCAL_ROOT', os.path.join(settings.BASE_DIR, 'media')))
+        self.prefix = getattr(settings, 'STORAGE_LOCAL_URL', '/media/')
+
+    def get_path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f'Invalid storage key: {key}')
+        return path
+
+    def upload(self, path, key):
+        target = self.get_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def upload_fileobj(self, file, key):
+        target = self.get_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as stored:
+            shutil.copyfileobj(file, stored)
+
+    def download(self, key, path):
+        shutil.copyfile(self.get_path(key), path)
+
+    def delete(self, key):
+        try:
+            os.remove(self.get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+        return []
+
+    def list_pages(self, prefix, page_size=DELETE_BATCH_SIZE):
+        page = []
+        for root, _, files in os.walk(self.root):
+            for name in sorted(files):
+                key = os.path.relpath(os.path.join(root, name), self.root).replace(os.sep, '/')
+                if not key.startswith(prefix):
+                    continue
+                page.append((key, datetime.fromtimestamp(os.path.getmtime(os.path.join(root, name)), tz=timezone.utc)))
+                if len(page) == page_size:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+    def presign(self, key, content_type, max_size, expires):
+        # Nothing to sign locally, the test client writes the file under the root itself
+        return {'url': self.prefix, 'fields': {'key': key, 'Content-Type': content_type}}
+
+    def head(self, key):
+        try:
+            return os.path.getsize(self.get_path(key))
+        except FileNotFoundError:
+            return None
+
+    def get_url(self, key):
+        return f'{self.prefix}{key}'
+
+    def get_key(self, url):
+        return url[len(self.prefix):] if url and url.startswith(self.prefix) else None
+
+_storage = None
+_lock = threading.Lock()
+
+def get_storage():
+    global _storage
+    with _lock:
+        if _storage is None:
+            _storage = import_string(STORAGE_BACKEND)()
+        return _storage
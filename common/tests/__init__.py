@@ -3,4 +3,13 @@ from .test_common import *
 from .test_detail_info import *
 from .test_like import *
 from .test_qna import *
-from .test_review import *
\ No newline at end of file
+from .test_review import *
+from .test_rating import *
+from .test_counters import *
+from .test_pagination import *
+from .test_review_cache import *
+from .test_uploads import *
+from .test_images import *
+from .test_direct_uploads import *
+from .test_storage import *
+from .test_deletions import *
@@ -0,0 +1,82 @@
+# tests/test_counters.py
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from common.counters import reconcile_counters
+from common.models import GlassClass, Like, Product, Question, RatingSummary, Review, User
+from common.ratings import add_review_rating
+from io import StringIO
+
+class ReconcileCountersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.another_user = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpass1')
+
+        self.glass_classes = [
+            GlassClass.objects.create(title=f'Class {i}', short_description='Short Description', image_url='https://example.com/image.jpg', image_alt='Image', created_at=timezone.now())
+            for i in range(3)
+        ]
+        self.product = Product.objects.create(title='Product 1', short_description='Short description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        # Counters kept in sync by the review actions
+        for user, rating in [(self.user, 5), (self.another_user, 2)]:
+            review = Review.objects.create(author=user, glass_class=self.glass_classes[0], rating=rating, content='Review', created_at=timezone.now())
+            add_review_rating(review)
+
+    def test_no_drift(self):
+        self.assertEqual(reconcile_counters(GlassClass, 'glass_class'), {})
+
+    def test_fix_drift(self):
+        # Rows saved without the counters, like a request that failed halfway
+        Like.objects.create(user=self.user, glass_class=self.glass_classes[1], created_at=timezone.now())
+        Question.objects.create(author=self.user, glass_class=self.glass_classes[1], title='Question', content='Question', created_at=timezone.now())
+        Review.objects.create(author=self.user, glass_class=self.glass_classes[2], rating=4, sub_rating_1=3, content='Review', created_at=timezone.now())
+        GlassClass.objects.filter(pk=self.glass_classes[0].pk).update(reviews=5, average_rating=1.0)
+
+        drift = reconcile_counters(GlassClass, 'glass_class', batch_size=2)
+        self.assertEqual(drift, {'likes': 1, 'questions': 1, 'reviews': 2, 'total_rating': 1, 'average_rating': 2, 'rating_summary': 1})
+
+        glass_class = GlassClass.objects.get(pk=self.glass_classes[0].pk)
+        self.assertEqual((glass_class.reviews, glass_class.total_rating, glass_class.average_rating), (2, 7, 3.5))
+        glass_class = GlassClass.objects.get(pk=self.glass_classes[1].pk)
+        self.assertEqual((glass_class.likes, glass_class.questions), (1, 1))
+        summary = RatingSummary.objects.get(glass_class=self.glass_classes[2])
+        self.assertEqual((summary.reviews, summary.rating_4, summary.total_sub_rating_1), (1, 1, 3))
+
+        self.assertEqual(reconcile_counters(GlassClass, 'glass_class'), {})
+
+    def test_reset_summary_without_reviews(self):
+        Review.objects.filter(glass_class=self.glass_classes[0]).delete()
+
+        reconcile_counters(GlassClass, 'glass_class')
+        summary = RatingSummary.objects.get(glass_class=self.glass_classes[0])
+        self.assertEqual((summary.reviews, summary.total_rating, summary.rating_5), (0, 0, 0))
+
+    def test_dry_run(self):
+        Product.objects.filter(pk=self.product.pk).update(likes=3)
+
+        self.assertEqual(reconcile_counters(Product, 'product', fix=False), {'likes': 1})
+        self.assertEqual(Product.objects.get(pk=self.product.pk).likes, 3)
+
+    def test_queries_per_batch(self):
+        # Grouped queries per batch, not per object
+        Review.objects.bulk_create([
+            Review(author=self.user, glass_class=glass_class, rating=3, content='Review', created_at=timezone.now())
+            for glass_class in self.glass_classes for _ in range(5)
+        ])
+        # Savepoint, targets, likes, questions, reviews, summaries, the two bulk_updates, bulk_create and release
+        with self.assertNumQueries(10):
+            reconcile_counters(GlassClass, 'glass_class', batch_size=10)
+
+    def test_reconcile_counters_command(self):
+        Product.objects.filter(pk=self.product.pk).update(questions=2)
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('GlassClass: no drift', out.getvalue())
+        self.assertIn('Product.questions: 1 drifted', out.getvalue())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).questions, 0)
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_counters', '--batch-size', '0')
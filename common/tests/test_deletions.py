@@ -0,0 +1,140 @@
+# tests/test_deletions.py
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from common import deletions, storage
+from common.models import Answer, GlassClass, Question, Review, User
+from common.tests.test_uploads import UploadTestMixin
+from unittest import mock
+import io
+import os
+import time
+
+class DeletionTestMixin(UploadTestMixin):
+    def store(self, key, age=None):
+        # Put a file in the local storage, optionally aged by seconds
+        storage.get_storage().upload_fileobj(io.BytesIO(b'image'), key)
+        if age is not None:
+            modified = time.time() - age
+            os.utime(os.path.join(self.upload_root, key), (modified, modified))
+        return storage.get_storage().get_url(key)
+
+    def get_stored(self):
+        return {os.path.relpath(os.path.join(root, name), self.upload_root) for root, _, files in os.walk(self.upload_root) for name in files}
+
+class DeletionQueueTests(DeletionTestMixin, APITestCase):
+    def setUp(self):
+        self.start_uploads()
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.admin_user = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        # Count the delete_objects calls of the local storage
+        delete_many = storage.LocalStorage.delete_many
+        self.batches = []
+
+        def count_batches(local_storage, keys):
+            self.batches.append(sorted(keys))
+            return delete_many(local_storage, keys)
+
+        patcher = mock.patch.object(storage.LocalStorage, 'delete_many', count_batches)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(deletions.flush_deletions)
+
+    def create_review(self, key):
+        return Review.objects.create(author=self.user, glass_class=self.glass_class, rating=4, content='Review', image=self.store(key), created_at=timezone.now())
+
+    def test_cascaded_rows_are_deleted_in_one_batch(self):
+        for i in range(3):
+            self.create_review(f'reviews/{i}/photo.jpg')
+        question = Question.objects.create(title='Question 1', content='Question', author=self.user, glass_class=self.glass_class, image=self.store('qnas/questions/1/photo.jpg'), created_at=timezone.now())
+        Answer.objects.create(question=question, author=self.admin_user, content='Answer', image=self.store('qnas/answers/1/1/photo.jpg'), image_variants={'image': {'thumbnail': self.store('qnas/answers/1/1/variants/photo_thumbnail.jpg')}}, created_at=timezone.now())
+
+        with mock.patch.object(deletions, 'DELETION_FLUSH_DELAY', 60), self.captureOnCommitCallbacks(execute=True):
+            self.glass_class.delete()
+        self.assertEqual(self.batches, [])
+
+        deletions.flush_deletions()
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(len(self.batches[0]), 6)
+        self.assertEqual(self.get_stored(), set())
+
+    def test_full_queue_is_sent_right_away(self):
+        for i in range(4):
+            self.create_review(f'reviews/{i}/photo.jpg')
+
+        with mock.patch.object(deletions, 'DELETION_FLUSH_DELAY', 60), mock.patch.object(deletions, 'DELETE_BATCH_SIZE', 3):
+            for review in Review.objects.all():
+                with self.captureOnCommitCallbacks(execute=True):
+                    review.delete()
+            self.assertEqual([len(batch) for batch in self.batches], [3])
+            deletions.flush_deletions()
+        self.assertEqual([len(batch) for batch in self.batches], [3, 1])
+
+    def test_rolled_back_deletion_keeps_the_image(self):
+        review = self.create_review('reviews/1/photo.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    review.delete()
+                    raise ValueError
+            except ValueError:
+                pass
+        deletions.flush_deletions()
+        self.assertEqual(self.batches, [])
+        self.assertEqual(self.get_stored(), {'reviews/1/photo.jpg'})
+
+    def test_delete_question_view(self):
+        question = Question.objects.create(title='Question 1', content='Question', author=self.user, glass_class=self.glass_class, image=self.store('qnas/questions/1/photo.jpg'), created_at=timezone.now())
+        Answer.objects.create(question=question, author=self.admin_user, content='Answer', image=self.store('qnas/answers/1/1/photo.jpg'), created_at=timezone.now())
+        GlassClass.objects.filter(pk=self.glass_class.pk).update(questions=1)
+
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('common:question-delete-question'), QUERY_STRING=f'question_id={question.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_stored(), set())
+
+    def test_other_hosts_are_ignored(self):
+        Review.objects.create(author=self.user, glass_class=self.glass_class, rating=4, content='Review', image='https://example.com/photo.jpg', created_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.get().delete()
+        self.assertEqual(self.batches, [])
+
+class OrphanCollectionTests(DeletionTestMixin, APITestCase):
+    DAY = 24 * 3600
+
+    def setUp(self):
+        self.start_uploads()
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        # Referenced by a row
+        Review.objects.create(author=self.user, glass_class=self.glass_class, rating=4, content='Review', image=self.store('reviews/1/photo.jpg', age=self.DAY * 2), image_variants={'image': {'thumbnail': self.store('reviews/1/variants/photo_thumbnail.jpg', age=self.DAY * 2)}}, created_at=timezone.now())
+        # Left behind by deleted rows
+        for key in ['reviews/2/photo.jpg', 'reviews/3/photo.jpg', 'qnas/questions/4/photo.jpg']:
+            self.store(key, age=self.DAY * 2)
+        # Uploaded a moment ago, not attached to its row yet
+        self.store('reviews/5/new.jpg')
+        # Outside of the image prefixes
+        self.store('static/logo.png', age=self.DAY * 2)
+
+    def test_dry_run(self):
+        output = io.StringIO()
+        call_command('collect_orphan_images', '--dry-run', stdout=output)
+        self.assertIn('6 files checked, 3 orphaned', output.getvalue())
+        self.assertEqual(len(self.get_stored()), 7)
+
+    def test_orphans_are_deleted_in_pages(self):
+        output = io.StringIO()
+        call_command('collect_orphan_images', '--page-size', '2', stdout=output)
+        self.assertIn('3 deleted', output.getvalue())
+        self.assertEqual(self.get_stored(), {'reviews/1/photo.jpg', 'reviews/1/variants/photo_thumbnail.jpg', 'reviews/5/new.jpg', 'static/logo.png'})
+
+    def test_prefix_and_min_age(self):
+        call_command('collect_orphan_images', '--prefix', 'reviews/', '--min-age', '0', stdout=io.StringIO())
+        self.assertEqual(self.get_stored(), {'reviews/1/photo.jpg', 'reviews/1/variants/photo_thumbnail.jpg', 'qnas/questions/4/photo.jpg', 'static/logo.png'})
@@ -7,6 +7,11 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from accounts.models import User
 from common.models import GlassClass, Product, DetailInfo
+from common.tests.test_uploads import UploadTestMixin
+from common import storage
+from unittest import mock
+import os
+import threading
 
 class DetailInfoViewSetTests(APITestCase):
     def setUp(self):
@@ -93,4 +98,81 @@ class DetailInfoViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertIn('detail', response.data)
 
-    
\ No newline at end of file
+    
+
+class DetailInfoUploadTests(UploadTestMixin, APITestCase):
+    IMAGES = 3
+
+    def setUp(self):
+        self.start_uploads()
+        self.user = User.objects.create_user(email="example@example.com", username='testuser', password='testpassword', is_superuser=True)
+        self.client.force_authenticate(user=self.user)
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.detail_info = DetailInfo.objects.create(title='Detail Info 1', description_1='Description 1', product_image='https://example.com/image1.jpg', glass_class=self.glass_class, created_at=timezone.now())
+        self.update_detail_info_url = reverse('common:detail_info-update-detail-info')
+
+        # An upload only goes through once every image of the request is being uploaded at the same time
+        upload_fileobj = storage.LocalStorage.upload_fileobj
+        barrier = threading.Barrier(self.IMAGES, timeout=5)
+
+        def slow_upload(local_storage, file, key):
+            barrier.wait()
+            if self.broken and '/event/' in key:
+                raise OSError('connection reset')
+            upload_fileobj(local_storage, file, key)
+
+        patcher = mock.patch.object(storage.LocalStorage, 'upload_fileobj', slow_upload)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.broken = False
+
+    def get_uploaded(self):
+        return {os.path.relpath(os.path.join(root, name), self.upload_root) for root, _, files in os.walk(self.upload_root) for name in files}
+
+    def post(self):
+        data = {
+            'description_1': 'Updated Description 1',
+            'glass_class': self.glass_class.id,
+            'product_image': SimpleUploadedFile('product.jpg', b'product', content_type='image/jpg'),
+            'notice_image': SimpleUploadedFile('notice.jpg', b'notice', content_type='image/jpg'),
+            'event_image': SimpleUploadedFile('event.jpg', b'event', content_type='image/jpg'),
+        }
+        return self.client.post(self.update_detail_info_url, data, format='multipart', QUERY_STRING=f'detail_info_id={self.detail_info.id}', follow=True)
+
+    def test_images_are_uploaded_in_parallel(self):
+        # Uploads one after another would break the barrier and fail the request
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.detail_info.refresh_from_db()
+        urls = [self.detail_info.product_image, self.detail_info.notice_image, self.detail_info.event_image]
+        self.assertEqual(self.get_uploaded(), {storage.get_storage().get_key(url) for url in urls})
+        for name, url in zip(['product', 'notice', 'event'], urls):
+            self.assertRegex(url, rf'detail/{self.detail_info.id}/{name}/[0-9a-f]{{32}}\.jpg$')
+
+    def test_failed_upload_rolls_back(self):
+        self.broken = True
+        with self.assertLogs('common.views.detail_info', level='ERROR'):
+            response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+
+        # Nothing is left in the bucket and the detail info is unchanged
+        self.assertEqual(self.get_uploaded(), set())
+        self.detail_info.refresh_from_db()
+        self.assertEqual((self.detail_info.description_1, self.detail_info.product_image), ('Description 1', 'https://example.com/image1.jpg'))
+
+    def test_failed_reupload_keeps_current_images(self):
+        self.post()
+        self.detail_info.refresh_from_db()
+        current = self.get_uploaded()
+
+        # The same file names again, the failed request only removes its own uploads
+        self.broken = True
+        with self.assertLogs('common.views.detail_info', level='ERROR'):
+            response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+        self.assertEqual(self.get_uploaded(), current)
+        product_image = self.detail_info.product_image
+        self.detail_info.refresh_from_db()
+        self.assertEqual(self.detail_info.product_image, product_image)
@@ -0,0 +1,123 @@
+# tests/test_direct_uploads.py
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.urls import reverse
+from django.utils import timezone
+from common.models import Answer, DetailInfo, GlassClass, Question, Review, User
+from common.tests.test_images import make_image
+from common.tests.test_uploads import UploadTestMixin
+from unittest import mock
+import os
+
+class DirectUploadTests(UploadTestMixin, APITestCase):
+    def setUp(self):
+        self.start_uploads()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(email='other@example.com', username='otheruser', password='testpass')
+        self.admin_user = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.review = Review.objects.create(author=self.user, glass_class=self.glass_class, rating=4, content='Review', created_at=timezone.now())
+        self.question = Question.objects.create(title='Question 1', content='Test Question', author=self.user, glass_class=self.glass_class, created_at=timezone.now())
+        self.answer = Answer.objects.create(question=self.question, author=self.admin_user, content='Answer', created_at=timezone.now())
+        self.detail_info = DetailInfo.objects.create(title='Detail Info 1', description_1='Description 1', glass_class=self.glass_class, created_at=timezone.now())
+
+        self.create_upload_url = reverse('common:upload-create-upload-url')
+        self.confirm_upload_url = reverse('common:upload-confirm-upload')
+
+    def client_upload(self, upload, content):
+        # What the browser does with the presigned form, stored under the local root
+        path = os.path.join(self.upload_root, upload['fields']['key'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as uploaded:
+            uploaded.write(content)
+
+    def upload(self, target, target_id, file_name='photo.jpg', content=None, **data):
+        response = self.client.post(self.create_upload_url, {'target': target, 'id': target_id, 'file_name': file_name, **data}, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client_upload(response.data, content if content is not None else make_image())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.confirm_upload_url, {'target': target, 'id': target_id, 'key': response.data['key'], **data}, format='json', follow=True)
+
+    def test_review_direct_upload(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.create_upload_url, {'target': 'review', 'id': self.review.id, 'file_name': 'photo.JPG'}, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertRegex(response.data['key'], rf'^reviews/{self.review.id}/[0-9a-f]{{32}}\.jpg$')
+        self.assertEqual(response.data['fields']['Content-Type'], 'image/jpeg')
+
+        self.client_upload(response.data, make_image())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.confirm_upload_url, {'target': 'review', 'id': self.review.id, 'key': response.data['key']}, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.review.refresh_from_db()
+        self.assertEqual(response.data['image'], self.review.image)
+        self.assertTrue(self.review.image.startswith(f'/media/reviews/{self.review.id}/'))
+        self.assertEqual(set(self.review.image_variants['image']), {'webp', 'thumbnail', 'thumbnail_webp', 'medium', 'medium_webp'})
+
+    def test_replaced_image_is_deleted(self):
+        self.client.force_authenticate(user=self.user)
+        self.upload('question', self.question.id)
+        self.question.refresh_from_db()
+        previous_path = os.path.join(self.upload_root, self.question.image[len('/media/'):])
+
+        response = self.upload('question', self.question.id, 'new.png', make_image('PNG'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.question.refresh_from_db()
+        self.assertTrue(self.question.image.endswith('.png'))
+        self.assertFalse(os.path.exists(previous_path))
+
+    def test_admin_uploads(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.upload('answer', self.answer.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['image'].startswith(f'/media/qnas/answers/{self.question.id}/{self.answer.id}/'))
+
+        response = self.upload('detail_info', self.detail_info.id, field='notice_image')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.detail_info.refresh_from_db()
+        self.assertTrue(self.detail_info.notice_image.startswith(f'/media/detail/{self.detail_info.id}/notice/'))
+        self.assertIn('notice_image', self.detail_info.image_variants)
+
+    def test_only_author_or_admin(self):
+        self.client.force_authenticate(user=self.other_user)
+        for target, target_id in [('review', self.review.id), ('answer', self.answer.id), ('detail_info', self.detail_info.id)]:
+            response = self.client.post(self.create_upload_url, {'target': target, 'id': target_id, 'file_name': 'photo.jpg'}, format='json', follow=True)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_requests(self):
+        self.client.force_authenticate(user=self.user)
+        for data in [
+            {'target': 'user', 'id': self.user.id, 'file_name': 'photo.jpg'},
+            {'target': 'review', 'file_name': 'photo.jpg'},
+            {'target': 'review', 'id': self.review.id, 'file_name': 'script.js'},
+            {'target': 'review', 'id': self.review.id, 'file_name': 'photo.jpg', 'field': 'author'},
+        ]:
+            response = self.client.post(self.create_upload_url, data, format='json', follow=True)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.create_upload_url, {'target': 'review', 'id': 999, 'file_name': 'photo.jpg'}, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_confirm_checks_key(self):
+        self.client.force_authenticate(user=self.user)
+        other_review = Review.objects.create(author=self.user, glass_class=self.glass_class, rating=4, content='Review', created_at=timezone.now())
+        for key in [f'reviews/{other_review.id}/photo.jpg', f'reviews/{self.review.id}/../{other_review.id}/photo.jpg', f'reviews/{self.review.id}/photo.js']:
+            response = self.client.post(self.confirm_upload_url, {'target': 'review', 'id': self.review.id, 'key': key}, format='json', follow=True)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Issued but never uploaded
+        response = self.client.post(self.confirm_upload_url, {'target': 'review', 'id': self.review.id, 'key': f'reviews/{self.review.id}/missing.jpg'}, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.review.refresh_from_db()
+        self.assertIsNone(self.review.image)
+
+    def test_confirm_rejects_large_file(self):
+        self.client.force_authenticate(user=self.user)
+        with mock.patch('common.views.upload.UPLOAD_MAX_SIZE', 10):
+            response = self.upload('review', self.review.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([files for _, _, files in os.walk(self.upload_root) if files], [])
@@ -0,0 +1,144 @@
+# tests/test_images.py
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from common import images, storage, uploads
+from common.models import DetailInfo, GlassClass, Review, User
+from common.review_cache import get_review_cache
+from common.serializers import DetailInfoSerializer
+from common.tests.test_uploads import UploadTestMixin
+from PIL import Image
+from unittest import mock
+import io
+import os
+import shutil
+import tempfile
+
+def make_image(format='JPEG', size=(2000, 1000)):
+    output = io.BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(output, format)
+    return output.getvalue()
+
+VARIANTS = {'webp', 'thumbnail', 'thumbnail_webp', 'medium', 'medium_webp'}
+
+class RenderVariantsTests(TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def render(self, format):
+        path = os.path.join(self.output_dir, f'original.{format.lower()}')
+        with open(path, 'wb') as original:
+            original.write(make_image(format))
+        files = images.render_variants(path, self.output_dir, {'thumbnail': 320, 'medium': 960})
+        return {name: Image.open(os.path.join(self.output_dir, file_name)) for name, file_name in files.items()}
+
+    def test_jpeg_variants(self):
+        variants = self.render('JPEG')
+        self.assertEqual(set(variants), VARIANTS)
+        self.assertEqual((variants['webp'].format, variants['webp'].size), ('WEBP', (2000, 1000)))
+        self.assertEqual((variants['thumbnail'].format, variants['thumbnail'].size), ('JPEG', (320, 160)))
+        self.assertEqual((variants['thumbnail_webp'].format, variants['thumbnail_webp'].size), ('WEBP', (320, 160)))
+        self.assertEqual((variants['medium'].format, variants['medium'].size), ('JPEG', (960, 480)))
+
+    def test_png_variants_keep_format(self):
+        variants = self.render('PNG')
+        self.assertEqual(variants['thumbnail'].format, 'PNG')
+        self.assertEqual(variants['medium_webp'].format, 'WEBP')
+
+    def test_get_variant_key(self):
+        self.assertEqual(images.get_variant_key('reviews/1/photo.jpg', 'thumbnail', 'thumbnail.jpg'), 'reviews/1/variants/photo_thumbnail.jpg')
+        self.assertEqual(images.get_variant_key('photo.png', 'webp', 'webp.webp'), 'variants/photo_webp.webp')
+
+class ImageVariantTests(UploadTestMixin, APITestCase):
+    def setUp(self):
+        self.start_uploads()
+        get_review_cache().clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.client.force_authenticate(user=self.user)
+
+        self.create_review_url = reverse('common:review-create-review')
+        self.read_review_url = reverse('common:review-read-review')
+        self.update_review_url = reverse('common:review-update-review')
+
+    def post_review(self, url, image, **query):
+        data = {'image': image, 'rating': 4, 'sub_rating_1': 2, 'sub_rating_2': 2, 'sub_rating_3': 2, 'content': 'Good class!'}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, format='multipart', QUERY_STRING='&'.join(f'{key}={value}' for key, value in query.items()), follow=True)
+        self.assertIn(response.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+        return Review.objects.get()
+
+    def upload_exists(self, url):
+        return os.path.exists(os.path.join(self.upload_root, url[len('/media/'):]))
+
+    def test_review_image_variants(self):
+        review = self.post_review(self.create_review_url, SimpleUploadedFile('photo.jpg', make_image(), content_type='image/jpg'), glass_class_id=self.glass_class.id)
+
+        variants = review.image_variants['image']
+        self.assertEqual(set(variants), VARIANTS)
+        stem = os.path.splitext(os.path.basename(review.image))[0]
+        self.assertEqual(variants['thumbnail'], f'/media/reviews/{review.id}/variants/{stem}_thumbnail.jpg')
+        self.assertEqual(Image.open(io.BytesIO(self.read_upload(variants['thumbnail_webp']))).size, (320, 160))
+
+        # Clients pick the small size from the review list
+        response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(response.data['reviews']['results'][0]['image_variants'], {'image': variants})
+
+    def test_replaced_image_variants_are_deleted(self):
+        review = self.post_review(self.create_review_url, SimpleUploadedFile('old.jpg', make_image(), content_type='image/jpg'), glass_class_id=self.glass_class.id)
+        previous_variants = review.image_variants['image']
+
+        review = self.post_review(self.update_review_url, SimpleUploadedFile('new.png', make_image('PNG'), content_type='image/png'), review_id=review.id)
+        stem = os.path.splitext(os.path.basename(review.image))[0]
+        self.assertEqual(review.image_variants['image']['thumbnail'], f'/media/reviews/{review.id}/variants/{stem}_thumbnail.png')
+        self.assertTrue(all(self.upload_exists(url) for url in review.image_variants['image'].values()))
+        self.assertFalse(any(self.upload_exists(url) for url in previous_variants.values()))
+
+    def test_broken_image_keeps_original(self):
+        with self.assertLogs('common.uploads', level='ERROR'):
+            review = self.post_review(self.create_review_url, SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpg'), glass_class_id=self.glass_class.id)
+        self.assertRegex(review.image, rf'^/media/reviews/{review.id}/[0-9a-f]{{32}}\.jpg$')
+        self.assertEqual(review.image_variants, {'image': {}})
+
+    def test_detail_info_image_variants(self):
+        local_storage = storage.get_storage()
+        detail_info = DetailInfo.objects.create(title='Detail Info 1', description_1='Description 1', glass_class=self.glass_class, created_at=timezone.now())
+        image = SimpleUploadedFile('product.jpg', make_image(), content_type='image/jpg')
+        path = uploads.spool(image)
+        self.addCleanup(os.remove, path)
+        local_storage.upload(path, f'detail/{detail_info.id}/product/product.jpg')
+        DetailInfo.objects.filter(pk=detail_info.pk).update(product_image=local_storage.get_url(f'detail/{detail_info.id}/product/product.jpg'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            uploads.enqueue_variants(DetailInfo, detail_info.id, 'product_image', f'detail/{detail_info.id}/product/product.jpg', image)
+
+        detail_info.refresh_from_db()
+        data = DetailInfoSerializer(detail_info).data
+        self.assertEqual(data['image_variants']['product_image']['medium'], f'/media/detail/{detail_info.id}/product/variants/product_medium.jpg')
+        self.assertEqual(set(data['image_variants']['product_image']), VARIANTS)
+
+    def test_variants_of_replaced_detail_image_are_discarded(self):
+        detail_info = DetailInfo.objects.create(title='Detail Info 1', description_1='Description 1', product_image='/media/detail/newer.jpg', glass_class=self.glass_class, created_at=timezone.now())
+
+        # The image was replaced again before its variants were ready
+        with self.captureOnCommitCallbacks(execute=True):
+            uploads.enqueue_variants(DetailInfo, detail_info.id, 'product_image', 'detail/older.jpg', SimpleUploadedFile('older.jpg', make_image(), content_type='image/jpg'))
+
+        detail_info.refresh_from_db()
+        self.assertEqual(detail_info.image_variants, {})
+        self.assertEqual([files for _, _, files in os.walk(self.upload_root) if files], [])
+
+    def test_process_pool(self):
+        path = uploads.spool(SimpleUploadedFile('photo.jpg', make_image(), content_type='image/jpg'))
+        self.addCleanup(os.remove, path)
+        with mock.patch.object(images, 'IMAGE_PROCESS_WORKERS', 1), mock.patch.object(images, '_pool', None):
+            variants = images.create_variants(storage.get_storage(), path, 'pool/photo.jpg')
+            images._pool.shutdown()
+        self.assertEqual(variants['thumbnail'], '/media/pool/variants/photo_thumbnail.jpg')
+        self.assertEqual(Image.open(io.BytesIO(self.read_upload(variants['thumbnail']))).size, (320, 160))
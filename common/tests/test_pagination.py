@@ -0,0 +1,148 @@
+# tests/test_pagination.py
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from common.models import GlassClass, Question, Review, User
+from common.pagination import KeysetPagination
+from common.review_cache import get_review_cache
+from datetime import timedelta
+import os
+import time
+import unittest
+
+# The timing benchmark seeds 50,000 reviews, run it with RUN_BENCHMARKS=1
+RUN_BENCHMARKS = bool(os.environ.get('RUN_BENCHMARKS'))
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        get_review_cache().clear()
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        # Reviews sharing created_at and rating values so the id has to break the ties
+        now = timezone.now()
+        self.reviews = Review.objects.bulk_create([
+            Review(author=self.user, glass_class=self.glass_class, rating=i % 3 + 1, content=f'Review {i}', created_at=now - timedelta(minutes=i // 4))
+            for i in range(12)
+        ])
+        self.questions = Question.objects.bulk_create([
+            Question(author=self.user, glass_class=self.glass_class, title=f'Question {i}', content='Question', created_at=now)
+            for i in range(7)
+        ])
+
+        self.read_review_url = reverse('common:review-read-review')
+        self.read_question_url = reverse('common:question-read-question')
+
+    def read_all(self, url, params, key):
+        # Follow the next links until the last page
+        ids = []
+        response = self.client.get(url, {**params, 'pagination': 'cursor'}, follow=True)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('total_pages', response.data[key])
+            ids += [item['id'] for item in response.data[key]['results']]
+            if response.data[key]['next'] is None:
+                return ids
+            response = self.client.get(response.data[key]['next'], follow=True)
+
+    def test_review_cursor_pagination(self):
+        ids = self.read_all(self.read_review_url, {'glass_class_id': self.glass_class.id}, 'reviews')
+        expected = list(Review.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_review_cursor_pagination_by_rating(self):
+        for page_order, ordering in [('rating', ('rating', 'id')), ('-rating', ('-rating', '-id'))]:
+            ids = self.read_all(self.read_review_url, {'glass_class_id': self.glass_class.id, 'page_order': page_order, 'page_size': 4}, 'reviews')
+            expected = list(Review.objects.order_by(*ordering).values_list('id', flat=True))
+            self.assertEqual(ids, expected)
+
+    def test_question_cursor_pagination(self):
+        ids = self.read_all(self.read_question_url, {'class_id': self.glass_class.id}, 'questions')
+        expected = list(Question.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(response.data['reviews']['total_pages'], 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id, 'pagination': 'cursor', 'cursor': 'invalid'}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class KeysetPaginationBenchmarkTests(TestCase):
+    # Cursor pages must be read through the index, so page 10,000 takes about as long as the first page
+    REVIEWS = 200
+    BENCHMARK_REVIEWS = 50000
+    PAGE_SIZE = 5
+    RUNS = 30
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        self.create_reviews(self.REVIEWS)
+        self.factory = APIRequestFactory()
+
+    def create_reviews(self, count):
+        now = timezone.now()
+        Review.objects.bulk_create([
+            Review(author=self.user, glass_class=self.glass_class, rating=i % 5 + 1, content='Review', created_at=now - timedelta(seconds=i))
+            for i in range(count)
+        ], batch_size=5000)
+
+    def get_page(self, ordering, cursor=None):
+        params = {'page_size': self.PAGE_SIZE}
+        if cursor:
+            params['cursor'] = cursor
+        paginator = KeysetPagination(ordering)
+        page = paginator.paginate_queryset(Review.objects.filter(glass_class=self.glass_class), Request(self.factory.get('/', params)))
+        return paginator, page
+
+    def measure(self, ordering, cursor=None):
+        # Best of several runs to filter out noise
+        timings = []
+        for _ in range(self.RUNS):
+            started = time.perf_counter()
+            self.get_page(ordering, cursor)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def get_cursor(self, ordering, page):
+        # Cursor of the last row of the previous page
+        paginator = KeysetPagination(ordering)
+        paginator.model = Review
+        last = Review.objects.filter(glass_class=self.glass_class).order_by(*ordering)[(page - 1) * self.PAGE_SIZE - 1]
+        return paginator.encode_cursor(last)
+
+    def test_cursor_query_uses_index(self):
+        for ordering, index in [(('-created_at', '-id'), 'review_class_created_idx'), (('rating', 'id'), 'review_class_rating_idx')]:
+            field = ordering[0].lstrip('-')
+            lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+            queryset = Review.objects.filter(glass_class=self.glass_class).order_by(*ordering)
+            value = getattr(queryset[100], field)
+            for rows in [queryset.filter(**{field: value, f'pk__{lookup}': 1}), queryset.filter(**{f'{field}__{lookup}': value})]:
+                plan = rows[:6].explain()
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    @unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run the timing benchmark')
+    def test_cursor_page_time_is_flat(self):
+        self.create_reviews(self.BENCHMARK_REVIEWS - self.REVIEWS)
+        for ordering in [('-created_at', '-id'), ('rating', 'id')]:
+            cursor = self.get_cursor(ordering, 10000)
+            _, page = self.get_page(ordering, cursor)
+            self.assertEqual(len(page), self.PAGE_SIZE)
+
+            first_page = self.measure(ordering)
+            second_page = self.measure(ordering, self.get_cursor(ordering, 2))
+            last_page = self.measure(ordering, cursor)
+
+            # Same page read with OFFSET for comparison
+            started = time.perf_counter()
+            list(Review.objects.filter(glass_class=self.glass_class).order_by(*ordering)[(10000 - 1) * self.PAGE_SIZE:10000 * self.PAGE_SIZE])
+            offset_page = time.perf_counter() - started
+
+            print(f'\n{ordering[0]} page 1 {first_page * 1000:.3f}ms, page 2 {second_page * 1000:.3f}ms, page 10000 {last_page * 1000:.3f}ms (offset {offset_page * 1000:.3f}ms)')
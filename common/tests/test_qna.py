@@ -79,6 +79,36 @@ class QnATests(APITestCase):
         response = self.client.get(self.read_question_url, {'product_id': self.product.id}, follow=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_read_question_answer_status(self):
+        self.user.name = '홍길동입니다'
+        self.user.save()
+        Question.objects.create(title='Question 2', content='Test Question', author=self.user, glass_class=self.glass_class, created_at=timezone.now())
+
+        response = self.client.get(self.read_question_url, {'class_id': self.glass_class.id}, follow=True)
+        questions = {question['title']: question for question in response.data['questions']['results']}
+        self.assertEqual(questions['Question 1']['author'], '홍길동입**')
+        self.assertTrue(questions['Question 1']['is_answered'])
+        self.assertFalse(questions['Question 2']['is_answered'])
+
+    def test_read_question_query_count(self):
+        # Questions of many different authors, half of them answered
+        for i in range(30):
+            author = User.objects.create_user(email=f'author{i}@example.com', username=f'author{i}', password='password')
+            question = Question.objects.create(title=f'Question {i}', content='Test Question', author=author, glass_class=self.glass_class, created_at=timezone.now())
+            if i % 2:
+                Answer.objects.create(author=self.admin_user, question=question, content='Test Answer', created_at=timezone.now())
+
+        # Count and page queries whatever the page size is
+        for page_size in [5, 31]:
+            with self.assertNumQueries(2):
+                response = self.client.get(self.read_question_url, {'class_id': self.glass_class.id, 'page_size': page_size}, follow=True)
+            self.assertEqual(len(response.data['questions']['results']), page_size)
+            self.assertEqual(sum(question['is_answered'] for question in response.data['questions']['results']), sum(Answer.objects.filter(question=question['id']).exists() for question in response.data['questions']['results']))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.read_question_url, {'class_id': self.glass_class.id, 'page_size': 31, 'pagination': 'cursor'}, follow=True)
+        self.assertEqual(len(response.data['questions']['results']), 31)
+
     def test_read_question_no_content_id(self):
         response = self.client.get(self.read_question_url, follow=True)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,151 @@
+# tests/test_rating.py
+from django.test import TestCase, TransactionTestCase
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from common.models import GlassClass, Product, RatingSummary, Review, User
+from common.ratings import add_review_rating, change_review_rating, remove_review_rating
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+class RatingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.product = Product.objects.create(title='Product 1', short_description='Short description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+    def create_review(self, rating, sub_rating=1, **target):
+        review = Review.objects.create(author=self.user, rating=rating, sub_rating_1=sub_rating, sub_rating_2=sub_rating, sub_rating_3=sub_rating, content='Review', created_at=timezone.now(), **target)
+        add_review_rating(review)
+        return review
+
+    def test_add_change_remove_rating(self):
+        review = self.create_review(5, glass_class=self.glass_class)
+        self.create_review(4, glass_class=self.glass_class)
+        self.glass_class.refresh_from_db()
+        self.assertEqual((self.glass_class.reviews, self.glass_class.total_rating, self.glass_class.average_rating), (2, 9, 4.5))
+
+        original_review = Review.objects.get(pk=review.pk)
+        review.rating = 2
+        change_review_rating(review, original_review)
+        self.glass_class.refresh_from_db()
+        self.assertEqual((self.glass_class.reviews, self.glass_class.total_rating, self.glass_class.average_rating), (2, 6, 3.0))
+
+        remove_review_rating(review)
+        remove_review_rating(Review.objects.exclude(pk=review.pk).get())
+        self.glass_class.refresh_from_db()
+        self.assertEqual((self.glass_class.reviews, self.glass_class.total_rating, self.glass_class.average_rating), (0, 0, 0))
+
+    def test_product_rating(self):
+        self.create_review(3, product=self.product)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.reviews, self.product.total_rating, self.product.average_rating), (1, 3, 3.0))
+
+    def test_only_rating_columns_are_written(self):
+        review = Review.objects.create(author=self.user, glass_class=self.glass_class, rating=5, content='Review', created_at=timezone.now())
+
+        # A title changed by someone else in the meantime is not overwritten
+        GlassClass.objects.filter(pk=self.glass_class.pk).update(title='Renamed')
+        add_review_rating(review)
+
+        self.glass_class.refresh_from_db()
+        self.assertEqual(self.glass_class.title, 'Renamed')
+        self.assertEqual(self.glass_class.reviews, 1)
+
+    def test_rating_summary(self):
+        review = self.create_review(5, sub_rating=3, glass_class=self.glass_class)
+        self.create_review(5, sub_rating=2, glass_class=self.glass_class)
+        self.create_review(1, sub_rating=1, glass_class=self.glass_class)
+
+        summary = RatingSummary.objects.get(glass_class=self.glass_class)
+        self.assertEqual((summary.reviews, summary.total_rating), (3, 11))
+        self.assertEqual([summary.rating_1, summary.rating_2, summary.rating_3, summary.rating_4, summary.rating_5], [1, 0, 0, 0, 2])
+        self.assertEqual((summary.total_sub_rating_1, summary.total_sub_rating_2, summary.total_sub_rating_3), (6, 6, 6))
+
+        # The review moves from 5 to 3 stars
+        original_review = Review.objects.get(pk=review.pk)
+        review.rating = 3
+        review.sub_rating_1 = 1
+        change_review_rating(review, original_review)
+        summary.refresh_from_db()
+        self.assertEqual([summary.rating_1, summary.rating_3, summary.rating_5], [1, 1, 1])
+        self.assertEqual((summary.total_rating, summary.total_sub_rating_1, summary.total_sub_rating_2), (9, 4, 6))
+
+        remove_review_rating(review)
+        summary.refresh_from_db()
+        self.assertEqual((summary.reviews, summary.total_rating, summary.rating_3, summary.total_sub_rating_2), (2, 6, 0, 3))
+
+class RatingSummaryViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.product = Product.objects.create(title='Product 1', short_description='Short description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        for rating, sub_rating in [(5, 3), (4, 2), (4, 1)]:
+            review = Review.objects.create(author=self.user, glass_class=self.glass_class, rating=rating, sub_rating_1=sub_rating, sub_rating_2=sub_rating, sub_rating_3=3, content='Review', created_at=timezone.now())
+            add_review_rating(review)
+
+        self.rating_summary_url = reverse('common:review-read-rating-summary')
+
+    def test_read_rating_summary(self):
+        # Served from the summary row only
+        with self.assertNumQueries(1):
+            response = self.client.get(self.rating_summary_url, {'glass_class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reviews'], 3)
+        self.assertEqual(response.data['average_rating'], 4.3)
+        self.assertEqual(response.data['stars'], {1: 0, 2: 0, 3: 0, 4: 2, 5: 1})
+        self.assertEqual(response.data['sub_ratings'], {'sub_rating_1': 2.0, 'sub_rating_2': 2.0, 'sub_rating_3': 3.0})
+
+    def test_read_rating_summary_without_reviews(self):
+        response = self.client.get(self.rating_summary_url, {'product_id': self.product.id}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reviews'], 0)
+        self.assertEqual(response.data['average_rating'], 0)
+        self.assertEqual(response.data['stars'], {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+
+    def test_read_rating_summary_invalid_id(self):
+        response = self.client.get(self.rating_summary_url, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.rating_summary_url, {'glass_class_id': 999}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class RatingConcurrencyTests(TransactionTestCase):
+    # Ratings must be committed by separate connections, so the test data is not wrapped in a transaction
+    REVIEWS = 100
+    WORKERS = 16
+
+    def setUp(self):
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        users = User.objects.bulk_create([
+            User(email=f'user{i}@example.com', username=f'user{i}') for i in range(self.REVIEWS)
+        ])
+        self.reviews = Review.objects.bulk_create([
+            Review(author=user, glass_class=self.glass_class, rating=i % 5 + 1, content='Review', created_at=timezone.now())
+            for i, user in enumerate(users)
+        ])
+
+    def test_parallel_reviews_keep_correct_totals(self):
+        start = threading.Event()
+
+        def rate(review):
+            try:
+                start.wait()
+                add_review_rating(review)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            futures = [executor.submit(rate, review) for review in self.reviews]
+            start.set()
+            for future in futures:
+                future.result()
+
+        total_rating = sum(review.rating for review in self.reviews)
+        self.glass_class.refresh_from_db()
+        self.assertEqual(self.glass_class.reviews, self.REVIEWS)
+        self.assertEqual(self.glass_class.total_rating, total_rating)
+        self.assertEqual(self.glass_class.average_rating, round(total_rating / self.REVIEWS, 1))
@@ -5,10 +5,12 @@ from django.urls import reverse
 from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from common.models import GlassClass, Product, Review, User
+from common.review_cache import get_review_cache
 
 class ReviewViewSetTests(APITestCase):
     def setUp(self):
         self.client = APIClient()
+        get_review_cache().clear()
 
         # Create a user
         self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
@@ -136,6 +138,30 @@ class ReviewViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('reviews', response.data)
 
+    def test_read_review_masks_author(self):
+        self.user.name = '홍길동입니다'
+        self.user.save()
+
+        response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id}, follow=True)
+        review = response.data['reviews']['results'][0]
+        self.assertEqual(review['author'], '홍길동입**')
+        self.assertEqual(review['author_id'], self.user.email)
+
+    def test_read_review_query_count(self):
+        # Reviews of many different authors
+        for i in range(30):
+            author = User.objects.create_user(email=f'author{i}@example.com', username=f'author{i}', password='testpass')
+            Review.objects.create(author=author, glass_class=self.glass_class, rating=4, content=f'Review {i}', created_at=timezone.now())
+
+        # Class, count and page queries whatever the page size is
+        with self.assertNumQueries(3):
+            response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id, 'page_size': 5}, follow=True)
+        self.assertEqual(len(response.data['reviews']['results']), 5)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id, 'page_size': 30}, follow=True)
+        self.assertEqual(len(response.data['reviews']['results']), 30)
+
     def test_read_review_invalid_id(self):
         response = self.client.get(self.read_review_url, {'glass_class_id': 1000}, follow=True)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
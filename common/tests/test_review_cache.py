@@ -0,0 +1,104 @@
+# tests/test_review_cache.py
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils import timezone
+from common.counters import reconcile_counters
+from common.models import GlassClass, Product, Review, User
+from common.ratings import add_review_rating
+from common.review_cache import get_review_cache
+
+class ReviewCacheTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        get_review_cache().clear()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.product = Product.objects.create(title='Product 1', short_description='Short description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for rating in [5, 3]:
+                add_review_rating(Review.objects.create(author=self.user, glass_class=self.glass_class, rating=rating, content='Review', created_at=timezone.now()))
+        self.review = Review.objects.filter(glass_class=self.glass_class).first()
+
+        self.read_review_url = reverse('common:review-read-review')
+        self.update_review_url = reverse('common:review-update-review')
+        self.delete_review_url = reverse('common:review-delete-review')
+
+    def read(self, **params):
+        return self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id, **params}, follow=True)
+
+    def test_cached_page_skips_the_database(self):
+        response = self.read()
+        self.assertEqual(response.data['reviews']['count'], 2)
+
+        with self.assertNumQueries(0):
+            cached = self.read()
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, response.data)
+
+    def test_pages_and_orders_are_cached_separately(self):
+        # Newest first
+        self.assertEqual(self.read(page_size=1).data['reviews']['results'][0]['rating'], 3)
+        self.assertEqual(self.read(page_size=1, page=2).data['reviews']['results'][0]['rating'], 5)
+        self.assertEqual(self.read(page_size=1, page_order='rating').data['reviews']['results'][0]['rating'], 3)
+        self.assertEqual(self.read(page_size=1, page_order='-rating').data['reviews']['results'][0]['rating'], 5)
+
+    def test_create_invalidates_the_pages(self):
+        self.read()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_review_rating(Review.objects.create(author=self.user, glass_class=self.glass_class, rating=1, content='Review', created_at=timezone.now()))
+
+        response = self.read()
+        self.assertEqual(response.data['reviews']['count'], 3)
+        self.assertEqual(response.data['average_rating'], 3.0)
+
+    def test_update_invalidates_the_pages(self):
+        self.read()
+
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.update_review_url, {'rating': 1, 'sub_rating_1': 1, 'sub_rating_2': 1, 'sub_rating_3': 1, 'content': 'Updated'}, format='multipart', QUERY_STRING=f'review_id={self.review.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.read()
+        self.assertIn('Updated', [review['content'] for review in response.data['reviews']['results']])
+
+    def test_delete_invalidates_the_pages(self):
+        self.read()
+
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(self.delete_review_url, QUERY_STRING=f'review_id={self.review.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.read().data['reviews']['count'], 1)
+
+    def test_other_targets_stay_cached(self):
+        self.client.get(self.read_review_url, {'product_id': self.product.id}, follow=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(author=self.user, glass_class=self.glass_class, rating=1, content='Review', created_at=timezone.now())
+
+        with self.assertNumQueries(0):
+            self.client.get(self.read_review_url, {'product_id': self.product.id}, follow=True)
+
+    def test_reconcile_invalidates_the_pages(self):
+        GlassClass.objects.filter(pk=self.glass_class.pk).update(average_rating=1.0)
+        self.assertEqual(self.read().data['average_rating'], 1.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reconcile_counters(GlassClass, 'glass_class')
+        self.assertEqual(self.read().data['average_rating'], 4.0)
+
+    def test_cursor_mode_is_not_cached(self):
+        self.read(pagination='cursor')
+        with self.assertNumQueries(2):
+            self.read(pagination='cursor')
+
+    def test_local_memory_cache_is_bounded(self):
+        # The local-memory backend evicts the least recently used pages past MAX_ENTRIES
+        self.assertEqual(caches['reviews']._max_entries, 1000)
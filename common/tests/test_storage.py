@@ -0,0 +1,77 @@
+# tests/test_storage.py
+from django.test import TestCase, override_settings
+from botocore.stub import Stubber
+from common import storage
+from datetime import datetime, timezone
+from unittest import mock
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+class S3StorageTests(TestCase):
+    def setUp(self):
+        self.storage = storage.S3Storage()
+
+    def test_client_is_created_once_on_first_use(self):
+        with mock.patch.object(storage.boto3, 'client', wraps=storage.boto3.client) as create_client:
+            s3_storage = storage.S3Storage()
+            self.assertEqual(create_client.call_count, 0)
+
+            clients = set()
+            threads = [threading.Thread(target=lambda: clients.add(id(s3_storage.client))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(create_client.call_count, 1)
+        self.assertEqual(len(clients), 1)
+        self.assertEqual(s3_storage.client.meta.config.max_pool_connections, storage.S3_MAX_POOL_CONNECTIONS)
+
+    def test_delete_many_in_batches(self):
+        keys = [f'reviews/{i}/photo.jpg' for i in range(2500)]
+        with Stubber(self.storage.client) as stubber:
+            for start in range(0, len(keys), storage.DELETE_BATCH_SIZE):
+                batch = keys[start:start + storage.DELETE_BATCH_SIZE]
+                errors = [{'Key': batch[0], 'Code': 'AccessDenied', 'Message': 'Access Denied'}] if start == 0 else []
+                stubber.add_response('delete_objects', {'Errors': errors}, {'Bucket': self.storage.bucket, 'Delete': {'Objects': [{'Key': key} for key in batch], 'Quiet': True}})
+            self.assertEqual(self.storage.delete_many(keys), [keys[0]])
+            stubber.assert_no_pending_responses()
+
+    def test_list_pages(self):
+        modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        with Stubber(self.storage.client) as stubber:
+            stubber.add_response('list_objects_v2', {'Contents': [{'Key': 'reviews/1/a.jpg', 'LastModified': modified}], 'IsTruncated': True, 'NextContinuationToken': 'next'}, {'Bucket': self.storage.bucket, 'Prefix': 'reviews/', 'MaxKeys': 1})
+            stubber.add_response('list_objects_v2', {'Contents': [{'Key': 'reviews/2/b.jpg', 'LastModified': modified}], 'IsTruncated': False}, {'Bucket': self.storage.bucket, 'Prefix': 'reviews/', 'MaxKeys': 1, 'ContinuationToken': 'next'})
+            self.assertEqual(list(self.storage.list_pages('reviews/', page_size=1)), [[('reviews/1/a.jpg', modified)], [('reviews/2/b.jpg', modified)]])
+
+    def test_presign(self):
+        upload = self.storage.presign('reviews/1/photo.jpg', 'image/jpeg', 1024, 600)
+        self.assertEqual(upload['fields']['key'], 'reviews/1/photo.jpg')
+        self.assertEqual(upload['fields']['Content-Type'], 'image/jpeg')
+        self.assertIn('policy', upload['fields'])
+
+    def test_head(self):
+        with Stubber(self.storage.client) as stubber:
+            stubber.add_response('head_object', {'ContentLength': 42}, {'Bucket': self.storage.bucket, 'Key': 'reviews/1/photo.jpg'})
+            stubber.add_client_error('head_object', service_error_code='404', http_status_code=404)
+            self.assertEqual(self.storage.head('reviews/1/photo.jpg'), 42)
+            self.assertIsNone(self.storage.head('reviews/1/missing.jpg'))
+
+class LocalStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(STORAGE_LOCAL_ROOT=self.root, STORAGE_LOCAL_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = storage.LocalStorage()
+
+    def test_upload_and_delete(self):
+        self.storage.upload_fileobj(io.BytesIO(b'first'), 'reviews/1/first.jpg')
+        self.storage.upload_fileobj(io.BytesIO(b'second'), 'reviews/2/second.jpg')
+        self.assertEqual(self.storage.head('reviews/1/first.jpg'), 5)
+
+        self.assertEqual(self.storage.delete_many(['reviews/1/first.jpg', 'reviews/2/second.jpg', 'reviews/3/missing.jpg']), [])
+        self.assertEqual([files for _, _, files in os.walk(self.root) if files], [])
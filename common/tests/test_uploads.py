@@ -0,0 +1,206 @@
+# tests/test_uploads.py
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient, APITransactionTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from common import deletions, images, storage, uploads
+from common.models import Answer, GlassClass, Question, Review, User
+from common.review_cache import get_review_cache
+from unittest import mock
+import os
+import shutil
+import tempfile
+import threading
+
+class UploadTestMixin:
+    # Local storage in a temporary directory instead of S3
+    workers = 0
+
+    def start_uploads(self):
+        self.upload_root = tempfile.mkdtemp()
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.upload_root)
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+
+        settings_override = override_settings(STORAGE_LOCAL_ROOT=self.upload_root, STORAGE_LOCAL_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Variants are rendered and queued deletions sent in the calling thread
+        for module, name, value in [
+            (storage, 'STORAGE_BACKEND', 'common.storage.LocalStorage'), (storage, '_storage', None),
+            (uploads, 'UPLOAD_WORKERS', self.workers), (uploads, 'UPLOAD_SPOOL_DIR', self.spool_dir), (uploads, '_executor', None),
+            (images, 'IMAGE_PROCESS_WORKERS', 0), (deletions, 'DELETION_FLUSH_DELAY', 0),
+        ]:
+            patcher = mock.patch.object(module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def read_upload(self, url):
+        with open(os.path.join(self.upload_root, url[len('/media/'):]), 'rb') as uploaded:
+            return uploaded.read()
+
+class ImageUploadTests(UploadTestMixin, APITestCase):
+    def setUp(self):
+        self.start_uploads()
+        get_review_cache().clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.admin_user = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.question = Question.objects.create(title='Question 1', content='Test Question', author=self.user, glass_class=self.glass_class, created_at=timezone.now())
+
+        self.create_review_url = reverse('common:review-create-review')
+        self.read_review_url = reverse('common:review-read-review')
+        self.update_review_url = reverse('common:review-update-review')
+        self.create_question_url = reverse('common:question-create-question')
+        self.create_answer_url = reverse('common:answer-create-answer')
+
+    def image(self, name='test_image.jpg', content=b'image_content'):
+        return SimpleUploadedFile(name, content, content_type='image/jpg')
+
+    def create_review(self, image):
+        data = {'image': image, 'rating': 4, 'sub_rating_1': 2, 'sub_rating_2': 2, 'sub_rating_3': 2, 'content': 'Good class!'}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.create_review_url, data, format='multipart', QUERY_STRING=f'glass_class_id={self.glass_class.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Review.objects.latest('id')
+
+    def test_create_review_image(self):
+        self.client.force_authenticate(user=self.user)
+        review = self.create_review(self.image())
+
+        self.assertRegex(review.image, rf'^/media/reviews/{review.id}/[0-9a-f]{{32}}\.jpg$')
+        self.assertEqual(self.read_upload(review.image), b'image_content')
+        # The spooled file is removed after the upload
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_update_review_image_replaces_the_previous_one(self):
+        self.client.force_authenticate(user=self.user)
+        review = self.create_review(self.image('old.jpg'))
+        previous_path = os.path.join(self.upload_root, review.image[len('/media/'):])
+
+        # The cached page shows the new image once it is uploaded
+        self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id}, follow=True)
+
+        data = {'image': self.image('new.png', b'new_content'), 'rating': 5, 'sub_rating_1': 2, 'sub_rating_2': 2, 'sub_rating_3': 2, 'content': 'Updated'}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.update_review_url, data, format='multipart', QUERY_STRING=f'review_id={review.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        review.refresh_from_db()
+        self.assertRegex(review.image, rf'^/media/reviews/{review.id}/[0-9a-f]{{32}}\.png$')
+        self.assertEqual(self.read_upload(review.image), b'new_content')
+        self.assertFalse(os.path.exists(previous_path))
+
+        response = self.client.get(self.read_review_url, {'glass_class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(response.data['reviews']['results'][0]['image'], review.image)
+
+    def test_same_file_name_gets_a_new_key(self):
+        self.client.force_authenticate(user=self.user)
+        review = self.create_review(self.image('photo.jpg', b'old_content'))
+        previous_image = review.image
+
+        data = {'image': self.image('photo.jpg', b'new_content'), 'rating': 5, 'sub_rating_1': 2, 'sub_rating_2': 2, 'sub_rating_3': 2, 'content': 'Updated'}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.update_review_url, data, format='multipart', QUERY_STRING=f'review_id={review.id}', follow=True)
+
+        review.refresh_from_db()
+        self.assertNotEqual(review.image, previous_image)
+        self.assertEqual(self.read_upload(review.image), b'new_content')
+        self.assertFalse(os.path.exists(os.path.join(self.upload_root, previous_image[len('/media/'):])))
+
+    def test_rolled_back_upload_removes_the_spooled_file(self):
+        review = Review.objects.create(author=self.user, glass_class=self.glass_class, rating=4, content='Review', created_at=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    uploads.enqueue_upload(Review, review.id, uploads.get_upload_key(f'reviews/{review.id}/', self.image()), self.image())
+                    self.assertEqual(len(os.listdir(self.spool_dir)), 1)
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_invalid_image_is_rejected_before_saving(self):
+        self.client.force_authenticate(user=self.user)
+        data = {'image': self.image('bad_image.js'), 'rating': 4, 'sub_rating_1': 2, 'sub_rating_2': 2, 'sub_rating_3': 2, 'content': 'Good class!'}
+        response = self.client.post(self.create_review_url, data, format='multipart', QUERY_STRING=f'glass_class_id={self.glass_class.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Review.objects.exists())
+
+    def test_failed_upload_keeps_the_row(self):
+        self.client.force_authenticate(user=self.user)
+        with mock.patch.object(storage.LocalStorage, 'upload', side_effect=OSError('disk full')), mock.patch.object(uploads, 'UPLOAD_RETRY_DELAY', 0), self.assertLogs('common.uploads', level='ERROR'):
+            review = self.create_review(self.image())
+
+        self.assertIsNone(review.image)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_question_and_answer_images(self):
+        self.client.force_authenticate(user=self.user)
+        data = {'title': 'New Question', 'content': 'New Question', 'is_secret': False, 'image': self.image()}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.create_question_url, data, format='multipart', QUERY_STRING=f'class_id={self.glass_class.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        question = Question.objects.latest('id')
+        self.assertRegex(question.image, rf'^/media/qnas/questions/{question.id}/[0-9a-f]{{32}}\.jpg$')
+
+        self.client.force_authenticate(user=self.admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.create_answer_url, {'content': 'New Answer', 'image': self.image()}, format='multipart', QUERY_STRING=f'question_id={question.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        answer = Answer.objects.get(question=question)
+        self.assertRegex(answer.image, rf'^/media/qnas/answers/{question.id}/{answer.id}/[0-9a-f]{{32}}\.jpg$')
+
+    def test_local_storage_rejects_keys_outside_the_root(self):
+        with self.assertRaises(ValueError):
+            storage.LocalStorage().get_path('../outside.jpg')
+
+class BackgroundUploadTests(UploadTestMixin, APITransactionTestCase):
+    # The request returns before the worker finished the upload
+    workers = 2
+
+    def setUp(self):
+        self.start_uploads()
+        get_review_cache().clear()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpass')
+        self.glass_class = GlassClass.objects.create(title='Class 1', short_description='Short Description 1', image_url='https://example.com/image1.jpg', image_alt='Image 1', created_at=timezone.now())
+        self.create_review_url = reverse('common:review-create-review')
+
+    def read_reviews(self):
+        return self.client.get(reverse('common:review-read-review'), {'glass_class_id': self.glass_class.id}, follow=True)
+
+    def test_upload_runs_after_the_response(self):
+        release = threading.Event()
+        upload = storage.LocalStorage.upload
+
+        def slow_upload(local_storage, path, key):
+            release.wait(5)
+            upload(local_storage, path, key)
+
+        self.client.force_authenticate(user=self.user)
+        data = {'image': SimpleUploadedFile('test_image.jpg', b'image_content', content_type='image/jpg'), 'rating': 4, 'sub_rating_1': 2, 'sub_rating_2': 2, 'sub_rating_3': 2, 'content': 'Good class!'}
+        with mock.patch.object(storage.LocalStorage, 'upload', slow_upload):
+            response = self.client.post(self.create_review_url, data, format='multipart', QUERY_STRING=f'glass_class_id={self.glass_class.id}', follow=True)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            # Saved right away, the image follows
+            review = Review.objects.get()
+            self.assertIsNone(review.image)
+            self.assertIsNone(self.read_reviews().data['reviews']['results'][0]['image'])
+
+            release.set()
+            self.assertTrue(uploads.wait_for_uploads(timeout=5))
+
+        review.refresh_from_db()
+        self.assertRegex(review.image, rf'^/media/reviews/{review.id}/[0-9a-f]{{32}}\.jpg$')
+        # Saving the image invalidated the cached page
+        self.assertEqual(self.read_reviews().data['reviews']['results'][0]['image'], review.image)
+        self.assertEqual(self.read_upload(review.image), b'image_content')
+        uploads._executor.shutdown()
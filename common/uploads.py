@@ -0,0 +1,200 @@
+'''
+Image upload pipeline
+
+리뷰, 질문, 답변 이미지를 요청 안에서 S3로 바로 올리면 사용자가 업로드가 끝날 때까지 기다려야 하므로
+요청에서는 파일을 로컬 임시 파일로 저장(spool)만 하고 바로 응답한다. 트랜잭션이 커밋되면
+worker pool(UPLOAD_WORKERS)이 파일을 저장소(common.storage)로 올린 뒤 행의 image URL을 고치고,
+교체된 이전 이미지는 새 이미지가 반영된 후에 지운다. 업로드한 파일로 thumbnail/WebP variants(common.images)도 만든다.
+클라이언트가 S3로 바로 올리는 경우(presigned POST)에는 업로드가 확인된 key를 행에 붙인 뒤 같은 worker가 variants를 만든다.
+'''
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from common.deletions import queue_deletion
+from common.images import create_variants, set_image
+from common.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = getattr(settings, 'UPLOAD_WORKERS', 4)
+UPLOAD_SPOOL_DIR = getattr(settings, 'UPLOAD_SPOOL_DIR', None)
+UPLOAD_RETRIES = 3
+UPLOAD_RETRY_DELAY = 0.5
+# Presigned uploads
+UPLOAD_MAX_SIZE = getattr(settings, 'UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+UPLOAD_URL_EXPIRES = getattr(settings, 'UPLOAD_URL_EXPIRES', 600)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='upload')
+        return _executor
+
+def get_upload_key(prefix, file):
+    # A random name under the prefix so a re-upload never overwrites the image the row points to
+    ext = os.path.splitext(file.name)[1].lower()
+    return f'{prefix}{uuid.uuid4().hex}{ext}'
+
+def spool(file):
+    # Copy the uploaded file to a local temporary file the worker can read after the request
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(file.name)[1], dir=UPLOAD_SPOOL_DIR)
+    with os.fdopen(fd, 'wb') as spooled:
+        for chunk in file.chunks():
+            spooled.write(chunk)
+    return path
+
+def _create_variants(storage, path, key):
+    # A broken image still keeps its original upload
+    try:
+        return create_variants(storage, path, key)
+    except Exception:
+        logger.exception('Failed to create the variants of %s', key)
+        return {}
+
+def _delete_replaced(url, replaced, variants, replaced_variants):
+    # The previous image and its variants, unless the new upload reused their keys
+    urls = [variant for variant in replaced_variants.values() if variant not in variants.values()]
+    if replaced and replaced != url:
+        urls.append(replaced)
+    queue_deletion(*urls)
+
+def _upload(model, pk, field, key, path, replaced):
+    storage = get_storage()
+    try:
+        for attempt in range(UPLOAD_RETRIES):
+            try:
+                storage.upload(path, key)
+                break
+            except Exception:
+                if attempt == UPLOAD_RETRIES - 1:
+                    logger.exception('Failed to upload %s of %s %s', key, model.__name__, pk)
+                    return None
+                time.sleep(UPLOAD_RETRY_DELAY * (2 ** attempt) * random.random())
+        variants = _create_variants(storage, path, key)
+
+        # Point the row to the new image, then remove the image it replaced
+        url = storage.get_url(key)
+        replaced_variants = set_image(model, pk, field, url, variants)
+        if replaced_variants is None:
+            # The row was deleted while the image was being uploaded
+            queue_deletion(url, *variants.values())
+            return None
+        _delete_replaced(url, replaced, variants, replaced_variants)
+        return url
+    finally:
+        os.remove(path)
+
+def _process(model, pk, field, key, path):
+    # Variants of an image that was already uploaded by the request
+    storage = get_storage()
+    try:
+        variants = _create_variants(storage, path, key)
+        replaced_variants = set_image(model, pk, field, storage.get_url(key), variants, expected=storage.get_url(key))
+        if replaced_variants is None:
+            # The image was replaced or the row deleted in the meantime
+            queue_deletion(*variants.values())
+            return None
+        _delete_replaced(storage.get_url(key), None, variants, replaced_variants)
+        return variants
+    finally:
+        os.remove(path)
+
+def _confirm(model, pk, field, key, replaced):
+    # Fetch a file the client uploaded directly to make its variants
+    storage = get_storage()
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1], dir=UPLOAD_SPOOL_DIR)
+    os.close(fd)
+    try:
+        storage.download(key, path)
+    except Exception:
+        os.remove(path)
+        logger.exception('Failed to download %s of %s %s', key, model.__name__, pk)
+    else:
+        _process(model, pk, field, key, path)
+    _delete_replaced(storage.get_url(key), replaced, {}, {})
+
+def _run(job, *args):
+    # Runs in a worker thread with its own database connection
+    try:
+        return job(*args)
+    finally:
+        close_old_connections()
+
+def _submit(job, *args):
+    if UPLOAD_WORKERS <= 0:
+        # No pool, run in the calling thread
+        job(*args)
+        return
+    executor = _get_executor()
+    with _lock:
+        future = executor.submit(_run, job, *args)
+        _pending.add(future)
+    future.add_done_callback(_discard)
+
+def _discard(future):
+    with _lock:
+        _pending.discard(future)
+
+class _SpooledJob:
+    # on_commit callback owning a spooled file, a rollback drops the callback without calling it
+    # and the file is removed with the callback
+    def __init__(self, path, job, *args):
+        self.path = path
+        self.job = job
+        self.args = args
+        self.submitted = False
+
+    def __call__(self):
+        self.submitted = True
+        _submit(self.job, *self.args)
+
+    def __del__(self):
+        if not self.submitted:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+def enqueue_upload(model, pk, key, file, replaced=None, field='image'):
+    # Spool the file now and upload it after the transaction is committed.
+    # replaced is the URL of the previous image, removed once the new one is in place
+    path = spool(file)
+    transaction.on_commit(_SpooledJob(path, _upload, model, pk, field, key, path, replaced))
+
+def enqueue_variants(model, pk, field, key, file):
+    # Create the variants of a file the request already uploaded to key
+    path = spool(file)
+    transaction.on_commit(_SpooledJob(path, _process, model, pk, field, key, path))
+
+def enqueue_confirmed(model, pk, field, key, replaced=None):
+    # The row already points to the key the client uploaded, create its variants and remove the replaced image
+    transaction.on_commit(lambda: _submit(_confirm, model, pk, field, key, replaced))
+
+def wait_for_uploads(timeout=None):
+    # Block until the queued uploads are finished, returns False on timeout
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _lock:
+            pending = list(_pending)
+        if not pending:
+            return True
+        for future in pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                pass
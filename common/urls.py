@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
-from .views import DetailInfoViewSets, LikeViewSets, ReviewViewSets, QuestionViewSets, AnswerViewSets
+from .views import DetailInfoViewSets, LikeViewSets, ReviewViewSets, QuestionViewSets, AnswerViewSets, UploadViewSets
 
 app_name = 'common'
 
@@ -11,6 +11,7 @@ router.register(r'like', LikeViewSets, basename='like')
 router.register(r'reviews', ReviewViewSets, basename='review')
 router.register(r'questions', QuestionViewSets, basename='question')
 router.register(r'answers', AnswerViewSets, basename='answer')
+router.register(r'uploads', UploadViewSets, basename='upload')
 
 
 
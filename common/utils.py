@@ -0,0 +1,10 @@
+# mask username
+def mask_username(username):
+    if len(username) == 2:
+        return username[0] + '*'
+    elif len(username) == 3:
+        return username[0:2] + '*'
+    elif len(username) == 4:
+        return username[0:3] + '*'
+    else:
+        return username[0:4] + '*' * (len(username) - 4)
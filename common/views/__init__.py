@@ -3,4 +3,5 @@ from .like import *
 from .detail_info import *
 from .review import *
 from .qna import *
-from .comment import *
\ No newline at end of file
+from .comment import *
+from .upload import *
\ No newline at end of file
@@ -1,6 +1,7 @@
+import logging
 import os
-import boto3
-from django.conf import settings
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import viewsets, status
@@ -10,20 +11,41 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from common.models import GlassClass, Product, DetailInfo
 from common.serializers import DetailInfoSerializer
 from common.forms import DetailInfoForm
+from common.deletions import queue_deletion
+from common.storage import get_storage
+from common.uploads import enqueue_variants
 
-# 리소스 누수를 방지하기 위한 전역적으로 boto3 클라이언트 생성
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_S3_REGION_NAME
-)# 리소스 누수를 방지하기 위한 전역적으로 boto3 클라이언트 생성
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_S3_REGION_NAME
-)
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = ['product_image', 'notice_image', 'event_image']
+DETAIL_UPLOAD_WORKERS = len(IMAGE_FIELDS)
+
+def delete_images(keys):
+    if not keys:
+        return
+    try:
+        get_storage().delete_many(keys)
+    except Exception:
+        logger.exception('Failed to delete the uploaded images %s', keys)
+
+def upload_images(images):
+    # Upload (field, key, file) in parallel, the wall time is the slowest upload instead of the sum.
+    # When one of them fails the others are deleted again and the error is raised
+    if not images:
+        return
+    storage = get_storage()
+    with ThreadPoolExecutor(max_workers=min(len(images), DETAIL_UPLOAD_WORKERS)) as executor:
+        futures = {
+            executor.submit(storage.upload_fileobj, file, key): key
+            for _, key, file in images
+        }
+        wait(futures)
+
+    failed = [future for future in futures if future.exception() is not None]
+    if failed:
+        delete_images([futures[future] for future in futures if future.exception() is None])
+        logger.error('Failed to upload the detail images', exc_info=failed[0].exception())
+        raise failed[0].exception()
 
 class DetailInfoViewSets(viewsets.ViewSet):
     # Class detail info view sets
@@ -66,51 +88,60 @@ class DetailInfoViewSets(viewsets.ViewSet):
             return Response({'error': 'detail_info_id가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
         
         detail_info = get_object_or_404(DetailInfo, pk=detail_info_id)
+        # Images to delete once they are replaced or removed
+        previous_images = {field: getattr(detail_info, field) for field in IMAGE_FIELDS}
+        removed_images = []
     
         # Content Update
         form = DetailInfoForm(request.POST, request.FILES, instance=detail_info)
         if form.is_valid():
             detail_info = form.save(commit=False)
 
-            # Function to handle S3 upload
-            def upload_to_s3(file, path):
-                s3_client.upload_fileobj(file, settings.AWS_STORAGE_BUCKET_NAME, path)
-                return f'{settings.AWS_S3_CUSTOM_DOMAIN}/{path}'
-            
             # Function to check if file extension is valid
             def is_valid_image_extension(file):
                 vaild_extensions = ['jpg', 'jpeg', 'png']
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
-    
-            # Upload review image to S3
-            if 'product_image' in request.FILES:
-                image = request.FILES['product_image']
-                if not is_valid_image_extension(image):
-                    return Response({'error': 'product_image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                detail_info.product_image = upload_to_s3(image, f'detail/{detail_info.id}/product/{image.name}')
-            
-            if 'notice_image' in request.FILES:
-                image = request.FILES['notice_image']
+            # Check every image before uploading any of them
+            images = []
+            for field in IMAGE_FIELDS:
+                image = request.FILES.get(field)
+                if image is None:
+                    continue
                 if not is_valid_image_extension(image):
-                    return Response({'error': 'notice_image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+                    return Response({'error': f'{field}는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+                # A random name so a re-upload never overwrites the image the row points to
+                ext = os.path.splitext(image.name)[1][1:].lower()
+                images.append((field, f'detail/{detail_info.id}/{field[:-len("_image")]}/{uuid.uuid4().hex}.{ext}', image))
 
-                detail_info.notice_image = upload_to_s3(image, f'detail/{detail_info.id}/notice/{image.name}')
-            else:
-                detail_info.notice_image = None
-    
-            if 'event_image' in request.FILES:
-                image = request.FILES['event_image']
-                if not is_valid_image_extension(image):
-                    return Response({'error': 'event_image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Upload the images to S3 at the same time
+            try:
+                upload_images(images)
+            except Exception:
+                return Response({'error': '이미지 업로드에 실패했습니다.'}, status=status.HTTP_502_BAD_GATEWAY)
+
+            for field, key, image in images:
+                setattr(detail_info, field, get_storage().get_url(key))
+
+            # Notice and event images are removed when they are not sent
+            for field in ['notice_image', 'event_image']:
+                if field not in request.FILES:
+                    setattr(detail_info, field, None)
+                    removed_images += detail_info.image_variants.pop(field, {}).values()
 
-                detail_info.event_image = upload_to_s3(image, f'detail/{detail_info.id}/event/{image.name}')
-            else:
-                detail_info.event_image = None
-    
             detail_info.modified_at = timezone.now()
-            detail_info.save()
+            try:
+                detail_info.save()
+            except Exception:
+                delete_images([key for _, key, _ in images])
+                raise
+
+            # Images to create the variants of, once the detail info is saved
+            for field, key, image in images:
+                enqueue_variants(DetailInfo, detail_info.id, field, key, image)
+            removed_images += [url for field, url in previous_images.items() if url != getattr(detail_info, field)]
+            queue_deletion(*removed_images)
             
             return Response({'message': '상세정보가 성공적으로 수정되었습니다.'}, status=status.HTTP_200_OK)
         else:
@@ -1,27 +1,22 @@
 import os
-import boto3
 from rest_framework import viewsets, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 
-from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
 from common.models import GlassClass, Product, Question, Answer, User
 from common.forms import QuestionForm, AnswerForm
 from common.serializers import QuestionListSerializer, QuestionSerializer, AnswerSerializer
+from common.pagination import KeysetPagination
+from common.uploads import enqueue_upload, get_upload_key
 from .common import mask_username
 
-# 리소스 누수를 방지하기 위한 전역적으로 boto3 클라이언트 생성
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_S3_REGION_NAME
-)
 
 # Pagination Config
 class PaginationConfig(PageNumberPagination):
@@ -35,6 +30,11 @@ class PaginationConfig(PageNumberPagination):
         page_size = int(self.page_size)
         return (self.page.paginator.count + page_size - 1) // page_size
 
+# Keyset orderings for ?pagination=cursor, each one has a matching index on Question
+CURSOR_ORDERING = {
+    '-created_at': ('-created_at', '-id'),
+}
+
 # Question ViewSets
 class QuestionViewSets(viewsets.ViewSet):
     queryset = Question.objects.all()
@@ -43,6 +43,7 @@ class QuestionViewSets(viewsets.ViewSet):
     serializer_answer = AnswerSerializer
 
     pagination_class = PaginationConfig
+    cursor_pagination_class = KeysetPagination
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def create_question(self, request, *args, **kwargs):
@@ -60,36 +61,33 @@ class QuestionViewSets(viewsets.ViewSet):
             question.author = request.user
             question.created_at = timezone.now()
 
-            # Increase the question count of the class or product
-            if class_id:
-                question.glass_class = get_object_or_404(GlassClass, pk=class_id)
-                question.glass_class.questions += 1
-                question.glass_class.save()
-            elif product_id:
-                question.product = get_object_or_404(Product, pk=product_id)
-                question.product.questions += 1
-                question.product.save()
-
-            question.save()
-
             # Check the image is vaild
             def is_valid_image_extension(file):
                 vaild_extensions = ['jpg', 'jpeg', 'png']
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
 
-            # Upload review image to S3
-            if 'image' in request.FILES:
-                image = request.FILES['image']
-                if not is_valid_image_extension(image):
-                    return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            image = request.FILES.get('image')
+            if image and not is_valid_image_extension(image):
+                return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                # Increase the question count of the class or product
+                if class_id:
+                    question.glass_class = get_object_or_404(GlassClass, pk=class_id)
+                    question.glass_class.questions += 1
+                    question.glass_class.save()
+                elif product_id:
+                    question.product = get_object_or_404(Product, pk=product_id)
+                    question.product.questions += 1
+                    question.product.save()
 
-                # Upload the new image
-                s3_client.upload_fileobj(image, settings.AWS_STORAGE_BUCKET_NAME, f'qnas/questions/{question.id}/{image.name}')
-                question.image = f'{settings.AWS_S3_CUSTOM_DOMAIN}/qnas/questions/{question.id}/{image.name}'
-            
                 question.save()
 
+                # Upload the question image to S3 after the response, the worker sets question.image
+                if image:
+                    enqueue_upload(Question, question.id, get_upload_key(f'qnas/questions/{question.id}/', image), image)
+
             return Response({'message': '질문이 성공적으로 등록되었습니다.'}, status=status.HTTP_201_CREATED)
         else:
             return Response({'error': '입력 항목에 부적절한 값이나 누락된 값이 있습니다.', 'errors': form.errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -116,22 +114,19 @@ class QuestionViewSets(viewsets.ViewSet):
         elif product_id:
             questions = self.queryset.filter(product=product_id).order_by(page_order, '-created_at')
 
-        # Pagination
-        paginator = self.pagination_class()
+        # Load the authors and the answer status in the same query, the serializer masks the username
+        questions = questions.select_related('author').annotate(is_answered=Exists(Answer.objects.filter(question=OuterRef('pk'))))
+
+        # Pagination, the cursor mode skips the count and the offset
+        # view_count changes on every read so it can not be a cursor, the cursor mode is ordered by created_at
+        use_cursor = request.query_params.get('pagination') == 'cursor'
+        paginator = self.cursor_pagination_class(CURSOR_ORDERING['-created_at']) if use_cursor else self.pagination_class()
         page = paginator.paginate_queryset(questions, request, view=self)
         if page is not None:
             question_data = self.serializer_list_question(page, many=True).data
             paginated_questions = paginator.get_paginated_response(question_data)
-            paginated_questions.data['total_pages'] = paginator.get_total_pages()
-
-            # Mask the username
-            for question in paginated_questions.data['results']:
-                author = User.objects.get(pk=question['author'])
-                question['author'] = mask_username(author.name)
-            
-            # Get the answer status
-            for question in paginated_questions.data['results']:
-                question['is_answered'] = True if Answer.objects.filter(question=question['id']).exists() else False
+            if not use_cursor:
+                paginated_questions.data['total_pages'] = paginator.get_total_pages()
 
             return Response({'questions': paginated_questions.data}, status=status.HTTP_200_OK)
         else:
@@ -185,22 +180,20 @@ class QuestionViewSets(viewsets.ViewSet):
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
 
-            # Update review image to S3
-            if 'image' in request.FILES:
-                image = request.FILES['image']
+            image = request.FILES.get('image')
+            if image:
                 if not is_valid_image_extension(image):
                     return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Delete the previous image
-                if original_question.image:
-                    existing_image_key = original_question.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-                    s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
+                # Keep showing the previous image until the new one is uploaded
+                question.image = original_question.image
 
-                # Upload the new image
-                s3_client.upload_fileobj(image, settings.AWS_STORAGE_BUCKET_NAME, f'qnas/questions/{question.id}/{image.name}')
-                question.image = f'{settings.AWS_S3_CUSTOM_DOMAIN}/qnas/questions/{question.id}/{image.name}'
-            
-            question.save()
+            with transaction.atomic():
+                question.save()
+
+                # Upload the new image to S3 after the response, the previous image is deleted once it is replaced
+                if image:
+                    enqueue_upload(Question, question.id, get_upload_key(f'qnas/questions/{question.id}/', image), image, replaced=original_question.image)
 
             return Response({'message': '질문이 성공적으로 수정되었습니다.'}, status=status.HTTP_200_OK)
         else:
@@ -219,18 +212,7 @@ class QuestionViewSets(viewsets.ViewSet):
 
         # Author check
         if request.user == question.author or request.user == User.objects.get(is_superuser=True):
-            # Delete answer image from S3 before deleting the question
-            if Answer.objects.filter(question=question).exists():
-                answer = Answer.objects.get(question=question)
-                if answer.image:
-                    existing_image_key = answer.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-                    s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
-
-            # Delete question image from S3
-            if question.image:
-                existing_image_key = question.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-                s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
-
+            # The images of the question and its answer are queued for deletion
             question.delete()
 
             target_content.questions -= 1
@@ -302,7 +284,6 @@ class AnswerViewSets(viewsets.ViewSet):
             answer.author = User.objects.get(is_superuser=True)
             answer.created_at = timezone.now()
             answer.question = question
-            answer.save()
 
             # Check the image is vaild
             def is_valid_image_extension(file):
@@ -310,20 +291,19 @@ class AnswerViewSets(viewsets.ViewSet):
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
 
-            # Upload review image to S3
-            if 'image' in request.FILES:
-                image = request.FILES['image']
-                if not is_valid_image_extension(image):
-                    return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            image = request.FILES.get('image')
+            if image and not is_valid_image_extension(image):
+                return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Upload the new image
-                s3_client.upload_fileobj(image, settings.AWS_STORAGE_BUCKET_NAME, f'qnas/answers/{question.id}/{answer.id}/{image.name}')
-                answer.image = f'{settings.AWS_S3_CUSTOM_DOMAIN}/qnas/answers/{question.id}/{answer.id}/{image.name}'
-            
-            answer.save()
+            with transaction.atomic():
+                answer.save()
 
-            question.answered_at = timezone.now()
-            question.save()
+                question.answered_at = timezone.now()
+                question.save()
+
+                # Upload the answer image to S3 after the response, the worker sets answer.image
+                if image:
+                    enqueue_upload(Answer, answer.id, get_upload_key(f'qnas/answers/{question.id}/{answer.id}/', image), image)
 
             return Response({'message': '답변이 성공적으로 등록되었습니다.'}, status=status.HTTP_201_CREATED)
         else:
@@ -356,22 +336,20 @@ class AnswerViewSets(viewsets.ViewSet):
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
 
-            # Update review image to S3
-            if 'image' in request.FILES:
-                image = request.FILES['image']
+            image = request.FILES.get('image')
+            if image:
                 if not is_valid_image_extension(image):
                     return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Delete the previous image
-                if original_answer.image:
-                    existing_image_key = original_answer.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-                    s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
+                # Keep showing the previous image until the new one is uploaded
+                answer.image = original_answer.image
 
-                # Upload the new image
-                s3_client.upload_fileobj(image, settings.AWS_STORAGE_BUCKET_NAME, f'qnas/answers/{answer.question.id}/{answer.id}/{image.name}')
-                answer.image = f'{settings.AWS_S3_CUSTOM_DOMAIN}/qnas/answers/{answer.question.id}/{answer.id}/{image.name}'
-            
-            answer.save()
+            with transaction.atomic():
+                answer.save()
+
+                # Upload the new image to S3 after the response, the previous image is deleted once it is replaced
+                if image:
+                    enqueue_upload(Answer, answer.id, get_upload_key(f'qnas/answers/{answer.question_id}/{answer.id}/', image), image, replaced=original_answer.image)
 
             return Response({'message': '답변이 성공적으로 수정되었습니다.'}, status=status.HTTP_200_OK)
         else:
@@ -396,11 +374,7 @@ class AnswerViewSets(viewsets.ViewSet):
         question.answered_at = None
         question.save()
 
-        # Delete review image to S3
-        if answer.image:
-            existing_image_key = answer.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-            s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
-
+        # The answer image is queued for deletion
         answer.delete()
 
         return Response({'message': '답변이 성공적으로 삭제되었습니다.'}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,28 +1,22 @@
 import os
-import boto3
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
-from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils.html import escape
 from django.utils import timezone
-from common.models import GlassClass, Product, Review, User
+from common.models import GlassClass, Product, Review, RatingSummary, User
 from common.forms import ReviewForm
-from common.serializers import ReviewSerializer
-from .common import mask_username
+from common.serializers import ReviewSerializer, ReviewListSerializer, RatingSummarySerializer
+from common.ratings import add_review_rating, change_review_rating, remove_review_rating, get_rating_summary
+from common.pagination import KeysetPagination
+from common.review_cache import get_page_key, get_cached_page, set_cached_page
+from common.uploads import enqueue_upload, get_upload_key
 
 
-# 리소스 누수를 방지하기 위한 전역적으로 boto3 클라이언트 생성
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-    region_name=settings.AWS_S3_REGION_NAME
-)
-
 # Pagination Config
 class PaginationConfig(PageNumberPagination):
     page_size = 5
@@ -35,10 +29,20 @@ class PaginationConfig(PageNumberPagination):
         page_size = int(self.page_size)
         return (self.page.paginator.count + page_size - 1) // page_size
 
+# Keyset orderings for ?pagination=cursor, each one has a matching index on Review
+CURSOR_ORDERING = {
+    '-created_at': ('-created_at', '-id'),
+    'rating': ('rating', 'id'),
+    '-rating': ('-rating', '-id'),
+}
+
 class ReviewViewSets(viewsets.ViewSet):
     queryset = Review.objects.all()
     serializer_review = ReviewSerializer
+    serializer_review_list = ReviewListSerializer
+    serializer_rating_summary = RatingSummarySerializer
     pagination = PaginationConfig
+    cursor_pagination = KeysetPagination
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def create_review(self, request, *args, **kwargs):
@@ -59,17 +63,9 @@ class ReviewViewSets(viewsets.ViewSet):
             if 'glass_class_id' in request.query_params:
                 glass_class = get_object_or_404(GlassClass, pk=request.query_params.get('glass_class_id'))
                 review.glass_class = glass_class
-                glass_class.reviews += 1
-                glass_class.total_rating += review.rating
-                glass_class.average_rating = round(glass_class.total_rating / glass_class.reviews, 1)
-                glass_class.save()
             elif 'product_id' in request.query_params:
                 product = get_object_or_404(Product, pk=request.query_params.get('product_id'))
                 review.product = product
-                product.reviews += 1
-                product.total_rating += review.rating
-                product.average_rating = round(product.total_rating / product.reviews, 1)
-                product.save()
 
             # Check the image is vaild
             def is_valid_image_extension(file):
@@ -77,18 +73,18 @@ class ReviewViewSets(viewsets.ViewSet):
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
             
-            # Upload review image to S3
-            if 'image' in request.FILES:
-                image = request.FILES['image']
-                if not is_valid_image_extension(image):
-                    return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            image = request.FILES.get('image')
+            if image and not is_valid_image_extension(image):
+                return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Upload the new image
-                s3_client.upload_fileobj(image, settings.AWS_STORAGE_BUCKET_NAME, f'reviews/{review.id}/{image.name}')
-                review.image = f'{settings.AWS_S3_CUSTOM_DOMAIN}/reviews/{review.id}/{image.name}'
+            # Save the review and update the rating of the class or product together
+            with transaction.atomic():
                 review.save()
+                add_review_rating(review)
 
-            review.save()
+                # Upload the review image to S3 after the response, the worker sets review.image
+                if image:
+                    enqueue_upload(Review, review.id, get_upload_key(f'reviews/{review.id}/', image), image)
 
             return Response({'message': '리뷰가 성공적으로 등록되었습니다.'}, status=status.HTTP_201_CREATED)
         else:
@@ -110,6 +106,18 @@ class ReviewViewSets(viewsets.ViewSet):
         if page_order not in valid_order:
             page_order = '-created_at'
 
+        # Serve the page from the cache, the cursor mode is not cached
+        use_cursor = request.query_params.get('pagination') == 'cursor'
+        target_field, target_id = ('glass_class', glass_class_id) if glass_class_id else ('product', product_id)
+        cache_key = None
+        if not use_cursor and target_id.isdigit():
+            page_number = request.query_params.get('page', 1)
+            page_size = request.query_params.get('page_size', self.pagination.page_size)
+            cache_key = get_page_key(target_field, int(target_id), page_order, page_number, page_size)
+            cached_page = get_cached_page(cache_key)
+            if cached_page is not None:
+                return Response(cached_page, status=status.HTTP_200_OK)
+
         if glass_class_id:
             glass_class = get_object_or_404(GlassClass, pk=glass_class_id)
             reviews = self.queryset.filter(glass_class=glass_class).order_by(page_order, '-created_at')
@@ -119,24 +127,48 @@ class ReviewViewSets(viewsets.ViewSet):
             reviews = self.queryset.filter(product=product).order_by(page_order, '-created_at')
             average_rating = product.average_rating
 
-        # Pagination
-        paginator = self.pagination()
+        # Load the authors in the same query, the serializer masks the username
+        reviews = reviews.select_related('author')
+
+        # Pagination, the cursor mode skips the count and the offset
+        paginator = self.cursor_pagination(CURSOR_ORDERING[page_order]) if use_cursor else self.pagination()
         page = paginator.paginate_queryset(reviews, request, view=self)
         if page is not None:
-            review_data = self.serializer_review(page, many=True).data
+            review_data = self.serializer_review_list(page, many=True).data
             pagenated_review = paginator.get_paginated_response(review_data)
-            pagenated_review.data['total_pages'] = paginator.get_total_pages()
+            if not use_cursor:
+                pagenated_review.data['total_pages'] = paginator.get_total_pages()
 
-            # Mask the username
-            for review in pagenated_review.data['results']:
-                author = User.objects.get(pk=review['author'])
-                review['author'] = mask_username(author.name)
-                review['author_id'] = author.email
+            response_data = {'reviews': pagenated_review.data, 'average_rating': average_rating}
+            if cache_key:
+                set_cached_page(cache_key, response_data)
 
-            return Response({'reviews': pagenated_review.data, 'average_rating': average_rating}, status=status.HTTP_200_OK)
+            return Response(response_data, status=status.HTTP_200_OK)
             
         return Response({'message': '리뷰가 존재하지 않습니다.'}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def read_rating_summary(self, request, *args, **kwargs):
+        # Read the star and sub rating summary of a class or product
+
+        glass_class_id = request.query_params.get('glass_class_id')
+        product_id = request.query_params.get('product_id')
+        if not glass_class_id and not product_id:
+            return Response({'error': 'glass_class_id 또는 product_id가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if glass_class_id:
+            target_field, model, target_id = 'glass_class', GlassClass, glass_class_id
+        else:
+            target_field, model, target_id = 'product', Product, product_id
+
+        # The summary is kept up to date by the review actions, no need to scan the reviews
+        summary = get_rating_summary(target_field, target_id)
+        if summary is None:
+            target = get_object_or_404(model, pk=target_id)
+            summary = RatingSummary(**{target_field: target})
+
+        return Response(self.serializer_rating_summary(summary).data, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def update_review(self, request, *args, **kwargs):
         # Update a review
@@ -155,16 +187,6 @@ class ReviewViewSets(viewsets.ViewSet):
         if form.is_valid():
             original_review = self.queryset.get(pk=review_id)
 
-            glass_class = original_review.glass_class
-            product = original_review.product
-
-            if glass_class:
-                glass_class.total_rating -= original_review.rating
-                glass_class.save()
-            elif product:
-                product.total_rating -= original_review.rating
-                product.save()
-
             review = form.save(commit=False)
             
             # Check the image is vaild
@@ -173,33 +195,24 @@ class ReviewViewSets(viewsets.ViewSet):
                 ext = os.path.splitext(file.name)[1][1:].lower()
                 return ext in vaild_extensions
 
-            # Update review image to S3
-            if 'image' in request.FILES:
-                image_file = request.FILES['image']
+            image_file = request.FILES.get('image')
+            if image_file:
                 if not is_valid_image_extension(image_file):
                     return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Delete the previous image
-                if original_review.image:
-                    existing_image_key = original_review.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-                    s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
-
-                # Upload the new image
-                s3_client.upload_fileobj(image_file, settings.AWS_STORAGE_BUCKET_NAME, f'reviews/{review.id}/{image_file.name}')
-                review.image = f'{settings.AWS_S3_CUSTOM_DOMAIN}/reviews/{review.id}/{image_file.name}'
+                # Keep showing the previous image until the new one is uploaded
+                review.image = original_review.image
             
             review.modified_at = timezone.now()
-            review.save()
-
-            # Update glass_class or product rating
-            if glass_class:
-                glass_class.total_rating += review.rating
-                glass_class.average_rating = round(glass_class.total_rating / glass_class.reviews, 1)
-                glass_class.save()
-            elif product:
-                product.total_rating += review.rating
-                product.average_rating = round(product.total_rating / product.reviews, 1)
-                product.save()
+
+            # Save the review and update the rating of the class or product together
+            with transaction.atomic():
+                review.save()
+                change_review_rating(review, original_review)
+
+                # Upload the new image to S3 after the response, the previous image is deleted once it is replaced
+                if image_file:
+                    enqueue_upload(Review, review.id, get_upload_key(f'reviews/{review.id}/', image_file), image_file, replaced=original_review.image)
             
             return Response({'message': '리뷰가 성공적으로 수정되었습니다.'}, status=status.HTTP_200_OK)
         else:
@@ -219,26 +232,9 @@ class ReviewViewSets(viewsets.ViewSet):
         if request.user != review.author and request.user != User.objects.get(is_superuser=True):
             return Response({'error': '이 글의 작성자가 아닙니다.'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Delete review image from S3
-        if review.image:
-            existing_image_key = review.image.split(f'{settings.AWS_S3_CUSTOM_DOMAIN}/')[1]
-            s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=existing_image_key)
-
-        # Update glass_class or product rating
-        glass_class = review.glass_class
-        product = review.product
-
-        if glass_class:
-            glass_class.reviews -= 1
-            glass_class.total_rating -= review.rating
-            glass_class.average_rating = round(glass_class.total_rating / glass_class.reviews, 1) if glass_class.reviews != 0 else 0
-            glass_class.save()
-        elif product:
-            product.reviews -= 1
-            product.total_rating -= review.rating
-            product.average_rating = round(product.total_rating / product.reviews, 1) if product.reviews != 0 else 0
-            product.save()
-        
-        review.delete()
+        # Delete the review and update the rating of the class or product together, its image is queued for deletion
+        with transaction.atomic():
+            remove_review_rating(review)
+            review.delete()
 
         return Response({'message': '리뷰가 성공적으로 삭제되었습니다.'}, status=status.HTTP_200_OK)
\ No newline at end of file
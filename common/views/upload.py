@@ -0,0 +1,112 @@
+import os
+import uuid
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from common.models import DetailInfo, Review, Question, Answer
+from common.storage import get_storage
+from common.uploads import UPLOAD_MAX_SIZE, UPLOAD_URL_EXPIRES, enqueue_confirmed
+
+# Rows the client can upload an image to, with their image fields
+UPLOAD_TARGETS = {
+    'review': (Review, ['image']),
+    'question': (Question, ['image']),
+    'answer': (Answer, ['image']),
+    'detail_info': (DetailInfo, ['product_image', 'notice_image', 'event_image']),
+}
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+class UploadViewSets(viewsets.ViewSet):
+    # Direct uploads to S3 with a presigned POST, the image bytes do not go through the server
+
+    def get_target(self, request):
+        # Returns (model, row, field) or an error response
+        target = UPLOAD_TARGETS.get(request.data.get('target'))
+        if target is None:
+            return None, Response({'error': 'target은 review, question, answer, detail_info 중 하나여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        model, fields = target
+
+        field = request.data.get('field') or fields[0]
+        if field not in fields:
+            return None, Response({'error': f'field는 {", ".join(fields)} 중 하나여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        target_id = request.data.get('id')
+        if not str(target_id or '').isdigit():
+            return None, Response({'error': 'id가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        row = get_object_or_404(model, pk=target_id)
+
+        # Reviews and questions by their author, answers and detail info by the admin
+        if model in (Review, Question):
+            allowed = request.user == row.author
+        else:
+            allowed = request.user.is_superuser
+        if not allowed:
+            return None, Response({'error': '권한이 없습니다.'}, status=status.HTTP_401_UNAUTHORIZED)
+        return (model, row, field), None
+
+    def get_key_prefix(self, model, row, field):
+        if model is Review:
+            return f'reviews/{row.id}/'
+        if model is Question:
+            return f'qnas/questions/{row.id}/'
+        if model is Answer:
+            return f'qnas/answers/{row.question_id}/{row.id}/'
+        return f'detail/{row.id}/{field[:-len("_image")]}/'
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def create_upload_url(self, request, *args, **kwargs):
+        # Issue a presigned POST for one image of the row
+
+        target, error = self.get_target(request)
+        if error:
+            return error
+        model, row, field = target
+
+        ext = os.path.splitext(request.data.get('file_name', ''))[1][1:].lower()
+        if ext not in CONTENT_TYPES:
+            return Response({'error': 'image는 jpg, jpeg, png 형식이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # A random name so the upload cannot overwrite another image
+        key = f'{self.get_key_prefix(model, row, field)}{uuid.uuid4().hex}.{ext}'
+        upload = get_storage().presign(key, CONTENT_TYPES[ext], UPLOAD_MAX_SIZE, UPLOAD_URL_EXPIRES)
+        return Response({'key': key, 'url': upload['url'], 'fields': upload['fields'], 'max_size': UPLOAD_MAX_SIZE, 'expires_in': UPLOAD_URL_EXPIRES}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def confirm_upload(self, request, *args, **kwargs):
+        # Attach an uploaded key to the row after checking the object exists
+
+        target, error = self.get_target(request)
+        if error:
+            return error
+        model, row, field = target
+
+        # Only the keys issued for this row and field
+        key = request.data.get('key', '')
+        prefix = self.get_key_prefix(model, row, field)
+        name = key[len(prefix):]
+        if not key.startswith(prefix) or '/' in name or os.path.splitext(name)[1][1:].lower() not in CONTENT_TYPES:
+            return Response({'error': '유효하지 않은 key입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        storage = get_storage()
+        size = storage.head(key)
+        if size is None:
+            return Response({'error': '업로드된 파일이 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if size > UPLOAD_MAX_SIZE:
+            storage.delete(key)
+            return Response({'error': '파일 크기가 너무 큽니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        url = storage.get_url(key)
+        with transaction.atomic():
+            row = model.objects.select_for_update().get(pk=row.pk)
+            replaced = getattr(row, field)
+            if replaced != url:
+                setattr(row, field, url)
+                row.save(update_fields=[field])
+
+                # Create the variants and delete the previous image after the response
+                enqueue_confirmed(model, row.pk, field, key, replaced=replaced)
+
+        return Response({'message': '이미지가 성공적으로 등록되었습니다.', field: url}, status=status.HTTP_200_OK)
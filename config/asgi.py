@@ -12,18 +12,20 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-from django.urls import path
+from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 django_asgi_app = get_asgi_application()
+
+# Import after the apps are loaded
+from glass_class.routing import websocket_urlpatterns as glass_class_websocket_urlpatterns
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    #"websocket": {
-    #    "application": AuthMiddlewareStack(
-    #        URLRouter([
-    #            path("ws/", django_asgi_app),
-    #        ])
-    #    )
-    #},
+    "websocket": AllowedHostsOriginValidator(
+        AuthMiddlewareStack(
+            URLRouter(glass_class_websocket_urlpatterns)
+        )
+    ),
 }) 
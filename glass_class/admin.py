@@ -1,6 +1,11 @@
 from django.contrib import admin
-from .models import GlassClass, Reservation
+from .models import GlassClass, Reservation, ReservationSlot, ClassTimeSlot, ClassClosure, WaitlistEntry, ReservationArchive
 
 
 admin.site.register(GlassClass)
-admin.site.register(Reservation)
\ No newline at end of file
+admin.site.register(Reservation)
+admin.site.register(ReservationSlot)
+admin.site.register(ClassTimeSlot)
+admin.site.register(ClassClosure)
+admin.site.register(WaitlistEntry)
+admin.site.register(ReservationArchive)
\ No newline at end of file
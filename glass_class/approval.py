@@ -0,0 +1,78 @@
+'''
+Reservation approval
+
+관리자가 여러 예약을 한 번에 승인(approved) 또는 거절(rejected)한다.
+예약 id를 STATUS_UPDATE_CHUNK_SIZE개씩 나눠 청크마다 UPDATE ... WHERE id IN 한 번으로 상태를 바꾸고,
+거절된 예약의 좌석은 슬롯별로 모아서 돌려준다. 커밋 후 상태가 바뀐 예약을 사용자별로 묶어
+reservation_status_changed 시그널을 사용자당 한 번만 보낸다.
+'''
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.utils import timezone
+from glass_class.models import Reservation
+from glass_class.slots import release_seats
+from glass_class.availability import invalidate_availability
+from glass_class.waitlist import promote_waitlist
+from glass_class.signals import reservation_status_changed
+
+STATUS_UPDATE_CHUNK_SIZE = 500
+
+# Target status: statuses a reservation can be moved from
+STATUS_TRANSITIONS = {
+    'approved': ['pending'],
+    'rejected': ['pending', 'approved'],
+}
+
+def _update_chunk(reservation_ids, new_status, now):
+    # Change the status of one chunk of reservations with a single UPDATE
+    reservations = list(Reservation.objects.select_for_update().filter(
+        id__in=reservation_ids,
+        status__in=STATUS_TRANSITIONS[new_status]
+    ).values_list('id', 'user', 'glass_class', 'reservation_date', 'reservation_time', 'seats', 'status'))
+    if not reservations:
+        return []
+
+    Reservation.objects.filter(id__in=[reservation[0] for reservation in reservations]).update(status=new_status, modified_at=now)
+
+    # Rejected reservations give their seats back, once per slot
+    if new_status not in Reservation.ACTIVE_STATUSES:
+        released = Counter()
+        for _, _, class_id, reservation_date, reservation_time, seats, old_status in reservations:
+            if old_status in Reservation.ACTIVE_STATUSES:
+                released[(class_id, reservation_date, reservation_time)] += seats
+        for (class_id, reservation_date, reservation_time), seats in released.items():
+            release_seats(class_id, reservation_date, reservation_time, seats)
+            promote_waitlist(class_id, reservation_date, reservation_time)
+
+    return reservations
+
+def change_reservations_status(reservation_ids, new_status, chunk_size=STATUS_UPDATE_CHUNK_SIZE):
+    # Move the reservations to the new status, returns the ids that were changed
+    if new_status not in STATUS_TRANSITIONS:
+        raise ValueError(f'Unknown reservation status: {new_status}')
+
+    reservation_ids = list(dict.fromkeys(reservation_ids))
+    now = timezone.now()
+
+    changed = []
+    with transaction.atomic():
+        for index in range(0, len(reservation_ids), chunk_size):
+            changed += _update_chunk(reservation_ids[index:index + chunk_size], new_status, now)
+
+        changed_by_user = defaultdict(list)
+        for reservation_id, user_id, *_ in changed:
+            changed_by_user[user_id].append(reservation_id)
+
+        class_ids = {reservation[2] for reservation in changed}
+        transaction.on_commit(lambda: _notify(changed_by_user, class_ids, new_status), robust=True)
+
+    return [reservation[0] for reservation in changed]
+
+def _notify(changed_by_user, class_ids, new_status):
+    if new_status not in Reservation.ACTIVE_STATUSES:
+        for class_id in class_ids:
+            invalidate_availability(class_id)
+
+    # One event per user for the whole batch
+    for user_id, reservation_ids in changed_by_user.items():
+        reservation_status_changed.send(sender=Reservation, user_id=user_id, status=new_status, reservation_ids=reservation_ids)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ClassConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'glass_class'
+
+    def ready(self):
+        from glass_class import signals
+        from glass_class.expiry import start_sweeper
+        start_sweeper()
@@ -0,0 +1,79 @@
+'''
+Reservation archive
+
+예약 기간(DateConfig)이 지난 예약은 달력 조회에 쓰이지 않으므로 ReservationArchive로 옮겨
+Reservation 테이블을 예약 가능 기간 근처의 행만 남도록 작게 유지한다.
+batch_size개씩 복사 후 삭제를 한 트랜잭션으로 처리하며, id를 그대로 유지하기 때문에
+중간에 실패해도 다시 실행하면 이어서 옮긴다. 지난 날짜의 슬롯과 대기 신청도 함께 정리한다.
+사용자의 전체 예약 내역은 get_reservation_history가 두 테이블을 UNION으로 합쳐 읽는다.
+'''
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, F, Value
+from django.utils import timezone
+from glass_class.models import Reservation, ReservationArchive, ReservationSlot, WaitlistEntry
+
+# Days kept in the hot table after the reservation date
+RESERVATION_ARCHIVE_AFTER_DAYS = getattr(settings, 'RESERVATION_ARCHIVE_AFTER_DAYS', 0)
+ARCHIVE_BATCH_SIZE = 1000
+
+HISTORY_FIELDS = ['id', 'glass_class', 'reservation_date', 'reservation_time', 'seats', 'status', 'created_at']
+
+def get_archive_cutoff(days=None):
+    # Start of the reservation window, same clock as DateConfig
+    days = RESERVATION_ARCHIVE_AFTER_DAYS if days is None else days
+    return (datetime.now() + timedelta(hours=9)).date() - timedelta(days=days)
+
+def _archive_batch(cutoff, batch_size, now):
+    reservations = list(Reservation.objects.select_for_update().filter(
+        reservation_date__lt=cutoff
+    ).order_by('reservation_date', 'id').values(
+        'id', 'user', 'glass_class', 'reservation_date', 'reservation_time', 'seats', 'created_at', 'modified_at', 'status'
+    )[:batch_size])
+    if not reservations:
+        return 0
+
+    # ignore_conflicts keeps the move idempotent when a previous run copied the rows but failed to delete them
+    ReservationArchive.objects.bulk_create([
+        ReservationArchive(
+            id=reservation['id'],
+            user_id=reservation['user'],
+            glass_class_id=reservation['glass_class'],
+            reservation_date=reservation['reservation_date'],
+            reservation_time=reservation['reservation_time'],
+            seats=reservation['seats'],
+            created_at=reservation['created_at'],
+            modified_at=reservation['modified_at'],
+            status=reservation['status'],
+            archived_at=now
+        )
+        for reservation in reservations
+    ], ignore_conflicts=True)
+    Reservation.objects.filter(id__in=[reservation['id'] for reservation in reservations]).delete()
+    return len(reservations)
+
+def archive_reservations(cutoff=None, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None):
+    # Move the reservations dated before the cutoff to the archive, returns the number of moved reservations
+    cutoff = get_archive_cutoff() if cutoff is None else cutoff
+    now = timezone.now()
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            count = _archive_batch(cutoff, batch_size, now)
+        archived += count
+        batches += 1
+        if count < batch_size:
+            # Slots and waitlists of past dates are never read again
+            ReservationSlot.objects.filter(reservation_date__lt=cutoff).delete()
+            WaitlistEntry.objects.filter(reservation_date__lt=cutoff).delete()
+            break
+    return archived
+
+def get_reservation_history(user):
+    # Reservations of the user from both tables, newest first
+    hot = Reservation.objects.filter(user=user).values(*HISTORY_FIELDS, glass_class_title=F('glass_class__title'), archived=Value(False, output_field=BooleanField()))
+    cold = ReservationArchive.objects.filter(user=user).values(*HISTORY_FIELDS, glass_class_title=F('glass_class__title'), archived=Value(True, output_field=BooleanField()))
+    return hot.union(cold, all=True).order_by('-reservation_date', '-reservation_time', '-id')
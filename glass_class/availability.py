@@ -0,0 +1,76 @@
+'''
+Reservation calendar availability
+
+달력에 필요한 예약 가능 정보를 한 번에 내려주기 위해 DateConfig 기간 전체를
+날짜별 비트맵(시간대 i가 예약 가능하면 i번째 비트가 1)으로 만들어 클래스별로 캐시한다.
+예약이 생성, 변경, 취소되면 해당 클래스의 캐시 버전을 올려 무효화한다.
+기본 캐시(LocMemCache)는 프로세스마다 따로 있어서 버전 변경은 예약을 처리한 프로세스에만 적용되므로,
+다른 worker는 AVAILABILITY_CACHE_TIMEOUT 동안 이전 정보를 보여줄 수 있다. 여러 worker로 운영하면서
+즉시 반영이 필요하면 CACHES['default']를 공유 캐시(Redis, Memcached 등)로 설정한다.
+'''
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from common.cache_versions import get_cache_version, bump_cache_version
+from glass_class.slots import get_booked_slots
+from glass_class.schedule import get_schedule_version
+
+# Short by default, it bounds how stale the other processes can be with a per-process cache
+AVAILABILITY_CACHE_TIMEOUT = getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 60)
+
+def _version_key(class_id):
+    return f'glass_class:availability:version:{class_id}'
+
+def invalidate_availability(class_id):
+    # Drop the cached availability of a class by moving to a new version
+    bump_cache_version(_version_key(class_id))
+
+def build_availability(glass_class, date_config):
+    # Build the availability bitmap of every day in the reservation window with one query
+    start_date = date_config.get_start_date().date()
+    end_date = date_config.get_end_date().date()
+    times = date_config.vaild_times
+
+    booked_slots = {}
+    for reservation_date, reservation_time, booked in get_booked_slots(glass_class, start_date, end_date):
+        booked_slots[(reservation_date, reservation_time.strftime('%H:%M:%S'))] = booked
+
+    bitmap = []
+    current_date = start_date
+    while current_date <= end_date:
+        day = 0
+        for index, time in enumerate(times):
+            if not date_config.is_available_time(current_date, time):
+                continue
+            if booked_slots.get((current_date, time), 0) < date_config.get_capacity(current_date, time):
+                day |= 1 << index
+        bitmap.append(day)
+        current_date += timedelta(days=1)
+
+    return {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'times': times,
+        'bitmap': bitmap,
+    }
+
+def get_availability(glass_class, date_config):
+    # Get the cached availability of a class, building it on a cache miss
+    start_date = date_config.get_start_date().date()
+    key = f'glass_class:availability:{glass_class.id}:{get_cache_version(_version_key(glass_class.id))}:{get_schedule_version()}:{start_date}'
+
+    availability = cache.get(key)
+    if availability is None:
+        availability = build_availability(glass_class, date_config)
+        cache.set(key, availability, timeout=AVAILABILITY_CACHE_TIMEOUT)
+
+    # The times that already passed today change every minute, so they are masked after the cache
+    availability = dict(availability, bitmap=list(availability['bitmap']))
+    if availability['bitmap']:
+        now = date_config.get_start_date()
+        threshold_time = now + timedelta(hours=1, minutes=30)
+        for index, time in enumerate(availability['times']):
+            if threshold_time > datetime.combine(now.date(), datetime.strptime(time, '%H:%M:%S').time()):
+                availability['bitmap'][0] &= ~(1 << index)
+
+    return availability
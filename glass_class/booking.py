@@ -0,0 +1,218 @@
+'''
+Reservation booking engine
+
+예약 가능 여부 확인과 예약 생성을 하나의 트랜잭션에서 처리한다.
+슬롯 행을 잠그고(select_for_update) 정원이 남아 있을 때만 booked를 증가시키는
+조건부 UPDATE를 사용하기 때문에 같은 슬롯에 동시에 요청이 들어와도 정원을 넘지 않는다.
+DB 잠금 충돌이나 슬롯 생성 경합이 발생하면 잠시 후 다시 시도한다.
+'''
+import random
+import time
+from django.db import transaction, IntegrityError, OperationalError
+from django.db.models import Sum
+from django.utils import timezone
+from glass_class.models import Reservation, ReservationSlot, WaitlistEntry
+from glass_class.slots import get_slot, take_seats, release_seats
+from glass_class.availability import invalidate_availability
+from glass_class.waitlist import promote_waitlist
+from glass_class.live import publish_slot_on_commit
+
+BOOKING_RETRIES = 10
+BOOKING_RETRY_DELAY = 0.01
+
+class BookingError(Exception):
+    # Booking failed, the message is returned to the client
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+class SlotUnavailable(BookingError):
+    pass
+
+class DuplicateReservation(BookingError):
+    pass
+
+class BookingConflict(BookingError):
+    pass
+
+class InactiveReservation(BookingError):
+    pass
+
+def run_with_retry(func, *args, **kwargs):
+    # Run func in a transaction, retrying on lock conflicts
+    for attempt in range(BOOKING_RETRIES):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except (IntegrityError, OperationalError):
+            if attempt == BOOKING_RETRIES - 1:
+                break
+            # Exponential backoff with jitter so the retries do not collide again
+            time.sleep(BOOKING_RETRY_DELAY * (2 ** min(attempt, 5)) * random.random())
+    raise BookingConflict('This time is being booked by another user, please try again')
+
+def lock_slot(glass_class, reservation_date, reservation_time, capacity=None):
+    # Get the slot row locked for the rest of the transaction
+    slot = get_slot(glass_class, reservation_date, reservation_time, capacity)
+    return ReservationSlot.objects.select_for_update().get(pk=slot.pk)
+
+def _book(user, glass_class, reservation_date, reservation_time, capacity, seats):
+    # Check if the user has already made a reservation, expired or rejected ones do not count
+    if Reservation.objects.filter(glass_class=glass_class, user=user, reservation_date=reservation_date, status__in=Reservation.ACTIVE_STATUSES).exists():
+        raise DuplicateReservation('You have already made a reservation for this class')
+
+    slot = lock_slot(glass_class, reservation_date, reservation_time, capacity)
+    if not take_seats(slot, seats):
+        raise SlotUnavailable('This time is not available for reservation')
+
+    transaction.on_commit(lambda: invalidate_availability(glass_class.id), robust=True)
+    return Reservation.objects.create(user=user, glass_class=glass_class, reservation_date=reservation_date, reservation_time=reservation_time, seats=seats, created_at=timezone.now())
+
+def _book_many(user, items):
+    # items: dicts of glass_class, reservation_date, reservation_time, seats and capacity
+    slot_keys = {}
+    for item in items:
+        key = (item['glass_class'].id, item['reservation_date'], item['reservation_time'])
+        if key not in slot_keys:
+            slot_keys[key] = {'seats': 0, 'capacity': item['capacity']}
+        slot_keys[key]['seats'] += item['seats']
+
+    # One reservation per class and date for a user
+    class_ids = {item['glass_class'].id for item in items}
+    dates = {item['reservation_date'] for item in items}
+    booked_dates = set(Reservation.objects.filter(
+        user=user,
+        glass_class__in=class_ids,
+        reservation_date__in=dates,
+        status__in=Reservation.ACTIVE_STATUSES
+    ).values_list('glass_class', 'reservation_date'))
+    requested_dates = set()
+    for index, item in enumerate(items):
+        class_date = (item['glass_class'].id, item['reservation_date'])
+        if class_date in booked_dates or class_date in requested_dates:
+            raise DuplicateReservation(f'reservations[{index}]: You have already made a reservation for this class')
+        requested_dates.add(class_date)
+
+    # Lock every slot of the batch with one query
+    slots = {
+        (slot.glass_class_id, slot.reservation_date, slot.reservation_time): slot
+        for slot in ReservationSlot.objects.select_for_update().filter(
+            glass_class__in=class_ids,
+            reservation_date__in=dates,
+            reservation_time__in={key[2] for key in slot_keys}
+        )
+    }
+
+    # Build the missing slots from the existing reservations
+    missing_keys = [key for key in slot_keys if key not in slots]
+    if missing_keys:
+        booked = {
+            (row['glass_class'], row['reservation_date'], row['reservation_time']): row['booked']
+            for row in Reservation.objects.filter(
+                glass_class__in={key[0] for key in missing_keys},
+                reservation_date__in={key[1] for key in missing_keys},
+                reservation_time__in={key[2] for key in missing_keys},
+                status__in=Reservation.ACTIVE_STATUSES
+            ).values('glass_class', 'reservation_date', 'reservation_time').annotate(booked=Sum('seats')).order_by()
+        }
+        # A slot created by a concurrent booking raises IntegrityError and the batch is retried
+        created = ReservationSlot.objects.bulk_create([
+            ReservationSlot(glass_class_id=key[0], reservation_date=key[1], reservation_time=key[2], capacity=slot_keys[key]['capacity'], booked=booked.get(key, 0))
+            for key in missing_keys
+        ])
+        for key, slot in zip(missing_keys, created):
+            slots[key] = slot
+
+    # All or nothing
+    changed_slots = []
+    for key, requested in slot_keys.items():
+        slot = slots[key]
+        slot.capacity = requested['capacity']
+        if slot.booked + requested['seats'] > slot.capacity:
+            raise SlotUnavailable(f'{key[1]} {key[2]} is not available for reservation')
+        slot.booked += requested['seats']
+        changed_slots.append(slot)
+    ReservationSlot.objects.bulk_update(changed_slots, ['booked', 'capacity'])
+    for slot in changed_slots:
+        publish_slot_on_commit(slot.glass_class_id, slot.reservation_date, slot.reservation_time)
+
+    now = timezone.now()
+    reservations = Reservation.objects.bulk_create([
+        Reservation(user=user, glass_class=item['glass_class'], reservation_date=item['reservation_date'], reservation_time=item['reservation_time'], seats=item['seats'], created_at=now)
+        for item in items
+    ])
+
+    for class_id in class_ids:
+        transaction.on_commit(lambda class_id=class_id: invalidate_availability(class_id), robust=True)
+    return reservations
+
+def _move(reservation_id, reservation_date, reservation_time, capacity):
+    reservation = Reservation.objects.select_for_update().get(pk=reservation_id)
+    # A rejected or expired reservation holds no seat, moving it would release the seat of another booking
+    if reservation.status not in Reservation.ACTIVE_STATUSES:
+        raise InactiveReservation('This reservation can no longer be changed')
+    # Same rule as _book, one reservation per class and date for a user
+    if Reservation.objects.filter(glass_class=reservation.glass_class_id, user=reservation.user_id, reservation_date=reservation_date, status__in=Reservation.ACTIVE_STATUSES).exclude(pk=reservation.pk).exists():
+        raise DuplicateReservation('You have already made a reservation for this class')
+
+    slot = lock_slot(reservation.glass_class, reservation_date, reservation_time, capacity)
+    if not take_seats(slot, reservation.seats):
+        raise SlotUnavailable('This time is not available for reservation')
+
+    release_seats(reservation.glass_class, reservation.reservation_date, reservation.reservation_time, reservation.seats)
+    promote_waitlist(reservation.glass_class_id, reservation.reservation_date, reservation.reservation_time)
+    transaction.on_commit(lambda: invalidate_availability(reservation.glass_class_id), robust=True)
+
+    reservation.reservation_date = reservation_date
+    reservation.reservation_time = reservation_time
+    reservation.modified_at = timezone.now()
+    reservation.save(update_fields=['reservation_date', 'reservation_time', 'modified_at'])
+    return reservation
+
+def _cancel(reservation_id):
+    reservation = Reservation.objects.select_for_update().filter(pk=reservation_id).first()
+    if reservation is None:
+        return
+    transaction.on_commit(lambda: invalidate_availability(reservation.glass_class_id), robust=True)
+    reservation.delete()
+    if reservation.status in Reservation.ACTIVE_STATUSES:
+        release_seats(reservation.glass_class, reservation.reservation_date, reservation.reservation_time, reservation.seats)
+        # Hand the freed seats to the waitlist in the same transaction
+        promote_waitlist(reservation.glass_class_id, reservation.reservation_date, reservation.reservation_time)
+
+def _join_waitlist(user, glass_class, reservation_date, reservation_time, capacity, seats):
+    if Reservation.objects.filter(glass_class=glass_class, user=user, reservation_date=reservation_date, status__in=Reservation.ACTIVE_STATUSES).exists():
+        raise DuplicateReservation('You have already made a reservation for this class')
+    if WaitlistEntry.objects.filter(glass_class=glass_class, user=user, reservation_date=reservation_date, reservation_time=reservation_time).exists():
+        raise DuplicateReservation('You are already on the waitlist for this time')
+
+    slot = lock_slot(glass_class, reservation_date, reservation_time, capacity)
+    if slot.booked + seats <= slot.capacity:
+        raise SlotUnavailable('This time is still available, please book it directly')
+    if seats > slot.capacity:
+        raise SlotUnavailable('This time does not have enough seats')
+
+    # Next position of the queue, the slot row is locked so positions never collide
+    slot.waitlist_tail += 1
+    slot.save(update_fields=['waitlist_tail'])
+    return WaitlistEntry.objects.create(user=user, glass_class=glass_class, reservation_date=reservation_date, reservation_time=reservation_time, seats=seats, position=slot.waitlist_tail, created_at=timezone.now())
+
+def book_reservation(user, glass_class, reservation_date, reservation_time, capacity=None, seats=1):
+    # Book seats and create the reservation atomically
+    return run_with_retry(_book, user, glass_class, reservation_date, reservation_time, capacity, seats)
+
+def book_reservations(user, items):
+    # Book several slots at once, either every reservation is created or none
+    return run_with_retry(_book_many, user, items)
+
+def move_reservation(reservation, reservation_date, reservation_time, capacity=None):
+    # Move a reservation to another slot atomically
+    return run_with_retry(_move, reservation.pk, reservation_date, reservation_time, capacity)
+
+def cancel_reservation(reservation):
+    # Cancel a reservation and free its seat atomically
+    return run_with_retry(_cancel, reservation.pk)
+
+def join_waitlist(user, glass_class, reservation_date, reservation_time, capacity=None, seats=1):
+    # Wait for seats of a fully booked slot
+    return run_with_retry(_join_waitlist, user, glass_class, reservation_date, reservation_time, capacity, seats)
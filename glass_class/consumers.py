@@ -0,0 +1,42 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from glass_class.models import GlassClass
+from glass_class.availability import get_availability
+from glass_class.live import availability_group
+from glass_class.views.class_reservation import DateConfig
+
+class AvailabilityConsumer(AsyncJsonWebsocketConsumer):
+    # Push the availability of a class to the client
+    # 연결 시 달력 전체(get_monthly_availability와 같은 형식)를 한 번 보내고 이후에는 바뀐 슬롯만 보낸다.
+
+    async def connect(self):
+        self.class_id = self.scope['url_route']['kwargs']['class_id']
+        availability = await self.get_availability(self.class_id)
+        if availability is None:
+            await self.close(code=4404)
+            return
+
+        self.group_name = availability_group(self.class_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json({'type': 'availability', 'availability': availability})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Clients only listen, a refresh request sends the whole calendar again
+        if content.get('type') == 'refresh':
+            availability = await self.get_availability(self.class_id)
+            await self.send_json({'type': 'availability', 'availability': availability})
+
+    async def slot_changed(self, event):
+        await self.send_json({'type': 'slot', 'slot': event['slot']})
+
+    @database_sync_to_async
+    def get_availability(self, class_id):
+        glass_class = GlassClass.objects.filter(pk=class_id).first()
+        if glass_class is None:
+            return None
+        return get_availability(glass_class, DateConfig(glass_class.id))
@@ -0,0 +1,102 @@
+'''
+Pending reservation expiry
+
+결제나 승인 없이 오래 방치된 pending 예약은 슬롯 정원을 계속 차지하므로
+일정 시간(PENDING_RESERVATION_TTL)이 지나면 expired 상태로 바꾸고 좌석을 돌려준다.
+(status, created_at) 인덱스로 대상만 읽고, 한 번 실행할 때 처리하는 양은
+batch_size * max_batches로 제한한다. management command(expire_reservations)로 실행하거나
+RESERVATION_EXPIRY_INTERVAL을 설정해 프로세스 안의 주기 작업으로 실행한다.
+'''
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from glass_class.models import Reservation
+from glass_class.slots import release_seats
+from glass_class.availability import invalidate_availability
+from glass_class.waitlist import promote_waitlist
+
+logger = logging.getLogger(__name__)
+
+PENDING_RESERVATION_TTL = getattr(settings, 'PENDING_RESERVATION_TTL', 60 * 60 * 24)
+RESERVATION_EXPIRY_INTERVAL = getattr(settings, 'RESERVATION_EXPIRY_INTERVAL', None)
+EXPIRY_BATCH_SIZE = 500
+EXPIRY_MAX_BATCHES = 20
+
+def _expire_batch(cutoff, now, batch_size):
+    # Expire the oldest pending reservations created before the cutoff
+    reservations = list(Reservation.objects.select_for_update().filter(
+        status='pending',
+        created_at__lt=cutoff
+    ).order_by('created_at').values_list('id', 'glass_class', 'reservation_date', 'reservation_time', 'seats')[:batch_size])
+    if not reservations:
+        return 0
+
+    Reservation.objects.filter(id__in=[reservation[0] for reservation in reservations]).update(status='expired', modified_at=now)
+
+    # Give the seats back once per slot
+    released = Counter()
+    for _, class_id, reservation_date, reservation_time, seats in reservations:
+        released[(class_id, reservation_date, reservation_time)] += seats
+    for (class_id, reservation_date, reservation_time), seats in released.items():
+        release_seats(class_id, reservation_date, reservation_time, seats)
+        promote_waitlist(class_id, reservation_date, reservation_time)
+
+    for class_id in {reservation[1] for reservation in reservations}:
+        transaction.on_commit(lambda class_id=class_id: invalidate_availability(class_id), robust=True)
+    return len(reservations)
+
+def expire_pending_reservations(ttl=None, batch_size=EXPIRY_BATCH_SIZE, max_batches=EXPIRY_MAX_BATCHES):
+    # Expire stale pending reservations, at most batch_size * max_batches per run
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=PENDING_RESERVATION_TTL if ttl is None else ttl)
+
+    expired = 0
+    for _ in range(max_batches):
+        # One short transaction per batch so the slots are not locked for the whole run
+        with transaction.atomic():
+            count = _expire_batch(cutoff, now, batch_size)
+        expired += count
+        if count < batch_size:
+            break
+    return expired
+
+class ExpirySweeper(threading.Thread):
+    # Periodic expiry task running inside the server process
+    def __init__(self, interval):
+        super().__init__(name='reservation-expiry-sweeper', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                expired = expire_pending_reservations()
+                if expired:
+                    logger.info('%d pending reservations expired', expired)
+            except Exception:
+                logger.exception('Reservation expiry failed')
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+def start_sweeper(interval=None):
+    # Start the periodic expiry once per process, disabled unless an interval is set
+    global _sweeper
+    interval = RESERVATION_EXPIRY_INTERVAL if interval is None else interval
+    if not interval:
+        return None
+
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = ExpirySweeper(interval)
+            _sweeper.start()
+    return _sweeper
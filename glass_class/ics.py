@@ -0,0 +1,91 @@
+'''
+Reservation iCalendar feed
+
+예약 목록을 iCalendar(RFC 5545) 형식으로 내보낸다. 모든 예약을 메모리에 올리지 않도록
+.iterator()로 읽은 행을 하나씩 VEVENT로 바꿔 StreamingHttpResponse로 흘려보낸다.
+ETag는 예약 수, 마지막 id, 마지막 변경 시각만 읽는 집계 쿼리 한 번으로 만들어
+캘린더 앱이 자주 조회해도 바뀐 것이 없으면 304만 돌려준다.
+'''
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+ICS_CHUNK_SIZE = 500
+DEFAULT_DURATION = 60
+
+EVENT_STATUSES = {
+    'pending': 'TENTATIVE',
+    'approved': 'CONFIRMED',
+}
+
+def get_etag(reservations, *scope):
+    # Changes whenever a reservation of the feed is created, updated or deleted
+    state = reservations.aggregate(
+        count=Count('id'),
+        last_id=Max('id'),
+        last_modified=Max(Coalesce('modified_at', 'created_at'))
+    )
+    key = ':'.join(str(value) for value in [*scope, state['count'], state['last_id'], state['last_modified']])
+    return '"' + hashlib.md5(key.encode()).hexdigest() + '"'
+
+def escape_text(value):
+    return str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def fold_line(line):
+    # Lines longer than 75 octets are folded with CRLF and a space
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        # Do not split a multi-byte character
+        while limit < len(encoded) and (encoded[limit] & 0xC0) == 0x80:
+            limit -= 1
+        parts.append(encoded[:limit].decode())
+        encoded = encoded[limit:]
+    return '\r\n '.join(parts) + '\r\n'
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def render_event(row, stamp):
+    reservation_id, reservation_date, reservation_time, seats, reservation_status, title, duration = row
+    start = timezone.make_aware(datetime.combine(reservation_date, reservation_time))
+    end = start + timedelta(minutes=duration or DEFAULT_DURATION)
+
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:reservation-{reservation_id}@{getattr(settings, "MAIN_DOMAIN", "muserium")}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{format_utc(start)}',
+        f'DTEND:{format_utc(end)}',
+        f'SUMMARY:{escape_text(title)}',
+        f'DESCRIPTION:{escape_text(f"{seats} seat(s)")}',
+        f'STATUS:{EVENT_STATUSES.get(reservation_status, "TENTATIVE")}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold_line(line) for line in lines)
+
+def stream_calendar(reservations, name):
+    # Yield the calendar one event at a time
+    stamp = format_utc(timezone.now())
+    yield ''.join(fold_line(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Muserium//Glass Class Reservations//KO',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ])
+
+    rows = reservations.order_by('reservation_date', 'reservation_time', 'id').values_list(
+        'id', 'reservation_date', 'reservation_time', 'seats', 'status', 'glass_class__title', 'glass_class__duration'
+    )
+    for row in rows.iterator(chunk_size=ICS_CHUNK_SIZE):
+        yield render_event(row, stamp)
+
+    yield fold_line('END:VCALENDAR')
@@ -0,0 +1,53 @@
+'''
+Live availability push
+
+예약 생성, 변경, 취소로 슬롯의 좌석 수가 바뀌면 커밋 후 channel layer를 통해
+해당 클래스 그룹을 구독 중인 websocket 클라이언트(AvailabilityConsumer)에게 슬롯 변경분을 보낸다.
+연결된 클라이언트는 get_disabled_timezones를 주기적으로 호출할 필요가 없다.
+'''
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from glass_class.models import ReservationSlot
+
+logger = logging.getLogger(__name__)
+
+def availability_group(class_id):
+    return f'glass_class_availability_{class_id}'
+
+def serialize_slot(slot):
+    return {
+        'reservation_date': slot.reservation_date.strftime('%Y-%m-%d'),
+        'reservation_time': slot.reservation_time.strftime('%H:%M:%S'),
+        'booked': slot.booked,
+        'capacity': slot.capacity,
+        'available': slot.booked < slot.capacity,
+    }
+
+def publish_slot(class_id, reservation_date, reservation_time):
+    # Send the committed state of the slot to the subscribers of the class
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        slot = ReservationSlot.objects.filter(
+            glass_class=class_id,
+            reservation_date=reservation_date,
+            reservation_time=reservation_time
+        ).first()
+        if slot is None:
+            return
+
+        async_to_sync(channel_layer.group_send)(availability_group(class_id), {
+            'type': 'slot.changed',
+            'slot': serialize_slot(slot),
+        })
+    except Exception:
+        # A locked database or a broken channel layer must not fail the booking that already committed,
+        # an error raised here would make run_with_retry book again and report a duplicate
+        logger.exception('Failed to publish the availability of class %s', class_id)
+
+def publish_slot_on_commit(class_id, reservation_date, reservation_time):
+    transaction.on_commit(lambda: publish_slot(class_id, reservation_date, reservation_time), robust=True)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from glass_class.archive import archive_reservations, get_archive_cutoff, ARCHIVE_BATCH_SIZE
+
+class Command(BaseCommand):
+    help = 'Move the reservations before the reservation window to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Days kept after the reservation date (RESERVATION_ARCHIVE_AFTER_DAYS by default)')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Number of reservations moved per transaction')
+        parser.add_argument('--max-batches', type=int, default=None, help='Maximum number of batches per run')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number')
+        if options['max_batches'] is not None and options['max_batches'] <= 0:
+            raise CommandError('--max-batches must be a positive number')
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must not be negative')
+
+        cutoff = get_archive_cutoff(options['days'])
+        archived = archive_reservations(cutoff=cutoff, batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f'{archived} reservations archived before {cutoff}'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from glass_class.models import GlassClass
+from glass_class.slots import rebuild_slots
+
+class Command(BaseCommand):
+    help = 'Build the reservation slot inventory from the existing reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-id', type=int, default=None, help='Only rebuild the slots of this class')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of slots written per query')
+
+    def handle(self, *args, **options):
+        glass_class = None
+        if options['class_id'] is not None:
+            try:
+                glass_class = GlassClass.objects.get(pk=options['class_id'])
+            except GlassClass.DoesNotExist:
+                raise CommandError(f'GlassClass {options["class_id"]} does not exist')
+
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number')
+
+        rebuilt = rebuild_slots(glass_class=glass_class, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{rebuilt} reservation slots rebuilt'))
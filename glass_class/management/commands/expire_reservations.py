@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from glass_class.expiry import expire_pending_reservations, EXPIRY_BATCH_SIZE, EXPIRY_MAX_BATCHES
+
+class Command(BaseCommand):
+    help = 'Expire stale pending reservations and free their seats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl', type=int, default=None, help='Seconds a reservation can stay pending (PENDING_RESERVATION_TTL by default)')
+        parser.add_argument('--batch-size', type=int, default=EXPIRY_BATCH_SIZE, help='Number of reservations expired per transaction')
+        parser.add_argument('--max-batches', type=int, default=EXPIRY_MAX_BATCHES, help='Maximum number of batches per run')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number')
+        if options['max_batches'] <= 0:
+            raise CommandError('--max-batches must be a positive number')
+        if options['ttl'] is not None and options['ttl'] < 0:
+            raise CommandError('--ttl must not be negative')
+
+        expired = expire_pending_reservations(ttl=options['ttl'], batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f'{expired} pending reservations expired'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glass_class', '0002_reservation_modified_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reservation_date', models.DateField()),
+                ('reservation_time', models.TimeField()),
+                ('capacity', models.IntegerField(default=1)),
+                ('booked', models.IntegerField(default=0)),
+                ('glass_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='glass_class.glassclass')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='reservationslot',
+            constraint=models.UniqueConstraint(fields=('glass_class', 'reservation_date', 'reservation_time'), name='unique_reservation_slot'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glass_class', '0003_reservationslot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['glass_class', 'reservation_date', 'reservation_time'], name='reservation_class_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glass_class', '0004_reservation_class_slot_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('closed_date', models.DateField(db_index=True)),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('glass_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='glass_class.glassclass')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ClassTimeSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.IntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('capacity', models.IntegerField(default=1)),
+                ('glass_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='glass_class.glassclass')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='classtimeslot',
+            constraint=models.UniqueConstraint(fields=('glass_class', 'weekday', 'start_time'), name='unique_class_time_slot'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glass_class', '0005_classtimeslot_classclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='seats',
+            field=models.IntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glass_class', '0007_reservation_status_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservationslot',
+            name='waitlist_tail',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reservation_date', models.DateField()),
+                ('reservation_time', models.TimeField()),
+                ('seats', models.IntegerField(default=1)),
+                ('position', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('glass_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='glass_class.glassclass')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(fields=('glass_class', 'reservation_date', 'reservation_time', 'position'), name='unique_waitlist_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(fields=('user', 'glass_class', 'reservation_date', 'reservation_time'), name='unique_waitlist_user'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.14 on 2026-10-18 07:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glass_class', '0008_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('reservation_date', models.DateField()),
+                ('reservation_time', models.TimeField()),
+                ('seats', models.IntegerField(default=1)),
+                ('created_at', models.DateTimeField()),
+                ('modified_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(default='pending', max_length=50)),
+                ('archived_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['reservation_date'], name='reservation_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='reservationarchive',
+            name='glass_class',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='glass_class.glassclass'),
+        ),
+        migrations.AddField(
+            model_name='reservationarchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='reservationarchive',
+            index=models.Index(fields=['user', 'reservation_date'], name='archive_user_date_idx'),
+        ),
+    ]
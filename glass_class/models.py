@@ -29,20 +29,133 @@ class Reservation(models.Model):
     # Class Reservation model
     class Meta:
         app_label = 'glass_class'
+        indexes = [
+            models.Index(fields=['glass_class', 'reservation_date', 'reservation_time'], name='reservation_class_slot_idx'),
+            models.Index(fields=['status', 'created_at'], name='reservation_status_created_idx'),
+            models.Index(fields=['reservation_date'], name='reservation_date_idx'),
+        ]
 
     STAUTS_CHOICES = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
+        ('expired', 'Expired'),
     ]
+    # Reservations in these states hold a seat in the slot inventory
+    ACTIVE_STATUSES = ['pending', 'approved']
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE)
     reservation_date = models.DateField()
     reservation_time = models.TimeField()
+    seats = models.IntegerField(default=1)
     created_at = models.DateTimeField()
     modified_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=50, default='pending')
 
     def __str__(self):
-        return f'{self.user.username} - {self.glass_class.title} on {self.reservation_date} at {self.reservation_time}'
\ No newline at end of file
+        return f'{self.user.username} - {self.glass_class.title} on {self.reservation_date} at {self.reservation_time}'
+
+class ReservationArchive(models.Model):
+    # Past reservations moved out of the Reservation table, keeps the id of the reservation
+    class Meta:
+        app_label = 'glass_class'
+        indexes = [
+            models.Index(fields=['user', 'reservation_date'], name='archive_user_date_idx'),
+        ]
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE)
+    reservation_date = models.DateField()
+    reservation_time = models.TimeField()
+    seats = models.IntegerField(default=1)
+    created_at = models.DateTimeField()
+    modified_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=50, default='pending')
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user.username} - {self.glass_class.title} on {self.reservation_date} at {self.reservation_time} (archived)'
+
+class ReservationSlot(models.Model):
+    # Precomputed reservation inventory per class, date and time
+    class Meta:
+        app_label = 'glass_class'
+        constraints = [
+            models.UniqueConstraint(fields=['glass_class', 'reservation_date', 'reservation_time'], name='unique_reservation_slot'),
+        ]
+
+    glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE)
+    reservation_date = models.DateField()
+    reservation_time = models.TimeField()
+    capacity = models.IntegerField(default=1)
+    booked = models.IntegerField(default=0)
+    # Position given to the last waitlist entry of the slot
+    waitlist_tail = models.IntegerField(default=0)
+
+    def is_full(self):
+        return self.booked >= self.capacity
+
+    def __str__(self):
+        return f'{self.glass_class.title} on {self.reservation_date} at {self.reservation_time} ({self.booked}/{self.capacity})'
+
+class WaitlistEntry(models.Model):
+    # FIFO waitlist of a fully booked slot, the entry with the lowest position is promoted first
+    class Meta:
+        app_label = 'glass_class'
+        constraints = [
+            models.UniqueConstraint(fields=['glass_class', 'reservation_date', 'reservation_time', 'position'], name='unique_waitlist_position'),
+            models.UniqueConstraint(fields=['user', 'glass_class', 'reservation_date', 'reservation_time'], name='unique_waitlist_user'),
+        ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE)
+    reservation_date = models.DateField()
+    reservation_time = models.TimeField()
+    seats = models.IntegerField(default=1)
+    position = models.IntegerField()
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user.username} waiting for {self.glass_class.title} on {self.reservation_date} at {self.reservation_time} (#{self.position})'
+
+class ClassTimeSlot(models.Model):
+    # Weekly opening time of a class, applies to every class without its own time slots when glass_class is empty
+    class Meta:
+        app_label = 'glass_class'
+        constraints = [
+            models.UniqueConstraint(fields=['glass_class', 'weekday', 'start_time'], name='unique_class_time_slot'),
+        ]
+
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE, null=True, blank=True)
+    weekday = models.IntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    capacity = models.IntegerField(default=1)
+
+    def __str__(self):
+        target = self.glass_class.title if self.glass_class else 'All classes'
+        return f'{target} - {self.get_weekday_display()} {self.start_time} ({self.capacity})'
+
+class ClassClosure(models.Model):
+    # Closed date such as a holiday, applies to every class when glass_class is empty
+    class Meta:
+        app_label = 'glass_class'
+
+    glass_class = models.ForeignKey(GlassClass, on_delete=models.CASCADE, null=True, blank=True)
+    closed_date = models.DateField(db_index=True)
+    reason = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        target = self.glass_class.title if self.glass_class else 'All classes'
+        return f'{target} closed on {self.closed_date}'
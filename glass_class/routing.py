@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import AvailabilityConsumer
+
+websocket_urlpatterns = [
+    path('ws/glass_class/availability/<int:class_id>/', AvailabilityConsumer.as_asgi()),
+]
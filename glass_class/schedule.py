@@ -0,0 +1,127 @@
+'''
+Class schedule engine
+
+요일별 운영 시간(ClassTimeSlot)과 휴무일(ClassClosure) 규칙을 클래스별로 한 번만 읽어
+예약 기간 전체의 {날짜: {시간: 정원}} 표로 컴파일해 두고, 이후의 "이 시간대가 열려 있는가"
+질의는 dict 조회만으로 답한다. 컴파일 결과는 프로세스 메모리에 보관하며 규칙이 바뀌면
+캐시에 저장된 버전을 올려 다시 컴파일되도록 한다. 기본 캐시(LocMemCache)는 프로세스마다 따로 있어서
+버전 변경은 규칙을 바꾼 프로세스에만 바로 적용되고, 다른 프로세스는 컴파일 결과가
+SCHEDULE_MEMO_TIMEOUT을 넘겨 다시 컴파일할 때 새 규칙을 읽는다. 모든 프로세스에 즉시 반영하려면
+CACHES['default']를 공유 캐시(Redis, Memcached 등)로 설정한다.
+
+클래스 전용 운영 시간이 없으면 전체 클래스 공통 운영 시간을, 그것도 없으면
+CLASS_SCHEDULE_DEFAULTS(기존 DateConfig의 기본값)를 사용한다.
+'''
+import calendar
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from glass_class.models import ClassTimeSlot, ClassClosure
+from common.cache_versions import get_cache_version, bump_cache_version
+
+SCHEDULE_DEFAULTS = getattr(settings, 'CLASS_SCHEDULE_DEFAULTS', {
+    'TIMES': ['10:00:00', '12:00:00', '14:00:00', '16:00:00'],
+    'CLOSED_WEEKDAYS': [0],
+    'CAPACITY': 1,
+})
+SCHEDULE_VERSION_KEY = 'glass_class:schedule:version'
+SCHEDULE_MEMO_SIZE = 1024
+# Compiled schedules are read again after this many seconds, the bound for the processes the version bump did not reach
+SCHEDULE_MEMO_TIMEOUT = getattr(settings, 'CLASS_SCHEDULE_MEMO_TIMEOUT', 60)
+
+_compiled_schedules = {}
+_compiled_schedules_lock = threading.Lock()
+
+def get_schedule_version():
+    return get_cache_version(SCHEDULE_VERSION_KEY)
+
+def invalidate_schedule():
+    # Recompile the schedules on the next access, other processes follow within SCHEDULE_MEMO_TIMEOUT
+    bump_cache_version(SCHEDULE_VERSION_KEY)
+
+def get_window(start_date):
+    # The reservation window is as long as the month of the start date
+    days = calendar.monthrange(start_date.year, start_date.month)[1]
+    return start_date, start_date + timedelta(days=days)
+
+class Schedule:
+    # Compiled schedule of a class for the reservation window
+
+    def __init__(self, weekly, closures, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.times = sorted({time for times in weekly.values() for time in times})
+
+        # {date: {time: capacity}} for every open date of the window
+        self.slots = {}
+        current_date = start_date
+        while current_date <= end_date:
+            open_times = weekly.get(current_date.weekday())
+            if open_times and current_date not in closures:
+                self.slots[current_date] = open_times
+            current_date += timedelta(days=1)
+
+    def is_open_date(self, date):
+        return date in self.slots
+
+    def is_open(self, date, time):
+        return time in self.slots.get(date, ())
+
+    def get_capacity(self, date, time):
+        return self.slots.get(date, {}).get(time, 0)
+
+    def get_times(self, date):
+        return sorted(self.slots.get(date, ()))
+
+    def get_closed_dates(self):
+        closed_dates = []
+        current_date = self.start_date
+        while current_date <= self.end_date:
+            if current_date not in self.slots:
+                closed_dates.append(current_date)
+            current_date += timedelta(days=1)
+        return closed_dates
+
+def compile_schedule(class_id, start_date, end_date):
+    # Read the rules of a class and compile them for the window
+    time_slots = list(ClassTimeSlot.objects.filter(Q(glass_class=class_id) | Q(glass_class__isnull=True)))
+    class_time_slots = [slot for slot in time_slots if slot.glass_class_id is not None]
+    if class_id is not None and class_time_slots:
+        time_slots = class_time_slots
+    else:
+        time_slots = [slot for slot in time_slots if slot.glass_class_id is None]
+
+    weekly = {}
+    if time_slots:
+        for slot in time_slots:
+            weekly.setdefault(slot.weekday, {})[slot.start_time.strftime('%H:%M:%S')] = slot.capacity
+    else:
+        for weekday in range(7):
+            if weekday not in SCHEDULE_DEFAULTS['CLOSED_WEEKDAYS']:
+                weekly[weekday] = {time: SCHEDULE_DEFAULTS['CAPACITY'] for time in SCHEDULE_DEFAULTS['TIMES']}
+
+    closures = set(ClassClosure.objects.filter(
+        Q(glass_class=class_id) | Q(glass_class__isnull=True),
+        closed_date__range=[start_date, end_date]
+    ).values_list('closed_date', flat=True))
+
+    return Schedule(weekly, closures, start_date, end_date)
+
+def get_schedule(class_id, start_date):
+    # Get the compiled schedule of a class, compiling it once per rule version and start date
+    start_date, end_date = get_window(start_date)
+    key = (class_id, start_date, get_schedule_version())
+
+    now = time.monotonic()
+    memo = _compiled_schedules.get(key)
+    if memo is not None and now - memo[1] < SCHEDULE_MEMO_TIMEOUT:
+        return memo[0]
+
+    schedule = compile_schedule(class_id, start_date, end_date)
+    with _compiled_schedules_lock:
+        if len(_compiled_schedules) >= SCHEDULE_MEMO_SIZE:
+            _compiled_schedules.clear()
+        _compiled_schedules[key] = (schedule, now)
+    return schedule
@@ -14,4 +14,16 @@ class ClassDetailSerializer(serializers.ModelSerializer):
 class ReservationSerializer(serializers.ModelSerializer):
 	class Meta:
 		model = Reservation
-		fields = '__all__'
\ No newline at end of file
+		fields = '__all__'
+
+class ReservationHistorySerializer(serializers.Serializer):
+	# Rows of the reservation history, from the Reservation or ReservationArchive table
+	id = serializers.IntegerField()
+	glass_class = serializers.IntegerField()
+	glass_class_title = serializers.CharField()
+	reservation_date = serializers.DateField()
+	reservation_time = serializers.TimeField()
+	seats = serializers.IntegerField()
+	status = serializers.CharField()
+	created_at = serializers.DateTimeField()
+	archived = serializers.BooleanField()
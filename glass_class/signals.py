@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+from glass_class.models import ClassTimeSlot, ClassClosure
+from glass_class.schedule import invalidate_schedule
+
+# Sent once per user after an admin changed the status of reservations in bulk
+# kwargs: user_id, status, reservation_ids
+reservation_status_changed = Signal()
+
+# Sent after a waitlist entry was turned into a reservation
+# kwargs: user_id, reservation_id
+waitlist_promoted = Signal()
+
+# Recompile the schedules when the opening hours or closures change
+@receiver(post_save, sender=ClassTimeSlot)
+@receiver(post_delete, sender=ClassTimeSlot)
+@receiver(post_save, sender=ClassClosure)
+@receiver(post_delete, sender=ClassClosure)
+def schedule_rules_changed(sender, **kwargs):
+    invalidate_schedule()
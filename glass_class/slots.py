@@ -0,0 +1,111 @@
+'''
+Reservation slot inventory
+
+예약 가능 여부를 확인할 때마다 Reservation 테이블 전체를 읽지 않도록
+(class, date, time) 단위로 정원과 예약 수를 미리 집계해 둔 ReservationSlot을 사용한다.
+'''
+from django.db import transaction
+from django.db.models import F, Sum
+from glass_class.models import Reservation, ReservationSlot
+from glass_class.live import publish_slot_on_commit
+
+def get_slot(glass_class, reservation_date, reservation_time, capacity=None):
+    # Get the slot of a class, building it from the existing reservations on first access
+    slot = ReservationSlot.objects.filter(
+        glass_class=glass_class,
+        reservation_date=reservation_date,
+        reservation_time=reservation_time
+    ).first()
+    if slot is None:
+        booked = Reservation.objects.filter(
+            glass_class=glass_class,
+            reservation_date=reservation_date,
+            reservation_time=reservation_time,
+            status__in=Reservation.ACTIVE_STATUSES
+        ).aggregate(booked=Sum('seats'))['booked'] or 0
+        defaults = {'booked': booked}
+        if capacity is not None:
+            defaults['capacity'] = capacity
+        slot, _ = ReservationSlot.objects.get_or_create(
+            glass_class=glass_class,
+            reservation_date=reservation_date,
+            reservation_time=reservation_time,
+            defaults=defaults
+        )
+
+    # Follow the capacity of the schedule when it was changed
+    if capacity is not None and slot.capacity != capacity:
+        ReservationSlot.objects.filter(pk=slot.pk).update(capacity=capacity)
+        slot.capacity = capacity
+    return slot
+
+def is_slot_available(glass_class, reservation_date, reservation_time, capacity=None):
+    # Check if the slot still has a free seat
+    return not get_slot(glass_class, reservation_date, reservation_time, capacity).is_full()
+
+def get_booked_slots(glass_class, start_date, end_date):
+    # Get (date, time, booked) of the slots of a class that have reservations in the date range
+    return ReservationSlot.objects.filter(
+        glass_class=glass_class,
+        reservation_date__range=[start_date, end_date],
+        booked__gt=0
+    ).values_list('reservation_date', 'reservation_time', 'booked')
+
+def take_seats(slot, seats=1):
+    # Take seats from the slot only if they are still free (conditional UPDATE, no read-modify-write)
+    updated = ReservationSlot.objects.filter(
+        pk=slot.pk,
+        booked__lte=F('capacity') - seats
+    ).update(booked=F('booked') + seats)
+    if updated:
+        publish_slot_on_commit(slot.glass_class_id, slot.reservation_date, slot.reservation_time)
+    return updated == 1
+
+def release_seats(glass_class, reservation_date, reservation_time, seats=1):
+    # Give the seats back to the slot
+    ReservationSlot.objects.filter(
+        glass_class=glass_class,
+        reservation_date=reservation_date,
+        reservation_time=reservation_time,
+        booked__gte=seats
+    ).update(booked=F('booked') - seats)
+    publish_slot_on_commit(getattr(glass_class, 'pk', glass_class), reservation_date, reservation_time)
+
+@transaction.atomic
+def rebuild_slots(glass_class=None, batch_size=1000):
+    # Rebuild the slot inventory from the existing reservations
+    slots = ReservationSlot.objects.all()
+    reservations = Reservation.objects.filter(status__in=Reservation.ACTIVE_STATUSES)
+    if glass_class is not None:
+        slots = slots.filter(glass_class=glass_class)
+        reservations = reservations.filter(glass_class=glass_class)
+
+    slots.update(booked=0)
+
+    booked_counts = reservations.values('glass_class', 'reservation_date', 'reservation_time').annotate(booked=Sum('seats')).order_by()
+
+    rebuilt = 0
+    batch = []
+    for row in booked_counts.iterator(chunk_size=batch_size):
+        batch.append(ReservationSlot(
+            glass_class_id=row['glass_class'],
+            reservation_date=row['reservation_date'],
+            reservation_time=row['reservation_time'],
+            booked=row['booked']
+        ))
+        if len(batch) >= batch_size:
+            rebuilt += _upsert_slots(batch)
+            batch = []
+    if batch:
+        rebuilt += _upsert_slots(batch)
+
+    return rebuilt
+
+def _upsert_slots(slots):
+    ReservationSlot.objects.bulk_create(
+        slots,
+        update_conflicts=True,
+        unique_fields=['glass_class', 'reservation_date', 'reservation_time'],
+        update_fields=['booked']
+    )
+    return len(slots)
@@ -1,3 +1,15 @@
 from .test_class_list import *
 from .test_class_detail import *
 from .test_class_reservation import *
+from .test_reservation_slot import *
+from .test_reservation_availability import *
+from .test_reservation_schedule import *
+from .test_reservation_benchmark import *
+from .test_reservation_concurrency import *
+from .test_reservation_batch import *
+from .test_reservation_expiry import *
+from .test_reservation_approval import *
+from .test_reservation_waitlist import *
+from .test_reservation_live import *
+from .test_reservation_calendar import *
+from .test_reservation_archive import *
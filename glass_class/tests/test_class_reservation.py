@@ -7,6 +7,13 @@ from accounts.models import User
 from glass_class.models import GlassClass, Reservation
 from datetime import datetime, timedelta
 
+def get_reservation_date():
+    # Closest reservable date after the reservation start date(KST today), Mondays are closed
+    reservation_date = datetime.now() + timedelta(days=2)
+    if reservation_date.weekday() == 0:
+        reservation_date += timedelta(days=1)
+    return reservation_date
+
 class ClassReservationTests(APITestCase):
 
     def setUp(self):
@@ -23,13 +30,16 @@ class ClassReservationTests(APITestCase):
         self.get_disabled_dates_url = reverse('glass_class:reservation-get-disabled-dates')
         self.get_disabled_timezones_url = reverse('glass_class:reservation-get-disabled-timezones')
 
+        # Reservable date for the tests
+        self.reservation_date = get_reservation_date()
+
         # Create a GlassClass data
         self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
 
         # Create reservation data
-        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=timezone.now().date() + timedelta(days=1), reservation_time='10:00:00', created_at=timezone.now(), modified_at=timezone.now())
-        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=timezone.now().date() + timedelta(days=1), reservation_time='12:00:00', created_at=timezone.now(), modified_at=timezone.now())
-        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=timezone.now().date() + timedelta(days=1), reservation_time='14:00:00', created_at=timezone.now(), modified_at=timezone.now())
+        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=self.reservation_date.date(), reservation_time='10:00:00', created_at=timezone.now(), modified_at=timezone.now())
+        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=self.reservation_date.date(), reservation_time='12:00:00', created_at=timezone.now(), modified_at=timezone.now())
+        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=self.reservation_date.date(), reservation_time='14:00:00', created_at=timezone.now(), modified_at=timezone.now())
 
     def test_create_reservation(self):
         # login new user
@@ -38,7 +48,7 @@ class ClassReservationTests(APITestCase):
         # Create a reservation
         data = {
             'class_id': self.glass_class.id,
-            'reservation_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
             'reservation_time': '16:00:00'
         }
         response = self.client.post(self.reservation_url, data, format='json', follow=True)
@@ -47,7 +57,7 @@ class ClassReservationTests(APITestCase):
 
     def test_create_reservation_missing_class_id(self):
         data = {
-            'reservation_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
             'reservation_time': '10:00:00'
         }
         response = self.client.post(self.reservation_url, data, format='json', follow=True)
@@ -64,7 +74,7 @@ class ClassReservationTests(APITestCase):
     def test_create_reservation_missing_reservation_time(self):
         data = {
             'class_id': self.glass_class.id,
-            'reservation_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d')
         }
         response = self.client.post(self.reservation_url, data, format='json', follow=True)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -81,7 +91,7 @@ class ClassReservationTests(APITestCase):
     def test_create_reservation_invalid_reservation_time(self):
         data = {
             'class_id': self.glass_class.id,
-            'reservation_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
             'reservation_time': '11:00:00'
         }
         response = self.client.post(self.reservation_url, data, format='json', follow=True)
@@ -90,7 +100,7 @@ class ClassReservationTests(APITestCase):
     def test_create_reservation_duplicated_reservation(self):
         data = {
             'class_id': self.glass_class.id,
-            'reservation_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
             'reservation_time': '10:00:00'
         }
         response = self.client.post(self.reservation_url, data, format='json', follow=True)
@@ -105,13 +115,50 @@ class ClassReservationTests(APITestCase):
         response = self.client.get(self.list_reservations_url, follow=True)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_list_reservations_invalid_class_id(self):
+        response = self.client.get(self.list_reservations_url, {'class_id': 'abc'}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.list_reservations_url, {'class_id': 1000}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_disabled_dates(self):
-        response = self.client.get(self.get_disabled_dates_url, follow=True)
+        response = self.client.get(self.get_disabled_dates_url, {'class_id': self.glass_class.id}, follow=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(isinstance(response.data, list))
 
+    def test_get_disabled_dates_missing_class_id(self):
+        response = self.client.get(self.get_disabled_dates_url, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_disabled_dates_invalid_class_id(self):
+        response = self.client.get(self.get_disabled_dates_url, {'class_id': 'abc'}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.get_disabled_dates_url, {'class_id': 1000}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_disabled_timezones(self):
-        selected_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        selected_date = self.reservation_date.strftime('%Y-%m-%d')
+        response = self.client.get(self.get_disabled_timezones_url, {'class_id': self.glass_class.id, 'selected_date': selected_date}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(isinstance(response.data, list))
+        self.assertEqual(sorted(response.data), ['10:00:00', '12:00:00', '14:00:00'])
+
+    def test_get_disabled_timezones_missing_class_id(self):
+        selected_date = self.reservation_date.strftime('%Y-%m-%d')
         response = self.client.get(self.get_disabled_timezones_url, {'selected_date': selected_date}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_disabled_timezones_invalid_class_id(self):
+        selected_date = self.reservation_date.strftime('%Y-%m-%d')
+        response = self.client.get(self.get_disabled_timezones_url, {'class_id': 'abc', 'selected_date': selected_date}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.get_disabled_timezones_url, {'class_id': 1000, 'selected_date': selected_date}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_disabled_timezones_other_class(self):
+        # Reservations of another class do not block this class
+        other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+        selected_date = self.reservation_date.strftime('%Y-%m-%d')
+        response = self.client.get(self.get_disabled_timezones_url, {'class_id': other_class.id, 'selected_date': selected_date}, follow=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(isinstance(response.data, list))
\ No newline at end of file
+        self.assertEqual(response.data, [])
\ No newline at end of file
@@ -0,0 +1,129 @@
+# test_reservation_approval.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationSlot
+from glass_class.approval import change_reservations_status
+from glass_class.signals import reservation_status_changed
+from .test_class_reservation import get_reservation_date
+from datetime import time, timedelta
+
+class ReservationApprovalTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpassword')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+        self.update_status_url = reverse('glass_class:reservation-update-reservations-status')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+
+        # Collect the notification events
+        self.events = []
+        reservation_status_changed.connect(self.receive_event)
+        self.addCleanup(reservation_status_changed.disconnect, self.receive_event)
+
+    def receive_event(self, sender, **kwargs):
+        self.events.append(kwargs)
+
+    def create_reservation(self, user, reservation_time):
+        self.client.force_authenticate(user=user)
+        data = {
+            'class_id': self.glass_class.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': reservation_time
+        }
+        self.client.post(self.reservation_url, data, format='json', follow=True)
+        return Reservation.objects.get(user=user, reservation_time=reservation_time)
+
+    def update_status(self, user, reservation_ids, new_status):
+        self.client.force_authenticate(user=user)
+        data = {'reservation_ids': reservation_ids, 'status': new_status}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.update_status_url, data, format='json', follow=True)
+
+    def test_approve_reservations(self):
+        reservation = self.create_reservation(self.user, '10:00:00')
+        reservation1 = self.create_reservation(self.user1, '12:00:00')
+
+        response = self.update_status(self.admin, [reservation.id, reservation1.id], 'approved')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['updated']), [reservation.id, reservation1.id])
+        self.assertEqual(Reservation.objects.filter(status='approved').count(), 2)
+
+        # Approved reservations keep their seats
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 1)
+
+        # Approving again is skipped
+        response = self.update_status(self.admin, [reservation.id], 'approved')
+        self.assertEqual(response.data['updated'], [])
+        self.assertEqual(response.data['skipped'], [reservation.id])
+
+    def test_reject_reservations_frees_seats(self):
+        reservation = self.create_reservation(self.user, '10:00:00')
+
+        response = self.update_status(self.admin, [reservation.id], 'rejected')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'rejected')
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 0)
+
+        # Rejected reservations can not be approved again
+        response = self.update_status(self.admin, [reservation.id], 'approved')
+        self.assertEqual(response.data['skipped'], [reservation.id])
+
+    def test_one_event_per_user(self):
+        reservations = Reservation.objects.bulk_create([
+            Reservation(user=user, glass_class=self.glass_class, reservation_date=self.reservation_date + timedelta(days=day), reservation_time=time(10), created_at=timezone.now())
+            for user in [self.user, self.user1]
+            for day in range(3)
+        ])
+
+        self.update_status(self.admin, [reservation.id for reservation in reservations], 'approved')
+
+        self.assertEqual(len(self.events), 2)
+        events = {event['user_id']: event for event in self.events}
+        self.assertEqual(len(events[self.user.id]['reservation_ids']), 3)
+        self.assertEqual(events[self.user1.id]['status'], 'approved')
+
+    def test_one_update_per_chunk(self):
+        reservations = Reservation.objects.bulk_create([
+            Reservation(user=self.user, glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10), created_at=timezone.now())
+            for _ in range(10)
+        ])
+        reservation_ids = [reservation.id for reservation in reservations]
+
+        # SELECT and UPDATE per chunk of 4 reservations inside one transaction
+        with self.assertNumQueries(3 * 2 + 2):
+            changed = change_reservations_status(reservation_ids, 'approved', chunk_size=4)
+        self.assertEqual(sorted(changed), reservation_ids)
+
+    def test_update_status_only_admin(self):
+        reservation = self.create_reservation(self.user, '10:00:00')
+
+        response = self.update_status(self.user, [reservation.id], 'approved')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'pending')
+
+    def test_update_status_invalid_data(self):
+        reservation = self.create_reservation(self.user, '10:00:00')
+
+        self.assertEqual(self.update_status(self.admin, [], 'approved').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.update_status(self.admin, [reservation.id], 'pending').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.update_status(self.admin, ['abc'], 'approved').status_code, status.HTTP_400_BAD_REQUEST)
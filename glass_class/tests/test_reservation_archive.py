@@ -0,0 +1,94 @@
+# test_reservation_archive.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationArchive, ReservationSlot
+from glass_class.archive import archive_reservations, get_archive_cutoff
+from .test_class_reservation import get_reservation_date
+from datetime import time, timedelta
+from io import StringIO
+
+class ReservationArchiveTests(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+
+        # URL for the reservation APIs
+        self.history_url = reverse('glass_class:reservation-list-reservation-history')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.cutoff = get_archive_cutoff()
+        self.reservation_date = get_reservation_date().date()
+
+        # Past reservations of both users and an upcoming one
+        self.past = Reservation.objects.bulk_create([
+            Reservation(user=user, glass_class=self.glass_class, reservation_date=self.cutoff - timedelta(days=day), reservation_time=time(10), status='approved', created_at=timezone.now())
+            for user in [self.user, self.user1]
+            for day in range(1, 4)
+        ])
+        self.upcoming = Reservation.objects.create(user=self.user, glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10), created_at=timezone.now())
+        ReservationSlot.objects.create(glass_class=self.glass_class, reservation_date=self.cutoff - timedelta(days=1), reservation_time=time(10), booked=2)
+
+    def test_archive_reservations(self):
+        self.assertEqual(archive_reservations(), 6)
+
+        # Only the upcoming reservation stays in the hot table
+        self.assertEqual(list(Reservation.objects.values_list('id', flat=True)), [self.upcoming.id])
+        self.assertEqual(ReservationArchive.objects.count(), 6)
+        archived = ReservationArchive.objects.get(pk=self.past[0].id)
+        self.assertEqual(archived.user, self.user)
+        self.assertEqual(archived.status, 'approved')
+        self.assertFalse(ReservationSlot.objects.filter(reservation_date__lt=self.cutoff).exists())
+
+        # Nothing left to move
+        self.assertEqual(archive_reservations(), 0)
+
+    def test_archive_in_batches(self):
+        self.assertEqual(archive_reservations(batch_size=4, max_batches=1), 4)
+        self.assertEqual(Reservation.objects.count(), 3)
+        self.assertEqual(archive_reservations(batch_size=4), 2)
+
+    def test_archive_is_idempotent(self):
+        # A previous run copied the row but did not delete it
+        reservation = self.past[0]
+        ReservationArchive.objects.create(id=reservation.id, user=reservation.user, glass_class=reservation.glass_class, reservation_date=reservation.reservation_date, reservation_time=reservation.reservation_time, status=reservation.status, created_at=reservation.created_at, archived_at=timezone.now())
+
+        self.assertEqual(archive_reservations(), 6)
+        self.assertEqual(ReservationArchive.objects.count(), 6)
+
+    def test_archive_reservations_command(self):
+        out = StringIO()
+        call_command('archive_reservations', '--days', '2', stdout=out)
+        self.assertIn('2 reservations archived', out.getvalue())
+        self.assertEqual(Reservation.objects.count(), 5)
+
+    def test_list_reservation_history(self):
+        archive_reservations()
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.history_url, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 4)
+
+        # Newest first across both tables
+        results = response.data['results']
+        self.assertEqual(results[0]['id'], self.upcoming.id)
+        self.assertFalse(results[0]['archived'])
+        self.assertEqual([result['archived'] for result in results[1:]], [True, True, True])
+        self.assertEqual(results[1]['glass_class_title'], 'Test Class')
+        self.assertEqual(results[1]['reservation_date'], (self.cutoff - timedelta(days=1)).strftime('%Y-%m-%d'))
+
+        response = self.client.get(self.history_url, {'page': 2, 'page_size': 3}, follow=True)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_list_reservation_history_requires_login(self):
+        response = self.client.get(self.history_url, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
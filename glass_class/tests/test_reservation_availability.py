@@ -0,0 +1,105 @@
+# test_reservation_availability.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, ReservationSlot
+from glass_class.views.class_reservation import DateConfig
+from .test_class_reservation import get_reservation_date
+from datetime import datetime, timedelta
+
+class ReservationAvailabilityTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+        self.cancel_reservation_url = reverse('glass_class:reservation-cancel-reservation')
+        self.get_monthly_availability_url = reverse('glass_class:reservation-get-monthly-availability')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+
+    def get_day_bitmap(self, data, date):
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+        return data['bitmap'][(date - start_date).days]
+
+    def test_get_monthly_availability(self):
+        ReservationSlot.objects.create(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time='10:00:00', booked=1)
+
+        response = self.client.get(self.get_monthly_availability_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        date_config = DateConfig()
+        start_date = date_config.get_start_date().date()
+        end_date = date_config.get_end_date().date()
+        self.assertEqual(response.data['times'], date_config.vaild_times)
+        self.assertEqual(len(response.data['bitmap']), (end_date - start_date).days + 1)
+
+        # The 10:00 slot is full, the other times are open
+        self.assertEqual(self.get_day_bitmap(response.data, self.reservation_date), 0b1110)
+
+        # Mondays are closed
+        for offset, day in enumerate(response.data['bitmap']):
+            if (start_date + timedelta(days=offset)).weekday() == 0:
+                self.assertEqual(day, 0)
+
+    def test_get_monthly_availability_missing_class_id(self):
+        response = self.client.get(self.get_monthly_availability_url, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_monthly_availability_invalid_class_id(self):
+        response = self.client.get(self.get_monthly_availability_url, {'class_id': 1000}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_monthly_availability_non_integer_class_id(self):
+        response = self.client.get(self.get_monthly_availability_url, {'class_id': 'abc'}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_monthly_availability_is_cached(self):
+        self.client.get(self.get_monthly_availability_url, {'class_id': self.glass_class.id}, follow=True)
+
+        # Only the class lookup hits the database on a cache hit
+        with self.assertNumQueries(1):
+            response = self.client.get(self.get_monthly_availability_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_monthly_availability_invalidated_by_reservation(self):
+        response = self.client.get(self.get_monthly_availability_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(self.get_day_bitmap(response.data, self.reservation_date), 0b1111)
+        other_response = self.client.get(self.get_monthly_availability_url, {'class_id': self.other_class.id}, follow=True)
+
+        # Create a reservation
+        self.client.force_authenticate(user=self.user)
+        data = {
+            'class_id': self.glass_class.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '12:00:00'
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.reservation_url, data, format='json', follow=True)
+
+        response = self.client.get(self.get_monthly_availability_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(self.get_day_bitmap(response.data, self.reservation_date), 0b1101)
+
+        # The cache of another class is kept
+        with self.assertNumQueries(1):
+            response = self.client.get(self.get_monthly_availability_url, {'class_id': self.other_class.id}, follow=True)
+        self.assertEqual(response.data, other_response.data)
+
+        # Cancel the reservation
+        reservation_id = self.glass_class.reservation_set.get().id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation_id}', follow=True)
+
+        response = self.client.get(self.get_monthly_availability_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertEqual(self.get_day_bitmap(response.data, self.reservation_date), 0b1111)
@@ -0,0 +1,135 @@
+# test_reservation_batch.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationSlot, ClassTimeSlot
+from glass_class.views.class_reservation import DateConfig
+from .test_class_reservation import get_reservation_date
+from datetime import time, timedelta
+
+class ReservationBatchTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+
+        # URL for the reservation APIs
+        self.reservations_url = reverse('glass_class:reservation-create-reservations')
+        self.cancel_reservation_url = reverse('glass_class:reservation-cancel-reservation')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+        self.next_date = self.reservation_date + timedelta(days=1)
+        if self.next_date.weekday() == 0:
+            self.next_date += timedelta(days=1)
+
+    def create_reservations(self, user, reservations):
+        self.client.force_authenticate(user=user)
+        return self.client.post(self.reservations_url, {'reservations': reservations}, format='json', follow=True)
+
+    def item(self, reservation_time, reservation_date=None, glass_class=None, seats=1):
+        return {
+            'class_id': (glass_class or self.glass_class).id,
+            'reservation_date': (reservation_date or self.reservation_date).strftime('%Y-%m-%d'),
+            'reservation_time': reservation_time,
+            'seats': seats
+        }
+
+    def test_create_reservations(self):
+        response = self.create_reservations(self.user, [
+            self.item('10:00:00'),
+            self.item('10:00:00', reservation_date=self.next_date),
+            self.item('12:00:00', glass_class=self.other_class),
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['reservation_ids']), 3)
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 3)
+
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 1)
+
+    def test_create_reservations_with_seats(self):
+        ClassTimeSlot.objects.create(glass_class=self.glass_class, weekday=self.reservation_date.weekday(), start_time=time(11), capacity=4)
+
+        response = self.create_reservations(self.user, [self.item('11:00:00', seats=3)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(11))
+        self.assertEqual(slot.booked, 3)
+
+        # Only one seat is left
+        response = self.create_reservations(self.user1, [self.item('11:00:00', seats=2)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Cancelling the group frees every seat
+        self.client.force_authenticate(user=self.user)
+        reservation = Reservation.objects.get(user=self.user)
+        self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation.id}', follow=True)
+        slot.refresh_from_db()
+        self.assertEqual(slot.booked, 0)
+
+    def test_create_reservations_is_all_or_nothing(self):
+        self.create_reservations(self.user1, [self.item('12:00:00', reservation_date=self.next_date)])
+
+        # The last slot is full so no reservation is created
+        response = self.create_reservations(self.user, [
+            self.item('10:00:00'),
+            self.item('12:00:00', reservation_date=self.next_date),
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.filter(user=self.user).exists())
+        self.assertFalse(ReservationSlot.objects.filter(reservation_date=self.reservation_date, booked__gt=0).exists())
+
+    def test_create_reservations_duplicate_date(self):
+        response = self.create_reservations(self.user, [self.item('10:00:00'), self.item('12:00:00')])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('reservations[1]', response.data['error'])
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_create_reservations_invalid_items(self):
+        response = self.create_reservations(self.user, [])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.create_reservations(self.user, [self.item('10:00:00', seats=0)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.create_reservations(self.user, [self.item('11:00:00')])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.create_reservations(self.user, [{'class_id': 1000, 'reservation_date': self.reservation_date.strftime('%Y-%m-%d'), 'reservation_time': '10:00:00'}])
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.create_reservations(self.user, [self.item('10:00:00')] * 21)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_create_reservations_query_count(self):
+        # The number of queries does not grow with the size of the batch
+        dates = []
+        current_date = self.reservation_date
+        while len(dates) < 6:
+            if current_date.weekday() != 0:
+                dates.append(current_date)
+            current_date += timedelta(days=1)
+
+        # Compile the schedule before counting
+        DateConfig(self.glass_class.id)
+
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as single:
+            self.client.post(self.reservations_url, {'reservations': [self.item('10:00:00', reservation_date=dates[0])]}, format='json', follow=True)
+        with CaptureQueriesContext(connection) as batch:
+            response = self.client.post(self.reservations_url, {'reservations': [self.item('10:00:00', reservation_date=day) for day in dates[1:]]}, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.count(), 6)
+        self.assertEqual(len(batch), len(single))
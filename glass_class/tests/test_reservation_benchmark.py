@@ -0,0 +1,82 @@
+# test_reservation_benchmark.py
+from rest_framework.test import APITestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation
+from glass_class.views.class_reservation import DateConfig
+from datetime import timedelta
+import os
+import time
+import unittest
+
+# The timing benchmark seeds thousands of rows, run it with RUN_BENCHMARKS=1
+RUN_BENCHMARKS = bool(os.environ.get('RUN_BENCHMARKS'))
+
+class ReservationAvailabilityBenchmarkTests(APITestCase):
+    # Per-class availability query must go through the class index
+    RUNS = 30
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.date_config = DateConfig()
+        self.get_disabled_dates_url = reverse('glass_class:reservation-get-disabled-dates')
+
+    def create_classes(self, count, days=None):
+        glass_classes = GlassClass.objects.bulk_create([
+            GlassClass(title=f'Class {i}', description='Test Description', short_description='Test Short Description', image_url='https://example.com/image', image_alt='image', created_at=timezone.now())
+            for i in range(count)
+        ])
+
+        # Fully book every class for the given days of the reservation window
+        start_date = self.date_config.get_start_date().date()
+        if days is None:
+            days = (self.date_config.get_end_date().date() - start_date).days + 1
+        Reservation.objects.bulk_create([
+            Reservation(user=self.user, glass_class=glass_class, reservation_date=start_date + timedelta(days=day), reservation_time=reservation_time, created_at=timezone.now())
+            for glass_class in glass_classes
+            for day in range(days)
+            for reservation_time in self.date_config.vaild_times
+        ], batch_size=5000)
+        return glass_classes
+
+    def get_availability_query(self, glass_class):
+        # SQL of the booked count query get_disabled_dates runs
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.get_disabled_dates_url, {'class_id': glass_class.id}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries.captured_queries if 'glass_class_reservation' in query['sql'] and 'SUM(' in query['sql']]
+        self.assertEqual(len(sql), 1)
+        return sql[0]
+
+    def test_availability_query_uses_class_index(self):
+        glass_class = self.create_classes(3, days=2)[0]
+        sql = self.get_availability_query(glass_class)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('reservation_class_slot_idx', plan)
+
+    @unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run the timing benchmark')
+    def test_availability_query_time_is_flat(self):
+        target_class = self.create_classes(1)[0]
+        sql = self.get_availability_query(target_class)
+
+        def measure():
+            # Best of several runs to filter out noise
+            timings = []
+            with connection.cursor() as cursor:
+                for _ in range(self.RUNS):
+                    started = time.perf_counter()
+                    cursor.execute(sql)
+                    cursor.fetchall()
+                    timings.append(time.perf_counter() - started)
+            return min(timings)
+
+        few_classes = measure()
+        self.create_classes(200)
+        many_classes = measure()
+        print(f'\navailability query: 1 class {few_classes * 1000:.3f}ms, 201 classes {many_classes * 1000:.3f}ms')
@@ -0,0 +1,110 @@
+# test_reservation_calendar.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation
+from glass_class.ics import fold_line
+from .test_class_reservation import get_reservation_date
+from datetime import time, timedelta
+
+class ReservationCalendarTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpassword')
+
+        # URL for the reservation APIs
+        self.get_calendar_url = reverse('glass_class:reservation-get-calendar')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class, Glass', description='Test Description', short_description='Test Short Description', duration=90, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+        self.reservation = self.create_reservation(self.user, self.glass_class)
+        self.other_reservation = self.create_reservation(self.user, self.other_class, status='approved')
+        self.create_reservation(self.user1, self.glass_class, reservation_time=time(12))
+
+    def create_reservation(self, user, glass_class, reservation_time=time(10), status='pending'):
+        return Reservation.objects.create(user=user, glass_class=glass_class, reservation_date=self.reservation_date, reservation_time=reservation_time, status=status, created_at=timezone.now())
+
+    def get_calendar(self, user, headers=None, **params):
+        self.client.force_authenticate(user=user)
+        return self.client.get(self.get_calendar_url, params, follow=True, headers=headers)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_get_calendar(self):
+        response = self.get_calendar(self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(response['ETag'])
+
+        content = self.read(response)
+        self.assertTrue(content.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(content.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(content.count('BEGIN:VEVENT'), 2)
+        self.assertIn(f'UID:reservation-{self.reservation.id}@', content)
+        self.assertIn('SUMMARY:Test Class\\, Glass', content)
+        self.assertIn('STATUS:TENTATIVE', content)
+        self.assertIn('STATUS:CONFIRMED', content)
+
+        # 10:00 KST is 01:00 UTC, the event lasts as long as the class
+        date = self.reservation_date.strftime('%Y%m%d')
+        self.assertIn(f'DTSTART:{date}T010000Z', content)
+        self.assertIn(f'DTEND:{date}T023000Z', content)
+
+    def test_get_calendar_of_class(self):
+        content = self.read(self.get_calendar(self.user, class_id=self.glass_class.id))
+        self.assertEqual(content.count('BEGIN:VEVENT'), 1)
+        self.assertNotIn(f'reservation-{self.other_reservation.id}@', content)
+
+        # Admin gets every reservation of the class
+        content = self.read(self.get_calendar(self.admin, class_id=self.glass_class.id))
+        self.assertEqual(content.count('BEGIN:VEVENT'), 2)
+
+    def test_get_calendar_not_modified(self):
+        etag = self.get_calendar(self.user)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.get_calendar(self.user, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # Another user has another feed
+        response = self.get_calendar(self.user1, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_calendar_etag_changes(self):
+        etag = self.get_calendar(self.user)['ETag']
+
+        self.reservation.reservation_time = time(14)
+        self.reservation.modified_at = timezone.now() + timedelta(seconds=1)
+        self.reservation.save()
+        self.assertNotEqual(self.get_calendar(self.user)['ETag'], etag)
+        etag = self.get_calendar(self.user)['ETag']
+
+        self.other_reservation.delete()
+        response = self.get_calendar(self.user, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.read(response).count('BEGIN:VEVENT'), 1)
+
+    def test_get_calendar_requires_login(self):
+        response = self.client.get(self.get_calendar_url, follow=True)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_fold_line(self):
+        line = 'SUMMARY:' + '유리' * 40
+        folded = fold_line(line)
+        for part in folded.split('\r\n'):
+            self.assertLessEqual(len(part.encode()), 75)
+        self.assertEqual(folded.replace('\r\n ', '').rstrip('\r\n'), line)
@@ -0,0 +1,74 @@
+# test_reservation_concurrency.py
+from django.test import TransactionTestCase
+from django.db import connection
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationSlot
+from glass_class import booking
+from .test_class_reservation import get_reservation_date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time
+from unittest import mock
+import threading
+
+class ReservationConcurrencyTests(TransactionTestCase):
+    # Bookings must be committed by separate connections, so the test data is not wrapped in a transaction
+    BOOKINGS = 200
+    WORKERS = 32
+
+    def setUp(self):
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.users = User.objects.bulk_create([
+            User(email=f'user{i}@example.com', username=f'user{i}') for i in range(self.BOOKINGS)
+        ])
+        self.reservation_date = get_reservation_date().date()
+
+    def run_bookings(self, users, reservation_time):
+        # Fire all the bookings at once from a thread pool
+        start = threading.Event()
+
+        def book(user):
+            try:
+                start.wait()
+                booking.book_reservation(user, self.glass_class, self.reservation_date, reservation_time)
+                return 'booked'
+            except booking.BookingError as e:
+                return type(e).__name__
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            futures = [executor.submit(book, user) for user in users]
+            start.set()
+            return [future.result() for future in futures]
+
+    def test_concurrent_bookings_have_one_winner(self):
+        results = self.run_bookings(self.users, time(10))
+
+        # Every request is either booked or rejected, never an unhandled error
+        self.assertEqual(len(results), self.BOOKINGS)
+        self.assertTrue(set(results) <= {'booked', 'SlotUnavailable', 'BookingConflict'})
+
+        self.assertEqual(results.count('booked'), 1)
+        self.assertEqual(Reservation.objects.filter(reservation_date=self.reservation_date, reservation_time=time(10)).count(), 1)
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 1)
+
+    def test_concurrent_bookings_respect_capacity(self):
+        ReservationSlot.objects.create(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(12), capacity=5)
+
+        results = self.run_bookings(self.users, time(12))
+
+        self.assertEqual(results.count('booked'), 5)
+        self.assertEqual(Reservation.objects.filter(reservation_date=self.reservation_date, reservation_time=time(12)).count(), 5)
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(12))
+        self.assertEqual(slot.booked, 5)
+
+    def test_failed_invalidation_keeps_the_committed_booking(self):
+        # A cache error after the commit is logged, the booking is not reported as failed or retried
+        with mock.patch.object(booking, 'invalidate_availability', side_effect=ConnectionError('cache is down')) as invalidate, self.assertLogs('django.db.backends.base', level='ERROR'):
+            reservation = booking.book_reservation(self.users[0], self.glass_class, self.reservation_date, time(10))
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertEqual(list(Reservation.objects.values_list('id', flat=True)), [reservation.id])
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 1)
@@ -0,0 +1,102 @@
+# test_reservation_expiry.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationSlot
+from glass_class.expiry import expire_pending_reservations, ExpirySweeper
+from .test_class_reservation import get_reservation_date
+from datetime import time, timedelta
+from io import StringIO
+from unittest import mock
+
+class ReservationExpiryTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+
+    def create_reservation(self, user, reservation_time):
+        self.client.force_authenticate(user=user)
+        data = {
+            'class_id': self.glass_class.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': reservation_time
+        }
+        return self.client.post(self.reservation_url, data, format='json', follow=True)
+
+    def age_reservations(self, hours):
+        Reservation.objects.update(created_at=timezone.now() - timedelta(hours=hours))
+
+    def get_slot(self, reservation_time):
+        return ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=reservation_time)
+
+    def test_stale_pending_reservation_is_expired(self):
+        self.create_reservation(self.user, '10:00:00')
+        self.age_reservations(25)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_pending_reservations(), 1)
+
+        self.assertEqual(Reservation.objects.get().status, 'expired')
+        self.assertEqual(self.get_slot(time(10)).booked, 0)
+
+        # The freed seat can be booked again, also by the same user
+        self.assertEqual(self.create_reservation(self.user1, '10:00:00').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create_reservation(self.user, '12:00:00').status_code, status.HTTP_201_CREATED)
+
+    def test_recent_and_approved_reservations_are_kept(self):
+        self.create_reservation(self.user, '10:00:00')
+        self.create_reservation(self.user1, '12:00:00')
+        Reservation.objects.filter(user=self.user1).update(status='approved', created_at=timezone.now() - timedelta(hours=25))
+
+        self.assertEqual(expire_pending_reservations(), 0)
+        self.assertFalse(Reservation.objects.filter(status='expired').exists())
+        self.assertEqual(self.get_slot(time(10)).booked, 1)
+
+    def test_expiry_is_bounded_per_run(self):
+        Reservation.objects.bulk_create([
+            Reservation(user=self.user, glass_class=self.glass_class, reservation_date=self.reservation_date + timedelta(days=day), reservation_time=time(10), created_at=timezone.now() - timedelta(hours=25))
+            for day in range(5)
+        ])
+
+        self.assertEqual(expire_pending_reservations(batch_size=2, max_batches=2), 4)
+        self.assertEqual(Reservation.objects.filter(status='pending').count(), 1)
+        self.assertEqual(expire_pending_reservations(batch_size=2, max_batches=2), 1)
+
+    def test_expiry_query_uses_status_index(self):
+        plan = Reservation.objects.filter(status='pending', created_at__lt=timezone.now()).order_by('created_at').explain()
+        self.assertIn('reservation_status_created_idx', plan)
+
+    def test_expire_reservations_command(self):
+        self.create_reservation(self.user, '10:00:00')
+
+        out = StringIO()
+        call_command('expire_reservations', '--ttl', '0', stdout=out)
+        self.assertIn('1 pending reservations expired', out.getvalue())
+        self.assertEqual(self.get_slot(time(10)).booked, 0)
+
+    def test_sweeper_runs_periodically(self):
+        self.create_reservation(self.user, '10:00:00')
+        self.age_reservations(25)
+
+        # One tick, then stop
+        sweeper = ExpirySweeper(interval=60)
+        with mock.patch.object(sweeper.stopped, 'wait', side_effect=[False, True]), mock.patch('glass_class.expiry.close_old_connections'):
+            sweeper.run()
+
+        self.assertEqual(Reservation.objects.get().status, 'expired')
@@ -0,0 +1,112 @@
+# test_reservation_live.py
+from rest_framework.test import APITestCase, APIClient
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.db import OperationalError
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation
+from glass_class.routing import websocket_urlpatterns
+from glass_class.live import publish_slot
+from .test_class_reservation import get_reservation_date
+from unittest import mock
+from datetime import time
+
+class ReservationLiveTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+        self.cancel_reservation_url = reverse('glass_class:reservation-cancel-reservation')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+        self.application = URLRouter(websocket_urlpatterns)
+
+    def connect(self, class_id):
+        return WebsocketCommunicator(self.application, f'/ws/glass_class/availability/{class_id}/')
+
+    def create_reservation(self, glass_class):
+        self.client.force_authenticate(user=self.user)
+        data = {
+            'class_id': glass_class.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '10:00:00'
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.reservation_url, data, format='json', follow=True)
+
+    def cancel_reservation(self):
+        reservation = Reservation.objects.get(user=self.user, glass_class=self.glass_class)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation.id}', follow=True)
+
+    def test_receive_availability_and_slot_changes(self):
+        @async_to_sync
+        async def run():
+            communicator = self.connect(self.glass_class.id)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            # The whole calendar is sent on connect
+            message = await communicator.receive_json_from()
+            self.assertEqual(message['type'], 'availability')
+            self.assertEqual(message['availability']['times'], ['10:00:00', '12:00:00', '14:00:00', '16:00:00'])
+
+            # A committed reservation is pushed as a slot change
+            await sync_to_async(self.create_reservation)(self.glass_class)
+            message = await communicator.receive_json_from()
+            self.assertEqual(message, {'type': 'slot', 'slot': {
+                'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+                'reservation_time': '10:00:00',
+                'booked': 1,
+                'capacity': 1,
+                'available': False,
+            }})
+
+            # And so is the cancellation
+            await sync_to_async(self.cancel_reservation)()
+            message = await communicator.receive_json_from()
+            self.assertEqual(message['slot']['booked'], 0)
+            self.assertTrue(message['slot']['available'])
+
+            await communicator.disconnect()
+        run()
+
+    def test_changes_of_other_classes_are_not_sent(self):
+        @async_to_sync
+        async def run():
+            communicator = self.connect(self.glass_class.id)
+            await communicator.connect()
+            await communicator.receive_json_from()
+
+            await sync_to_async(self.create_reservation)(self.other_class)
+            self.assertTrue(await communicator.receive_nothing())
+
+            await communicator.disconnect()
+        run()
+
+    def test_unknown_class_is_rejected(self):
+        @async_to_sync
+        async def run():
+            communicator = self.connect(1000)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4404)
+        run()
+
+    def test_failed_publish_does_not_raise(self):
+        # The slot read after the commit hits a locked database, the booking already committed must not be retried
+        with mock.patch('glass_class.live.ReservationSlot.objects.filter', side_effect=OperationalError('database table is locked')), self.assertLogs('glass_class.live', level='ERROR'):
+            publish_slot(self.glass_class.id, self.reservation_date, time(10))
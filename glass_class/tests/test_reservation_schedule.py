@@ -0,0 +1,126 @@
+# test_reservation_schedule.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ClassTimeSlot, ClassClosure
+from glass_class import schedule
+from glass_class.schedule import get_window
+from glass_class.views.class_reservation import DateConfig
+from .test_class_reservation import get_reservation_date
+from datetime import date, time
+from unittest import mock
+import calendar
+
+class ReservationScheduleTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+        self.user2 = User.objects.create_user(email='example2@example.com', username='testuser2', password='testpassword2')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+        self.get_disabled_dates_url = reverse('glass_class:reservation-get-disabled-dates')
+        self.get_disabled_timezones_url = reverse('glass_class:reservation-get-disabled-timezones')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+
+    def create_reservation(self, user, reservation_time, glass_class=None):
+        self.client.force_authenticate(user=user)
+        data = {
+            'class_id': (glass_class or self.glass_class).id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': reservation_time
+        }
+        return self.client.post(self.reservation_url, data, format='json', follow=True)
+
+    def test_window_is_as_long_as_the_month(self):
+        for start_date in [date(2024, 1, 15), date(2024, 2, 15), date(2023, 2, 15), date(2024, 4, 15)]:
+            _, end_date = get_window(start_date)
+            self.assertEqual((end_date - start_date).days, calendar.monthrange(start_date.year, start_date.month)[1])
+
+    def test_default_schedule(self):
+        date_config = DateConfig(self.glass_class.id)
+        self.assertEqual(date_config.vaild_times, ['10:00:00', '12:00:00', '14:00:00', '16:00:00'])
+
+        # Mondays are closed by default
+        for closed_date in date_config.schedule.get_closed_dates():
+            self.assertEqual(closed_date.weekday(), 0)
+        self.assertTrue(date_config.is_available_time(self.reservation_date, '10:00:00'))
+        self.assertEqual(date_config.get_capacity(self.reservation_date, '10:00:00'), 1)
+
+    def test_schedule_is_memoized(self):
+        DateConfig(self.glass_class.id)
+
+        with self.assertNumQueries(0):
+            DateConfig(self.glass_class.id)
+
+    def test_schedule_is_compiled_again_after_the_timeout(self):
+        self.assertTrue(DateConfig(self.glass_class.id).is_available_date(self.reservation_date))
+
+        # A closure added by another process, whose version bump did not reach this one
+        ClassClosure.objects.bulk_create([ClassClosure(closed_date=self.reservation_date)])
+        self.assertTrue(DateConfig(self.glass_class.id).is_available_date(self.reservation_date))
+
+        with mock.patch.object(schedule, 'SCHEDULE_MEMO_TIMEOUT', 0):
+            self.assertFalse(DateConfig(self.glass_class.id).is_available_date(self.reservation_date))
+
+    def test_class_time_slots_and_capacity(self):
+        ClassTimeSlot.objects.create(glass_class=self.glass_class, weekday=self.reservation_date.weekday(), start_time=time(11), capacity=2)
+
+        # Only the configured time is open for the class
+        date_config = DateConfig(self.glass_class.id)
+        self.assertEqual(date_config.vaild_times, ['11:00:00'])
+        self.assertFalse(date_config.is_available_time(self.reservation_date, '10:00:00'))
+
+        # Other classes keep the default schedule
+        self.assertTrue(DateConfig(self.other_class.id).is_available_time(self.reservation_date, '10:00:00'))
+
+        response = self.create_reservation(self.user, '10:00:00')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Two seats can be booked
+        self.assertEqual(self.create_reservation(self.user, '11:00:00').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create_reservation(self.user1, '11:00:00').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create_reservation(self.user2, '11:00:00').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+        response = self.client.get(self.get_disabled_dates_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertIn(self.reservation_date, response.data)
+
+    def test_holiday_closes_every_class(self):
+        ClassClosure.objects.create(closed_date=self.reservation_date, reason='Holiday')
+
+        response = self.create_reservation(self.user, '10:00:00')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.create_reservation(self.user, '10:00:00', glass_class=self.other_class)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.get_disabled_dates_url, {'class_id': self.glass_class.id}, follow=True)
+        self.assertIn(self.reservation_date, response.data)
+
+        response = self.client.get(self.get_disabled_timezones_url, {'class_id': self.glass_class.id, 'selected_date': self.reservation_date.strftime('%Y-%m-%d')}, follow=True)
+        self.assertEqual(sorted(response.data), ['10:00:00', '12:00:00', '14:00:00', '16:00:00'])
+
+    def test_class_closure_only_closes_the_class(self):
+        ClassClosure.objects.create(glass_class=self.glass_class, closed_date=self.reservation_date)
+
+        self.assertEqual(self.create_reservation(self.user, '10:00:00').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.create_reservation(self.user, '10:00:00', glass_class=self.other_class).status_code, status.HTTP_201_CREATED)
+
+    def test_closure_removed(self):
+        closure = ClassClosure.objects.create(closed_date=self.reservation_date)
+        self.assertFalse(DateConfig(self.glass_class.id).is_available_date(self.reservation_date))
+
+        closure.delete()
+        self.assertTrue(DateConfig(self.glass_class.id).is_available_date(self.reservation_date))
@@ -0,0 +1,200 @@
+# test_reservation_slot.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationSlot
+from glass_class.slots import get_slot
+from glass_class.approval import change_reservations_status
+from .test_class_reservation import get_reservation_date
+from datetime import time, timedelta
+from io import StringIO
+
+class ReservationSlotTests(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        # Create users
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpassword')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+        self.update_reservation_url = reverse('glass_class:reservation-update-reservation')
+        self.cancel_reservation_url = reverse('glass_class:reservation-cancel-reservation')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+        self.other_class = GlassClass.objects.create(title='Other Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_2', image_alt='image 2', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+
+    def create_reservation(self, user, reservation_time, glass_class=None):
+        self.client.force_authenticate(user=user)
+        data = {
+            'class_id': (glass_class or self.glass_class).id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': reservation_time
+        }
+        return self.client.post(self.reservation_url, data, format='json', follow=True)
+
+    def test_create_reservation_books_slot(self):
+        response = self.create_reservation(self.user, '10:00:00')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 1)
+        self.assertTrue(slot.is_full())
+
+    def test_create_reservation_full_slot(self):
+        self.create_reservation(self.user, '10:00:00')
+
+        response = self.create_reservation(self.user1, '10:00:00')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_slot_is_scoped_by_class(self):
+        self.create_reservation(self.user, '10:00:00')
+
+        response = self.create_reservation(self.user1, '10:00:00', glass_class=self.other_class)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_slot_built_from_existing_reservations(self):
+        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=self.reservation_date, reservation_time='12:00:00', created_at=timezone.now())
+
+        slot = get_slot(self.glass_class, self.reservation_date, '12:00:00')
+        self.assertEqual(slot.booked, 1)
+
+        response = self.create_reservation(self.user1, '12:00:00')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_reservation_moves_slot(self):
+        self.create_reservation(self.user, '10:00:00')
+        reservation = Reservation.objects.get(user=self.user)
+
+        data = {
+            'reservation_id': reservation.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '14:00:00'
+        }
+        response = self.client.post(self.update_reservation_url, data, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.reservation_time, time(14))
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(10)).booked, 0)
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(14)).booked, 1)
+
+    def test_update_reservation_full_slot(self):
+        self.create_reservation(self.user, '10:00:00')
+        self.create_reservation(self.user1, '14:00:00')
+        reservation = Reservation.objects.get(user=self.user)
+
+        self.client.force_authenticate(user=self.user)
+        data = {
+            'reservation_id': reservation.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '14:00:00'
+        }
+        response = self.client.post(self.update_reservation_url, data, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(10)).booked, 1)
+
+    def test_update_rejected_reservation(self):
+        self.create_reservation(self.user, '10:00:00')
+        reservation = Reservation.objects.get(user=self.user)
+        change_reservations_status([reservation.id], 'rejected')
+
+        # The freed seat goes to another user
+        response = self.create_reservation(self.user1, '10:00:00')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=self.user)
+        data = {
+            'reservation_id': reservation.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '12:00:00'
+        }
+        response = self.client.post(self.update_reservation_url, data, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(10)).booked, 1)
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(12)).booked, 0)
+
+    def test_update_reservation_onto_own_date(self):
+        self.create_reservation(self.user, '10:00:00')
+        # Another open date, Mondays are closed
+        next_date = self.reservation_date + timedelta(days=1)
+        if next_date.weekday() == 0:
+            next_date += timedelta(days=1)
+        self.client.post(self.reservation_url, {'class_id': self.glass_class.id, 'reservation_date': next_date.strftime('%Y-%m-%d'), 'reservation_time': '12:00:00'}, format='json', follow=True)
+        reservation = Reservation.objects.get(user=self.user, reservation_date=next_date)
+
+        data = {
+            'reservation_id': reservation.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '14:00:00'
+        }
+        response = self.client.post(self.update_reservation_url, data, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'You have already made a reservation for this class')
+        self.assertEqual(Reservation.objects.filter(user=self.user, reservation_date=self.reservation_date).count(), 1)
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(14)).booked, 0)
+        self.assertEqual(get_slot(self.glass_class, next_date, time(12)).booked, 1)
+
+    def test_update_reservation_not_owner(self):
+        self.create_reservation(self.user, '10:00:00')
+        reservation = Reservation.objects.get(user=self.user)
+
+        self.client.force_authenticate(user=self.user1)
+        data = {
+            'reservation_id': reservation.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '14:00:00'
+        }
+        response = self.client.post(self.update_reservation_url, data, format='json', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cancel_reservation_frees_slot(self):
+        self.create_reservation(self.user, '10:00:00')
+        reservation = Reservation.objects.get(user=self.user)
+
+        response = self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(get_slot(self.glass_class, self.reservation_date, time(10)).booked, 0)
+
+        # The freed slot can be booked again
+        response = self.create_reservation(self.user1, '10:00:00')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_cancel_reservation_not_owner(self):
+        self.create_reservation(self.user, '10:00:00')
+        reservation = Reservation.objects.get(user=self.user)
+
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_backfill_reservation_slots(self):
+        Reservation.objects.create(glass_class=self.glass_class, user=self.user, reservation_date=self.reservation_date, reservation_time='10:00:00', created_at=timezone.now())
+        Reservation.objects.create(glass_class=self.other_class, user=self.user, reservation_date=self.reservation_date, reservation_time='10:00:00', created_at=timezone.now())
+        Reservation.objects.create(glass_class=self.glass_class, user=self.user1, reservation_date=self.reservation_date, reservation_time='12:00:00', created_at=timezone.now(), status='rejected')
+
+        # Drifted slot is reset by the backfill
+        ReservationSlot.objects.create(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time='12:00:00', booked=1)
+
+        out = StringIO()
+        call_command('backfill_reservation_slots', stdout=out)
+        self.assertIn('2 reservation slots rebuilt', out.getvalue())
+
+        self.assertEqual(ReservationSlot.objects.get(glass_class=self.glass_class, reservation_time=time(10)).booked, 1)
+        self.assertEqual(ReservationSlot.objects.get(glass_class=self.other_class, reservation_time=time(10)).booked, 1)
+        self.assertEqual(ReservationSlot.objects.get(glass_class=self.glass_class, reservation_time=time(12)).booked, 0)
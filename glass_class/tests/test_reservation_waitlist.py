@@ -0,0 +1,137 @@
+# test_reservation_waitlist.py
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from glass_class.models import GlassClass, Reservation, ReservationSlot, WaitlistEntry
+from glass_class.signals import waitlist_promoted
+from glass_class.waitlist import get_next_entry
+from .test_class_reservation import get_reservation_date
+from datetime import time
+
+class ReservationWaitlistTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(email='example@example.com', username='testuser', password='testpassword')
+        self.user1 = User.objects.create_user(email='example1@example.com', username='testuser1', password='testpassword1')
+        self.user2 = User.objects.create_user(email='example2@example.com', username='testuser2', password='testpassword2')
+
+        # URL for the reservation APIs
+        self.reservation_url = reverse('glass_class:reservation-create-reservation')
+        self.cancel_reservation_url = reverse('glass_class:reservation-cancel-reservation')
+        self.join_waitlist_url = reverse('glass_class:reservation-join-waitlist')
+        self.leave_waitlist_url = reverse('glass_class:reservation-leave-waitlist')
+
+        # Create GlassClass data
+        self.glass_class = GlassClass.objects.create(title='Test Class', description='Test Description', short_description='Test Short Description', duration=60, price=100, category='Test Category', image_url='https://example.com/image_1', image_alt='image 1', created_at=timezone.now(), modified_at=timezone.now())
+
+        self.reservation_date = get_reservation_date().date()
+        self.data = {
+            'class_id': self.glass_class.id,
+            'reservation_date': self.reservation_date.strftime('%Y-%m-%d'),
+            'reservation_time': '10:00:00'
+        }
+
+    def create_reservation(self, user):
+        self.client.force_authenticate(user=user)
+        self.client.post(self.reservation_url, self.data, format='json', follow=True)
+        return Reservation.objects.get(user=user)
+
+    def join_waitlist(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(self.join_waitlist_url, self.data, format='json', follow=True)
+
+    def cancel_reservation(self, user, reservation):
+        self.client.force_authenticate(user=user)
+        return self.client.delete(self.cancel_reservation_url, QUERY_STRING=f'reservation_id={reservation.id}', follow=True)
+
+    def test_join_waitlist_of_full_slot(self):
+        self.create_reservation(self.user)
+
+        response = self.join_waitlist(self.user1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.join_waitlist(self.user2).status_code, status.HTTP_201_CREATED)
+
+        entries = WaitlistEntry.objects.order_by('position')
+        self.assertEqual([entry.user for entry in entries], [self.user1, self.user2])
+        self.assertEqual([entry.position for entry in entries], [1, 2])
+
+    def test_join_waitlist_of_open_slot(self):
+        response = self.join_waitlist(self.user)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_join_waitlist_twice(self):
+        self.create_reservation(self.user)
+        self.join_waitlist(self.user1)
+
+        self.assertEqual(self.join_waitlist(self.user1).status_code, status.HTTP_400_BAD_REQUEST)
+        # The user who already booked the date can not wait for it
+        self.assertEqual(self.join_waitlist(self.user).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+    def test_cancel_promotes_next_waiter(self):
+        reservation = self.create_reservation(self.user)
+        self.join_waitlist(self.user1)
+        self.join_waitlist(self.user2)
+
+        events = []
+        def receive_event(sender, **kwargs):
+            events.append(kwargs)
+        waitlist_promoted.connect(receive_event)
+        self.addCleanup(waitlist_promoted.disconnect, receive_event)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.cancel_reservation(self.user, reservation)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The first waiter gets the seat, the second one keeps waiting
+        promoted = Reservation.objects.get()
+        self.assertEqual(promoted.user, self.user1)
+        self.assertEqual(promoted.reservation_time, time(10))
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user', flat=True)), [self.user2.id])
+        slot = ReservationSlot.objects.get(glass_class=self.glass_class, reservation_date=self.reservation_date, reservation_time=time(10))
+        self.assertEqual(slot.booked, 1)
+        self.assertEqual(events, [{'signal': waitlist_promoted, 'user_id': self.user1.id, 'reservation_id': promoted.id}])
+
+        # The next cancel promotes the second waiter
+        self.cancel_reservation(self.user1, promoted)
+        self.assertEqual(Reservation.objects.get().user, self.user2)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_leave_waitlist(self):
+        reservation = self.create_reservation(self.user)
+        self.join_waitlist(self.user1)
+        entry = WaitlistEntry.objects.get()
+
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.delete(self.leave_waitlist_url, QUERY_STRING=f'waitlist_id={entry.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.delete(self.leave_waitlist_url, QUERY_STRING=f'waitlist_id={entry.id}', follow=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Nobody is promoted
+        self.cancel_reservation(self.user, reservation)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_next_waiter_uses_position_index(self):
+        plan = WaitlistEntry.objects.filter(
+            glass_class=self.glass_class,
+            reservation_date=self.reservation_date,
+            reservation_time=time(10)
+        ).order_by('position')[:1].explain()
+        # Read from the unique (class, date, time, position) index without sorting the queue
+        self.assertIn('USING INDEX', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+        self.create_reservation(self.user)
+        self.join_waitlist(self.user1)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_next_entry(self.glass_class.id, self.reservation_date, time(10)).user_id, self.user1.id)
@@ -2,46 +2,57 @@ from rest_framework.response import Response
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.db import transaction
+from rest_framework.pagination import PageNumberPagination
+from django.db.models import Sum
+from django.http import StreamingHttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from glass_class.models import GlassClass, Reservation
-from glass_class.serializers import ReservationSerializer
-from accounts.models import User
+from glass_class.models import GlassClass, Reservation, WaitlistEntry
+from glass_class.serializers import ReservationSerializer, ReservationHistorySerializer
+from glass_class.slots import is_slot_available
+from glass_class import booking
+from glass_class.availability import get_availability
+from glass_class.approval import change_reservations_status, STATUS_TRANSITIONS
+from glass_class.schedule import get_schedule, get_window
+from glass_class.ics import get_etag, stream_calendar
+from glass_class.archive import get_reservation_history
 from datetime import datetime, timedelta
 from collections import Counter
 
+MAX_BATCH_RESERVATIONS = 20
+MAX_STATUS_UPDATE_RESERVATIONS = 10000
+
 class DateConfig:
-    def __init__(self):
+    # Reservation window and opening hours of a class, backed by the compiled schedule
+    def __init__(self, class_id=None):
         self.start_date = datetime.now() + timedelta(hours=9)
-        self.end_30 = [4, 6, 9, 11]
-        self.end_31 = [1, 3, 5, 7, 8, 10, 12]
-        if self.start_date.month in self.end_30:
-            self.end_date = self.start_date + timedelta(days=30)
-        elif self.start_date.month in self.end_31:
-            self.end_date = self.start_date + timedelta(days=31)
-        else:
-            year = self.start_date.year
-            if year % 4 == 0 and year % 100 != 0 or year % 400 == 0:
-                self.end_date = self.start_date + timedelta(days=29)
-            else:
-                self.end_date = self.start_date + timedelta(days=28)
-        self.vaild_times = ['10:00:00', '12:00:00', '14:00:00', '16:00:00']
-
-    def get_disabled_dates(self, reservations):
-        reservation_dates = [reservation.reservation_date for reservation in reservations]
-        reservation_count = Counter(reservation_dates)
-
-        disabled_dates = [date for date, count in reservation_count.items() if count == 4]
-
-        # Add dates that are Mondey
-        current_date = self.start_date
-        while current_date <= self.end_date:
-            if current_date.weekday() == 0:
-                disabled_dates.append(current_date)
-            current_date += timedelta(days=1)
-
-        return disabled_dates
+        _, self.end_date = get_window(self.start_date)
+        self.schedule = get_schedule(class_id, self.start_date.date())
+        self.vaild_times = self.schedule.times
+
+    def get_disabled_dates(self, booked_slots):
+        # Closed dates and dates whose open times are all fully booked
+        # booked_slots: (date, 'HH:MM:SS', booked count)
+        full_times = Counter(
+            date for date, time, booked in booked_slots
+            if booked >= self.schedule.get_capacity(date, time) > 0
+        )
+        disabled_dates = [date for date, count in full_times.items() if count >= len(self.schedule.get_times(date))]
+        disabled_dates += self.schedule.get_closed_dates()
+
+        return sorted(disabled_dates)
+
+    def is_available_date(self, date):
+        # Check if the date is in the reservation window and the class opens on that date
+        if date < self.start_date.date() or date > self.end_date.date():
+            return False
+        return self.schedule.is_open_date(date)
+
+    def is_available_time(self, date, time):
+        # Check if the class opens at the time('HH:MM:SS') on that date
+        return self.is_available_date(date) and self.schedule.is_open(date, time)
+
+    def get_capacity(self, date, time):
+        return self.schedule.get_capacity(date, time)
 
     def get_end_date(self):
         return self.end_date
@@ -49,15 +60,33 @@ class DateConfig:
     def get_start_date(self):
         return self.start_date
 
+# Pagination Config
+class HistoryPaginationConfig(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
 class ClassReservationViewSets(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_reservation = ReservationSerializer
+    serializer_history = ReservationHistorySerializer
+    history_pagination = HistoryPaginationConfig
+
+    def get_glass_class(self, request):
+        # Class of the class_id query parameter, returns (glass_class, error response)
+        class_id = request.query_params.get('class_id', None)
+        if not class_id:
+            return None, Response({'error': 'class_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            class_id = int(class_id)
+        except ValueError:
+            return None, Response({'error': 'class_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return get_object_or_404(GlassClass, pk=class_id), None
 
     '''
     로그인 기능 추가 후 수정 필요
     '''
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
-    #@transaction.atomic
     def create_reservation(self, request, *args, **kwargs):
         # Create a reservation
         
@@ -71,39 +100,272 @@ class ClassReservationViewSets(viewsets.ModelViewSet):
         if not reservation_time:
             return Response({'error': 'reservation_time is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        date_config = DateConfig()
-        disabled_dates = date_config.get_disabled_dates(Reservation.objects.all())
-        valid_times = date_config.vaild_times
-        disabled_times = [reservation.reservation_time for reservation in Reservation.objects.filter(reservation_date=reservation_date)]
-        
-        if reservation_date in disabled_dates or reservation_date < date_config.get_start_date().strftime('%Y-%m-%d') or reservation_date > date_config.get_end_date().strftime('%Y-%m-%d'):
+        glass_class = get_object_or_404(GlassClass, pk=class_id)
+
+        date_config = DateConfig(glass_class.id)
+        try:
+            reservation_date = datetime.strptime(reservation_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not date_config.is_available_date(reservation_date):
             return Response({'error': 'This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
-        if reservation_time not in valid_times or reservation_time in disabled_times:
+        if not date_config.is_available_time(reservation_date, reservation_time):
             return Response({'error': 'This time is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+        capacity = date_config.get_capacity(reservation_date, reservation_time)
+        reservation_time = datetime.strptime(reservation_time, '%H:%M:%S').time()
 
-        glass_class = get_object_or_404(GlassClass, pk=class_id)
-        reservation_date = datetime.strptime(reservation_date, '%Y-%m-%d')
+        # Check the availability from the slot inventory
+        if not is_slot_available(glass_class, reservation_date, reservation_time, capacity):
+            return Response({'error': 'This time is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if the user has already made a reservation
+        # Book the slot and create the reservation in one transaction
         # 유저별로 예약을 관리하는 모델이 필요...
-        if Reservation.objects.filter(glass_class=glass_class, user=request.user, reservation_date=reservation_date).exists():
-            return Response({'error': 'You have already made a reservation for this class'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            booking.book_reservation(request.user, glass_class, reservation_date, reservation_time, capacity)
+        except booking.BookingConflict as e:
+            return Response({'error': e.message}, status=status.HTTP_409_CONFLICT)
+        except booking.BookingError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
 
-        Reservation.objects.create(user=request.user, glass_class=glass_class, reservation_date=reservation_date, reservation_time=reservation_time, created_at=timezone.now())
         return Response({'message': 'Reservation created successfully'}, status=status.HTTP_201_CREATED)
-    
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def create_reservations(self, request, *args, **kwargs):
+        # Create several reservations at once, either all of them are created or none
+        # reservations: [{class_id, reservation_date, reservation_time, seats}]
+
+        reservations = request.data.get('reservations', None)
+        if not reservations or not isinstance(reservations, list):
+            return Response({'error': 'reservations is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(reservations) > MAX_BATCH_RESERVATIONS:
+            return Response({'error': f'Up to {MAX_BATCH_RESERVATIONS} reservations can be made at once'}, status=status.HTTP_400_BAD_REQUEST)
+
+        for index, reservation in enumerate(reservations):
+            if not isinstance(reservation, dict):
+                return Response({'error': f'reservations[{index}] must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+            for field in ['class_id', 'reservation_date', 'reservation_time']:
+                if not reservation.get(field, None):
+                    return Response({'error': f'reservations[{index}]: {field} is required'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                reservation['class_id'] = int(reservation['class_id'])
+            except (TypeError, ValueError):
+                return Response({'error': f'reservations[{index}]: class not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        glass_classes = GlassClass.objects.in_bulk({reservation['class_id'] for reservation in reservations})
+        date_configs = {}
+
+        items = []
+        for index, reservation in enumerate(reservations):
+            glass_class = glass_classes.get(reservation['class_id'], None)
+            if glass_class is None:
+                return Response({'error': f'reservations[{index}]: class not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            try:
+                seats = int(reservation.get('seats', 1))
+            except (TypeError, ValueError):
+                seats = 0
+            if seats < 1:
+                return Response({'error': f'reservations[{index}]: seats must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if glass_class.id not in date_configs:
+                date_configs[glass_class.id] = DateConfig(glass_class.id)
+            date_config = date_configs[glass_class.id]
+
+            reservation_time = reservation['reservation_time']
+            try:
+                reservation_date = datetime.strptime(reservation['reservation_date'], '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                return Response({'error': f'reservations[{index}]: This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+            if not date_config.is_available_date(reservation_date):
+                return Response({'error': f'reservations[{index}]: This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+            if not date_config.is_available_time(reservation_date, reservation_time):
+                return Response({'error': f'reservations[{index}]: This time is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+
+            items.append({
+                'glass_class': glass_class,
+                'reservation_date': reservation_date,
+                'reservation_time': datetime.strptime(reservation_time, '%H:%M:%S').time(),
+                'seats': seats,
+                'capacity': date_config.get_capacity(reservation_date, reservation_time),
+            })
+
+        # Check the seats of every slot and insert the reservations in one transaction
+        try:
+            created = booking.book_reservations(request.user, items)
+        except booking.BookingConflict as e:
+            return Response({'error': e.message}, status=status.HTTP_409_CONFLICT)
+        except booking.BookingError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': 'Reservations created successfully',
+            'reservation_ids': [reservation.id for reservation in created]
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def update_reservation(self, request, *args, **kwargs):
+        # Change the date and time of a reservation
+
+        reservation_id = request.data.get('reservation_id', None)
+        reservation_date = request.data.get('reservation_date', None)
+        reservation_time = request.data.get('reservation_time', None)
+        if not reservation_id:
+            return Response({'error': 'reservation_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not reservation_date:
+            return Response({'error': 'reservation_date is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not reservation_time:
+            return Response({'error': 'reservation_time is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        reservation = get_object_or_404(Reservation, pk=reservation_id)
+        if request.user != reservation.user:
+            return Response({'error': 'You are not the owner of this reservation'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        glass_class = reservation.glass_class
+        date_config = DateConfig(glass_class.id)
+        try:
+            reservation_date = datetime.strptime(reservation_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not date_config.is_available_date(reservation_date):
+            return Response({'error': 'This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+        if not date_config.is_available_time(reservation_date, reservation_time):
+            return Response({'error': 'This time is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+        capacity = date_config.get_capacity(reservation_date, reservation_time)
+
+        new_time = datetime.strptime(reservation_time, '%H:%M:%S').time()
+        if reservation.reservation_date == reservation_date and reservation.reservation_time == new_time:
+            return Response({'message': 'Reservation updated successfully'}, status=status.HTTP_200_OK)
+
+        if not is_slot_available(glass_class, reservation_date, new_time, capacity):
+            return Response({'error': 'This time is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Move the seat from the previous slot to the new slot
+        try:
+            booking.move_reservation(reservation, reservation_date, new_time, capacity)
+        except booking.BookingConflict as e:
+            return Response({'error': e.message}, status=status.HTTP_409_CONFLICT)
+        except booking.BookingError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'message': 'Reservation updated successfully'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['delete'], permission_classes=[IsAuthenticated])
+    def cancel_reservation(self, request, *args, **kwargs):
+        # Cancel a reservation
+
+        reservation_id = request.query_params.get('reservation_id', None)
+        if not reservation_id:
+            return Response({'error': 'reservation_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        reservation = get_object_or_404(Reservation, pk=reservation_id)
+        if request.user != reservation.user and not request.user.is_superuser:
+            return Response({'error': 'You are not the owner of this reservation'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            booking.cancel_reservation(reservation)
+        except booking.BookingConflict as e:
+            return Response({'error': e.message}, status=status.HTTP_409_CONFLICT)
+
+        return Response({'message': 'Reservation cancelled successfully'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def join_waitlist(self, request, *args, **kwargs):
+        # Wait for a seat of a fully booked time, the reservation is created when a seat is freed
+
+        class_id = request.data.get('class_id', None)
+        reservation_date = request.data.get('reservation_date', None)
+        reservation_time = request.data.get('reservation_time', None)
+        if not class_id:
+            return Response({'error': 'class_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not reservation_date:
+            return Response({'error': 'reservation_date is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not reservation_time:
+            return Response({'error': 'reservation_time is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            seats = int(request.data.get('seats', 1))
+        except (TypeError, ValueError):
+            seats = 0
+        if seats < 1:
+            return Response({'error': 'seats must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        glass_class = get_object_or_404(GlassClass, pk=class_id)
+
+        date_config = DateConfig(glass_class.id)
+        try:
+            reservation_date = datetime.strptime(reservation_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'This date is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not date_config.is_available_time(reservation_date, reservation_time):
+            return Response({'error': 'This time is not available for reservation'}, status=status.HTTP_400_BAD_REQUEST)
+        capacity = date_config.get_capacity(reservation_date, reservation_time)
+        reservation_time = datetime.strptime(reservation_time, '%H:%M:%S').time()
+
+        try:
+            entry = booking.join_waitlist(request.user, glass_class, reservation_date, reservation_time, capacity, seats)
+        except booking.BookingConflict as e:
+            return Response({'error': e.message}, status=status.HTTP_409_CONFLICT)
+        except booking.BookingError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'message': 'Added to the waitlist successfully', 'waitlist_id': entry.id}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['delete'], permission_classes=[IsAuthenticated])
+    def leave_waitlist(self, request, *args, **kwargs):
+        # Leave the waitlist
+
+        waitlist_id = request.query_params.get('waitlist_id', None)
+        if not waitlist_id:
+            return Response({'error': 'waitlist_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        entry = get_object_or_404(WaitlistEntry, pk=waitlist_id)
+        if request.user != entry.user and not request.user.is_superuser:
+            return Response({'error': 'You are not the owner of this waitlist entry'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        entry.delete()
+        return Response({'message': 'Removed from the waitlist successfully'}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def update_reservations_status(self, request, *args, **kwargs):
+        # Approve or reject reservations in bulk
+
+        # Only admin can change the status of reservations
+        if not request.user.is_superuser:
+            return Response({'error': 'You are not allowed to change the status of reservations'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        reservation_ids = request.data.get('reservation_ids', None)
+        new_status = request.data.get('status', None)
+        if not reservation_ids or not isinstance(reservation_ids, list):
+            return Response({'error': 'reservation_ids is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(reservation_ids) > MAX_STATUS_UPDATE_RESERVATIONS:
+            return Response({'error': f'Up to {MAX_STATUS_UPDATE_RESERVATIONS} reservations can be updated at once'}, status=status.HTTP_400_BAD_REQUEST)
+        if new_status not in STATUS_TRANSITIONS:
+            return Response({'error': f'status must be one of {", ".join(STATUS_TRANSITIONS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            reservation_ids = [int(reservation_id) for reservation_id in reservation_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'reservation_ids must be a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = change_reservations_status(reservation_ids, new_status)
+
+        return Response({
+            'message': 'Reservations updated successfully',
+            'updated': updated,
+            'skipped': sorted(set(reservation_ids) - set(updated))
+        }, status=status.HTTP_200_OK)
+
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def list_reservations(self, request):
         # List all reservations for a specific class
 
-        class_id = request.query_params.get('class_id', None)
-        if not class_id:
-            return Response({'error': 'class_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        glass_class = GlassClass.objects.get(id=class_id)
-        
-        date_config = DateConfig()
+        glass_class, error = self.get_glass_class(request)
+        if error:
+            return error
+
+        date_config = DateConfig(glass_class.id)
         start_date = date_config.get_start_date()
         end_date = date_config.get_end_date()
 
@@ -114,38 +376,120 @@ class ClassReservationViewSets(viewsets.ModelViewSet):
         serializer = self.serializer_reservation(reservations, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def list_reservation_history(self, request):
+        # List every reservation of the user including the archived ones, newest first
+
+        history = get_reservation_history(request.user)
+
+        paginator = self.history_pagination()
+        page = paginator.paginate_queryset(history, request, view=self)
+        serializer = self.serializer_history(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def get_calendar(self, request):
+        # Export the reservations of the user as an iCalendar feed
+        # class_id가 있으면 해당 클래스의 예약만, 관리자는 해당 클래스의 모든 예약을 내려받는다.
+
+        class_id = request.query_params.get('class_id', None)
+        reservations = Reservation.objects.filter(status__in=Reservation.ACTIVE_STATUSES)
+        name = 'Muserium reservations'
+        if class_id:
+            glass_class = get_object_or_404(GlassClass, pk=class_id)
+            reservations = reservations.filter(glass_class=glass_class)
+            name = glass_class.title
+        if not (class_id and request.user.is_superuser):
+            reservations = reservations.filter(user=request.user)
+
+        etag = get_etag(reservations, request.user.id, class_id)
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        response = StreamingHttpResponse(stream_calendar(reservations, name), content_type='text/calendar; charset=utf-8')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        response['Content-Disposition'] = 'inline; filename="reservations.ics"'
+        return response
+
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def get_disabled_dates(self, request):
-        # Get disabled dates for all reservations
-        
-        date_config = DateConfig()
+        # Get disabled dates of a class
+
+        glass_class, error = self.get_glass_class(request)
+        if error:
+            return error
+
+        date_config = DateConfig(glass_class.id)
         start_date = date_config.get_start_date()
         end_date = date_config.get_end_date()
 
-        reservations = Reservation.objects.filter(
-            reservation_date__range=[start_date, end_date]
-        )
+        # Looked up through the (glass_class, reservation_date, reservation_time) index
+        booked_slots = Reservation.objects.filter(
+            glass_class=glass_class,
+            reservation_date__range=[start_date, end_date],
+            status__in=Reservation.ACTIVE_STATUSES
+        ).values('reservation_date', 'reservation_time').annotate(booked=Sum('seats')).order_by()
 
-        disabled_dates = date_config.get_disabled_dates(reservations)
+        disabled_dates = date_config.get_disabled_dates(
+            (slot['reservation_date'], slot['reservation_time'].strftime('%H:%M:%S'), slot['booked']) for slot in booked_slots
+        )
 
         return Response(disabled_dates, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def get_disabled_timezones(self, request):
-        # Get disabled timezones for all reservations
+        # Get disabled timezones of a class on the selected date
 
+        glass_class, error = self.get_glass_class(request)
+        if error:
+            return error
         selected_date = request.query_params.get('selected_date', None)
         if not selected_date:
             return Response({'error': 'selected_date is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        date_config = DateConfig()
+        try:
+            selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'selected_date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+        date_config = DateConfig(glass_class.id)
         now = date_config.get_start_date()
         vaild_times = date_config.vaild_times
         threshold_time = now + timedelta(hours=1, minutes=30)
-        
-        disabled_timezones = [reservation.reservation_time for reservation in Reservation.objects.filter(reservation_date=selected_date)]
+
+        booked_slots = Reservation.objects.filter(
+            glass_class=glass_class,
+            reservation_date=selected_date,
+            status__in=Reservation.ACTIVE_STATUSES
+        ).values('reservation_time').annotate(booked=Sum('seats')).order_by()
+        disabled_timezones = [
+            slot['reservation_time'].strftime('%H:%M:%S') for slot in booked_slots
+            if slot['booked'] >= date_config.get_capacity(selected_date, slot['reservation_time'].strftime('%H:%M:%S'))
+        ]
+
         for time in vaild_times:
-            if threshold_time.strftime('%H:%M:%S') > time and time not in disabled_timezones:
+            if time in disabled_timezones:
+                continue
+            # Times the class does not open on that date
+            if not date_config.is_available_time(selected_date, time):
+                disabled_timezones.append(time)
+            # Times that start too soon can not be booked today
+            elif selected_date == now.date() and threshold_time > datetime.combine(now.date(), datetime.strptime(time, '%H:%M:%S').time()):
                 disabled_timezones.append(time)
         
-        return Response(disabled_timezones, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(disabled_timezones, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def get_monthly_availability(self, request):
+        # Get the availability of every date and time in the reservation window at once
+        # bitmap[n]의 i번째 비트가 1이면 start_date + n일의 times[i] 시간대가 예약 가능
+
+        glass_class, error = self.get_glass_class(request)
+        if error:
+            return error
+
+        availability = get_availability(glass_class, DateConfig(glass_class.id))
+        return Response(availability, status=status.HTTP_200_OK)
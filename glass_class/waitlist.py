@@ -0,0 +1,59 @@
+'''
+Reservation waitlist
+
+정원이 찬 슬롯에는 대기 신청(WaitlistEntry)을 받는다. 대기 순번(position)은 슬롯 행을 잠근 상태에서
+ReservationSlot.waitlist_tail을 1씩 올려 부여하고, (class, date, time, position) 유니크 인덱스 덕분에
+다음 대기자는 대기열 전체를 읽지 않고 인덱스의 첫 행만 읽어 찾는다.
+예약이 취소되어 좌석이 생기면 같은 트랜잭션 안에서 앞 순번부터 예약으로 승격한다.
+'''
+from django.db import transaction
+from django.utils import timezone
+from glass_class.models import Reservation, ReservationSlot, WaitlistEntry
+from glass_class.slots import take_seats
+from glass_class.availability import invalidate_availability
+from glass_class.signals import waitlist_promoted
+
+def get_next_entry(class_id, reservation_date, reservation_time):
+    # Head of the queue, read through the position index
+    return WaitlistEntry.objects.filter(
+        glass_class=class_id,
+        reservation_date=reservation_date,
+        reservation_time=reservation_time
+    ).order_by('position').first()
+
+def promote_waitlist(class_id, reservation_date, reservation_time):
+    # Turn the waiters into reservations while the freed seats last, must run inside the transaction that freed them
+    slot = ReservationSlot.objects.select_for_update().filter(
+        glass_class=class_id,
+        reservation_date=reservation_date,
+        reservation_time=reservation_time
+    ).first()
+    if slot is None:
+        return []
+
+    promoted = []
+    while True:
+        entry = get_next_entry(class_id, reservation_date, reservation_time)
+        if entry is None:
+            break
+
+        # The waiter booked another time of the day in the meantime
+        if Reservation.objects.filter(glass_class=class_id, user=entry.user_id, reservation_date=reservation_date, status__in=Reservation.ACTIVE_STATUSES).exists():
+            entry.delete()
+            continue
+
+        # Strict FIFO, a later waiter does not skip a group that does not fit yet
+        if not take_seats(slot, entry.seats):
+            break
+
+        promoted.append(Reservation.objects.create(user_id=entry.user_id, glass_class_id=class_id, reservation_date=reservation_date, reservation_time=reservation_time, seats=entry.seats, created_at=timezone.now()))
+        entry.delete()
+
+    if promoted:
+        transaction.on_commit(lambda: _notify(class_id, promoted), robust=True)
+    return promoted
+
+def _notify(class_id, promoted):
+    invalidate_availability(class_id)
+    for reservation in promoted:
+        waitlist_promoted.send(sender=Reservation, user_id=reservation.user_id, reservation_id=reservation.id)